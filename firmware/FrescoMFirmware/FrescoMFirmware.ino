@@ -98,7 +98,8 @@ void setup() {
 
 void loop() {
   if (Serial.available() > 0) {
-    String line = Serial.readString();
+    // One command per line, so commands pipelined by the host are not merged together
+    String line = Serial.readStringUntil('\n');
     Command command = frescoParser->parse(line);
     frescoXYZ->perform(command);
   }
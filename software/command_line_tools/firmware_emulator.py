@@ -0,0 +1,313 @@
+"""
+Pseudo-terminal FrescoM firmware emulator.
+
+Speaks the same line protocol as firmware/FrescoMFirmware (Parser.cpp / Responder.cpp)
+over a pty, so the whole host stack (SerialService -> SerialConnection -> pyserial)
+can be exercised and benchmarked without an Arduino.
+
+Run from the software folder:
+
+    python -m command_line_tools.firmware_emulator --latency 0.002
+
+and connect to the printed /dev/pts/N port (e.g. with serial_throughput.py).
+"""
+from services.motion_time_model import AxisMotion, MotionTimeModel
+import argparse
+import logging
+import os
+import pty
+import random
+import re
+import time
+import tty
+
+# FrescoMotor.cpp: 100us HIGH + 100us LOW per step
+DEFAULT_STEPS_PER_SECOND = 5000.0
+# MotorController.cpp: REBOUND after hitting an end stopper
+REBOUND_STEPS = 1000
+NUMBER_OF_PUMPS = 8
+
+
+def to_int(parameter: str) -> int:
+    """Arduino String.toInt(): leading integer of the string, 0 when there is none."""
+    match = re.match(r'\s*([-+]?\d+)', parameter or '')
+    return int(match.group(1)) if match else 0
+
+
+class EmulatedAxis:
+    """MotorController without the hardware: tracks the position and the time a move takes."""
+
+    def __init__(self, motion: AxisMotion, axis_length: int = 20000):
+        self.motion = motion
+        self.axis_length = axis_length
+        # Firmware starts with an undefined position until the axis is zeroed
+        self.current_position = -1
+
+    def go_delta(self, steps: int) -> float:
+        self.current_position += steps
+        return self.motion.duration(steps)
+
+    def go_to_position(self, position: int) -> float:
+        if self.current_position == -1:
+            # Error case in the firmware as well: Zero was not defined, nothing moves
+            return 0.0
+        return self.go_delta(position - self.current_position)
+
+    def go_to_zero(self) -> float:
+        distance = abs(self.current_position) if self.current_position != -1 else self.axis_length
+        self.current_position = 0
+        return self.motion.duration(distance) + 2 * self.motion.duration(REBOUND_STEPS)
+
+    def measure_to_end_stopper(self) -> (int, float):
+        distance = self.axis_length
+        self.current_position = 0
+        return distance, self.motion.duration(distance) + 2 * self.motion.duration(REBOUND_STEPS)
+
+
+class FirmwareEmulator:
+
+    def __init__(self,
+                 steps_per_second: float = DEFAULT_STEPS_PER_SECOND,
+                 motion_model: MotionTimeModel = None,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 time_scale: float = 1.0,
+                 drop_rate: float = 0.0,
+                 garble_rate: float = 0.0,
+                 empty_line_rate: float = 0.0,
+                 unknown_rate: float = 0.0,
+                 batched_pumps: bool = False,
+                 seed: int = None):
+        if motion_model is None:
+            # Constant speed on every motor, no per-command overhead
+            motion_model = MotionTimeModel({axis: AxisMotion(steps_per_second) for axis in MotionTimeModel.AXES},
+                                           command_overhead=0.0)
+        self.motion_model = motion_model
+        self.x = EmulatedAxis(motion_model.axis('x'))
+        self.y = EmulatedAxis(motion_model.axis('y'))
+        self.z = EmulatedAxis(motion_model.axis('z'))
+        self.manifold = EmulatedAxis(motion_model.axis('manifold'))
+        self.pumps = [EmulatedAxis(motion_model.axis('pump')) for _ in range(NUMBER_OF_PUMPS)]
+        self.white_led = False
+        self.blue_led = False
+        # EEPROM content for GetTopLeftBottomRightCoordinates
+        self.top_left = (-1, -1)
+        self.bottom_right = (-1, -1)
+
+        self.latency = latency
+        self.jitter = jitter
+        self.time_scale = time_scale
+        self.drop_rate = drop_rate
+        self.garble_rate = garble_rate
+        self.empty_line_rate = empty_line_rate
+        self.unknown_rate = unknown_rate
+        self.random = random.Random(seed)
+
+        self.commands_handled = 0
+        self.faults_injected = 0
+        self.handlers = {
+            'Zero': self._zero,
+            'VerticalZero': self._vertical_zero,
+            'SetPosition': self._set_position,
+            'Delta': self._delta,
+            'RememberTopLeft': self._remember_top_left,
+            'RememberBottomRight': self._remember_bottom_right,
+            'GetTopLeftBottomRightCoordinates': self._get_coordinates,
+            'ManifoldZero': self._manifold_zero,
+            'DeltaPump': self._delta_pump,
+            'ManifoldDelta': self._manifold_delta,
+            'SwitchLedW': self._switch_led_w,
+            'SwitchLedB': self._switch_led_b,
+        }
+        if batched_pumps:
+            # Not in FrescoMFirmware yet, the host falls back to DeltaPump when it is answered with UnknownCommand
+            self.handlers['DeltaPumps'] = self._delta_pumps
+
+    def parse(self, line: str) -> (str, [str]):
+        # Parser.cpp: name and three space separated parameters, DeltaPumps takes any number of pairs
+        tokens = line.strip().split(' ')
+        return tokens[0], (tokens[1:] + ['', '', ''])[:max(3, len(tokens) - 1)]
+
+    def perform(self, line: str) -> (str, float):
+        """
+        Execute one command line.
+
+        Returns:
+            tuple: (raw bytes the firmware writes back, simulated execution time in seconds)
+        """
+        name, parameters = self.parse(line)
+        handler = self.handlers.get(name)
+        if handler is None:
+            return 'UnknownCommand \n', 0.0
+        output, duration = handler(parameters)
+        return output, duration + self.motion_model.command_overhead
+
+    def _done(self, duration: float = 0.0) -> (str, float):
+        return 'Done \n', duration
+
+    def _zero(self, parameters):
+        # FrescoXYZ::goToZero: Z first, then X and Y
+        return self._done(self.z.go_to_zero() + self.x.go_to_zero() + self.y.go_to_zero())
+
+    def _vertical_zero(self, parameters):
+        return self._done(self.z.go_to_zero())
+
+    def _set_position(self, parameters):
+        x, y, z = (to_int(parameter) for parameter in parameters[:3])
+        return self._done(self.x.go_to_position(x) + self.y.go_to_position(y) + self.z.go_to_position(z))
+
+    def _delta(self, parameters):
+        x, y, z = (to_int(parameter) for parameter in parameters[:3])
+        return self._done(self.x.go_delta(x) + self.y.go_delta(y) + self.z.go_delta(z))
+
+    def _remember_top_left(self, parameters):
+        x_end, x_time = self.x.measure_to_end_stopper()
+        y_start, y_time = self.y.measure_to_end_stopper()
+        self.top_left = (x_end, y_start)
+        return self._done(x_time + y_time)
+
+    def _remember_bottom_right(self, parameters):
+        x_start, x_time = self.x.measure_to_end_stopper()
+        y_end, y_time = self.y.measure_to_end_stopper()
+        self.bottom_right = (x_start, y_end)
+        return self._done(x_time + y_time)
+
+    def _get_coordinates(self, parameters):
+        return 'EdgeCoordinates {} {} {} {}\n'.format(self.top_left[0], self.top_left[1],
+                                                      self.bottom_right[0], self.bottom_right[1]), 0.0
+
+    def _manifold_zero(self, parameters):
+        return self._done(self.manifold.go_to_zero())
+
+    def _delta_pump(self, parameters):
+        pump_index = to_int(parameters[0])
+        duration = 0.0
+        if 0 <= pump_index < NUMBER_OF_PUMPS:
+            duration = self.pumps[pump_index].go_delta(to_int(parameters[1]))
+        # Parser.cpp prints this without a line break before the response
+        output, duration = self._done(duration)
+        return 'Parsed Delta pump' + output, duration
+
+    def _delta_pumps(self, parameters):
+        # Pairs of pump index and steps, the pumps are driven one after another
+        duration = 0.0
+        for index in range(0, len(parameters) - 1, 2):
+            pump_index = to_int(parameters[index])
+            if 0 <= pump_index < NUMBER_OF_PUMPS:
+                duration += self.pumps[pump_index].go_delta(to_int(parameters[index + 1]))
+        return self._done(duration)
+
+    def _manifold_delta(self, parameters):
+        return self._done(self.manifold.go_delta(to_int(parameters[0])))
+
+    def _switch_led_w(self, parameters):
+        self.white_led = to_int(parameters[0]) == 1
+        return self._done()
+
+    def _switch_led_b(self, parameters):
+        self.blue_led = to_int(parameters[0]) == 1
+        return self._done()
+
+    def inject_faults(self, output: str) -> str:
+        """Apply configured fault injection to a response, returns what is actually written."""
+        if self.random.random() < self.drop_rate:
+            self.faults_injected += 1
+            logging.warning('[Emulator] Dropping response')
+            return ''
+        if self.random.random() < self.unknown_rate:
+            self.faults_injected += 1
+            output = 'UnknownCommand \n'
+        if self.random.random() < self.garble_rate:
+            self.faults_injected += 1
+            position = self.random.randrange(len(output) - 1)
+            output = output[:position] + chr(self.random.randrange(33, 127)) + output[position + 1:]
+        if self.random.random() < self.empty_line_rate:
+            self.faults_injected += 1
+            output = '\n' + output
+        return output
+
+    def serve(self, master_fd: int):
+        buffer = b''
+        while True:
+            data = os.read(master_fd, 1024)
+            if not data:
+                return
+            buffer += data
+            while b'\n' in buffer:
+                raw_line, buffer = buffer.split(b'\n', 1)
+                line = raw_line.decode('utf-8', errors='replace').strip()
+                if not line:
+                    continue
+                output, duration = self.perform(line)
+                delay = self.latency + self.random.uniform(0, self.jitter) + duration * self.time_scale
+                if delay > 0:
+                    time.sleep(delay)
+                self.commands_handled += 1
+                logging.info(f'[Emulator] {line} -> {output.strip()} ({duration:.3f}s motion)')
+                output = self.inject_faults(output)
+                if output:
+                    os.write(master_fd, output.encode('utf-8'))
+
+
+def open_pty(link: str = None) -> (int, str):
+    master_fd, slave_fd = pty.openpty()
+    # No echo and no line discipline, the port has to behave like a USB serial device
+    tty.setraw(slave_fd)
+    port = os.ttyname(slave_fd)
+    if link:
+        if os.path.islink(link):
+            os.remove(link)
+        os.symlink(port, link)
+        port = link
+    return master_fd, port
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Emulate FrescoM firmware on a pseudo-terminal')
+    parser.add_argument('--link', type=str, default=None,
+                        help='create a symlink to the pty (e.g. /tmp/fresco-emulator)')
+    parser.add_argument('--steps-per-second', type=float, default=DEFAULT_STEPS_PER_SECOND,
+                        help='simulated motor speed for every axis')
+    parser.add_argument('--motion-model', type=str, default=None,
+                        help='calibrated motion_time_model.json to take motor speeds and command overhead from')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='fixed delay per command in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='random extra delay per command in seconds')
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='multiplier for simulated motion time (0 = no motion delay)')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='probability of not answering')
+    parser.add_argument('--garble-rate', type=float, default=0.0, help='probability of corrupting a byte')
+    parser.add_argument('--empty-line-rate', type=float, default=0.0,
+                        help='probability of an empty line before the answer')
+    parser.add_argument('--unknown-rate', type=float, default=0.0,
+                        help='probability of answering UnknownCommand')
+    parser.add_argument('--batched-pumps', action='store_true',
+                        help='accept DeltaPumps, FrescoMFirmware has no batched dispense and answers UnknownCommand')
+    parser.add_argument('--seed', type=int, default=None, help='random seed for jitter and faults')
+    parser.add_argument('--verbose', action='store_true', help='log every command')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    emulator = FirmwareEmulator(steps_per_second=args.steps_per_second,
+                                motion_model=MotionTimeModel.load(args.motion_model) if args.motion_model else None,
+                                latency=args.latency,
+                                jitter=args.jitter,
+                                time_scale=args.time_scale,
+                                drop_rate=args.drop_rate,
+                                garble_rate=args.garble_rate,
+                                empty_line_rate=args.empty_line_rate,
+                                unknown_rate=args.unknown_rate,
+                                batched_pumps=args.batched_pumps,
+                                seed=args.seed)
+    master_fd, port = open_pty(args.link)
+    print(f'FrescoM firmware emulator listening on {port}', flush=True)
+    try:
+        emulator.serve(master_fd)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f'Handled {emulator.commands_handled} commands, injected {emulator.faults_injected} faults')
@@ -0,0 +1,86 @@
+"""
+Compare autofocus search strategies on recorded focus stacks.
+
+Stacks are the folders CollectDataFocusStacks writes (S_0.png, S_1.png, ... one jump further up
+each), the focus measure of every slice is computed once and every strategy searches that curve,
+a frame at z being the nearest slice. The best slice of the full stack is the reference.
+
+    python -m command_line_tools.focus_search_benchmark ./images/<session> --jump 5 --plate 96-well
+"""
+from services.focus_measure import FocusMeasure
+from services.focus_search import FOCUS_SEARCHES, create_focus_search
+from plates import get_plate_config
+from PIL import Image
+import numpy as np
+import argparse
+import os
+import re
+
+SLICE_PATTERN = re.compile(r'^S_(\d+)\.png$')
+
+
+def find_stacks(root: str) -> [str]:
+    """Folders below root with S_<index>.png slices."""
+    stacks = []
+    for folder, _, files in os.walk(root):
+        if any(SLICE_PATTERN.match(name) for name in files):
+            stacks.append(folder)
+    return sorted(stacks)
+
+
+def load_stack_measures(folder: str, jump: int, measure_name: str) -> (np.ndarray, np.ndarray):
+    """(z of every slice in steps relative to the stack start, its focus measure), ordered by z."""
+    focus_measure = FocusMeasure()
+    measure = getattr(focus_measure, measure_name)
+    slices = sorted((int(match.group(1)), name) for name in os.listdir(folder)
+                    for match in [SLICE_PATTERN.match(name)] if match)
+    # The protocol moves one jump up (-z) before every slice
+    z = np.array([-(index + 1) * jump for index, _ in slices], dtype=np.float64)
+    measures = np.array([measure(np.array(Image.open(os.path.join(folder, name)).convert('L')))
+                         for _, name in slices], dtype=np.float64)
+    order = np.argsort(z)
+    return z[order], measures[order]
+
+
+def run_benchmark(stacks: [(np.ndarray, np.ndarray)], searches: dict, tolerance: float) -> dict:
+    """Strategy name -> (mean frames, mean error in steps, share of stacks within tolerance)."""
+    results = {}
+    for name, search in searches.items():
+        frames, errors = [], []
+        for z, measures in stacks:
+            def measure_at(target):
+                return measures[int(np.argmin(np.abs(z - target)))]
+
+            best_z, _ = search.search(measure_at, z[0], z[-1])
+            frames.append(search.evaluations)
+            errors.append(abs(best_z - z[int(np.argmax(measures))]))
+        errors = np.array(errors)
+        results[name] = (float(np.mean(frames)), float(np.mean(errors)), float(np.mean(errors <= tolerance)))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark autofocus search strategies on recorded focus stacks')
+    parser.add_argument('root', type=str, help='session folder with recorded stacks')
+    parser.add_argument('--jump', type=int, default=5, help='steps between slices of a stack')
+    parser.add_argument('--plate', type=str, default='96-well', help='plate type whose focus_search config is benchmarked')
+    parser.add_argument('--measure', type=str, default='MLOG', choices=['LAPV', 'LAPM', 'MLOG', 'TENG'],
+                        help='focus measure of FocusMeasure')
+    args = parser.parse_args()
+
+    config = get_plate_config(args.plate)['focus_search']
+    tolerance = config['options'].get('tolerance', 2.0)
+    # Every strategy with the plate's tolerance, the grid at the stack spacing, plus the configured one
+    searches = {name: search_class(tolerance=tolerance) for name, search_class in FOCUS_SEARCHES.items()}
+    searches['grid'] = FOCUS_SEARCHES['grid'](step=args.jump)
+    searches[f"{config['strategy']} ({args.plate})"] = create_focus_search(config)
+
+    stack_folders = find_stacks(args.root)
+    if not stack_folders:
+        parser.error(f'No focus stacks (S_<index>.png) below {args.root}')
+    stacks = [load_stack_measures(folder, args.jump, args.measure) for folder in stack_folders]
+    print(f'{len(stacks)} stacks, {args.measure}, error is the distance to the best slice')
+    # A frame lands on the nearest slice, the error cannot get below half a jump
+    within = max(tolerance, args.jump / 2)
+    for name, (frames, error, share) in run_benchmark(stacks, searches, within).items():
+        print(f'{name:24s} {frames:6.1f} frames  {error:6.2f} steps mean error  {100 * share:5.1f}% within {within:g} steps')
@@ -0,0 +1,39 @@
+"""
+End-to-end command throughput through SerialService -> SerialConnection -> pyserial.
+
+    python -m command_line_tools.firmware_emulator --link /tmp/fresco-emulator &
+    python -m command_line_tools.serial_throughput --port /tmp/fresco-emulator --pipelined
+"""
+from services.services import global_services
+import argparse
+import time
+
+
+def run_benchmark(port: str, number_of_commands: int, pipelined: bool, command: str):
+    connection = global_services.serial_service.create_connection(port, pipelined=pipelined)
+    time_begin = time.perf_counter()
+    if pipelined:
+        futures = [connection.execute_command_async(command) for _ in range(number_of_commands)]
+        responses = [future.result() for future in futures]
+    else:
+        responses = [connection.execute_command_sync(command) for _ in range(number_of_commands)]
+    elapsed = time.perf_counter() - time_begin
+    if pipelined:
+        connection.stop_pipeline()
+    unexpected = [response for response in responses if 'UnknownCommand' in response]
+    return elapsed, unexpected
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure serial command throughput')
+    parser.add_argument('--port', type=str, required=True, help='serial port or emulator pty')
+    parser.add_argument('--count', type=int, default=200, help='number of commands to send')
+    parser.add_argument('--command', type=str, default='Delta 0 0 0', help='command line to repeat')
+    parser.add_argument('--pipelined', action='store_true', help='use the pipelined command queue')
+    args = parser.parse_args()
+
+    elapsed, unexpected = run_benchmark(args.port, args.count, args.pipelined, args.command)
+    print(f'{args.count} x "{args.command}" in {elapsed:.3f}s: '
+          f'{args.count / elapsed:.1f} commands/s, {1000 * elapsed / args.count:.2f} ms/command')
+    if unexpected:
+        print(f'{len(unexpected)} commands answered with UnknownCommand')
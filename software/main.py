@@ -2,7 +2,8 @@ from tkinter import Tk
 from services.fresco_xyz import FrescoXYZ
 from services.z_camera import ZCamera
 from services.fresco_camera import BaseCamera
-from services.fresco_renderer import FrescoRenderer
+from services.synthetic_camera import SyntheticCamera
+from services.fresco_clock import WallClock, SimulatedClock
 from services.image_processor import ImageProcessor
 from ui.fresco_ui import MainUI
 from plates import get_available_plate_types
@@ -24,25 +25,69 @@ def parse_args():
         action='store_true',
         help='Run in virtual-only mode'
     )
+
+    parser.add_argument(
+        '--simulate',
+        action='store_true',
+        help='Virtual-only mode on a simulated clock: waits and moves advance virtual time instantly'
+    )
     
+    parser.add_argument(
+        '--synthetic-camera',
+        action='store_true',
+        help='Virtual mode: image procedural cells with z-dependent defocus instead of the plate view'
+    )
+
+    parser.add_argument(
+        '--renderer',
+        type=str,
+        default='3d',
+        choices=['3d', '2d'],
+        help='Plate view: 3d (pygame + OpenGL) or 2d (top-down map, numpy only, works without a GL stack)'
+    )
+
+    parser.add_argument(
+        '--export-trajectory',
+        type=str,
+        default=None,
+        metavar='PATH',
+        help='Write the robot path to PATH (.npy or CSV) on exit'
+    )
+
     return parser.parse_args()
 
 def main():
     args = parse_args()
+    if args.simulate:
+        args.virtual = True
     
     print(f"Starting FrescoM with {args.plate_type} plate")
-    print(f"Mode: {'Virtual' if args.virtual else 'Hardware'}")
+    print(f"Mode: {'Simulated' if args.simulate else 'Virtual' if args.virtual else 'Hardware'}")
 
     # Initialize components
-    fresco_xyz = FrescoXYZ(virtual_only=args.virtual, plate_type=args.plate_type)
+    clock = SimulatedClock() if args.simulate else WallClock()
+    fresco_xyz = FrescoXYZ(virtual_only=args.virtual, plate_type=args.plate_type, clock=clock)
     image_processor = ImageProcessor()
-    fresco_renderer = FrescoRenderer(image_processor, fresco_xyz, plate_type=args.plate_type)
+    render_service = None
+    if args.renderer == '2d':
+        from services.plate_monitor_renderer import PlateMonitorRenderer
+        fresco_renderer = PlateMonitorRenderer(fresco_xyz, plate_type=args.plate_type)
+    else:
+        # Imported here, pygame and OpenGL are not needed for the 2D view
+        from services.fresco_renderer import FrescoRenderer
+        from services.render_service import RenderService
+        # The renderer lives on its own thread, so protocol threads get live frames
+        render_service = RenderService(lambda: FrescoRenderer(image_processor, fresco_xyz, plate_type=args.plate_type))
+        fresco_renderer = render_service.start()
     
     # Link renderer to xyz for collision detection
     fresco_xyz.renderer = fresco_renderer
 
     # In virtual mode, use renderer as camera fallback
-    fresco_camera = None if args.virtual else BaseCamera()
+    if args.virtual and args.synthetic_camera:
+        fresco_camera = SyntheticCamera(fresco_xyz, plate_type=args.plate_type)
+    else:
+        fresco_camera = None if args.virtual else BaseCamera()
     z_camera = ZCamera(fresco_xyz, fresco_camera, fresco_renderer)
     
     # Create UI
@@ -52,12 +97,19 @@ def main():
     MainUI(
         fresco_xyz=fresco_xyz,
         z_camera=z_camera,
-        fresco_camera=None if args.virtual else BaseCamera(),
+        fresco_camera=fresco_camera,
         fresco_renderer=fresco_renderer,
         virtual_only=args.virtual
     )
     
     root.mainloop()
+    if render_service is not None:
+        render_service.stop()
+    if args.export_trajectory:
+        fresco_renderer.trajectory.export(args.export_trajectory)
+        print(f"Trajectory written to {args.export_trajectory}")
+    # Spilled pump event chunks live in a temporary directory
+    fresco_renderer.pump_events.close()
 
 
 if __name__ == '__main__':
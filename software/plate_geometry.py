@@ -0,0 +1,106 @@
+from plates import get_plate_config, STEPS_PER_MM
+from functools import lru_cache
+import numpy as np
+import math
+
+
+class PlateGeometry:
+    """
+    Well centers of one plate type, computed once as numpy arrays.
+    Plate-relative coordinates start at the plate corner, absolute coordinates
+    add the calibrated bottom_left offset (steps) of FrescoXYZ.plate.
+    Arrays are indexed [row, col] and must not be modified, instances are shared.
+    """
+
+    def __init__(self, plate_type: str, bottom_left: (int, int) = (0, 0)):
+        cfg = get_plate_config(plate_type)
+        self.plate_type = plate_type
+        self.config = cfg
+        self.rows = cfg['rows']
+        self.cols = cfg['cols']
+        self.bottom_left = tuple(bottom_left)
+        self.well_spacing_mm = cfg['well_spacing']
+        self.corner_offset_x_mm = cfg['corner_offset_x']
+        self.corner_offset_y_mm = cfg['corner_offset_y']
+        self.well_radius_mm = cfg['well_diameter'] / 2
+        # Renderer highlights a well when the stage is inside this square around its center
+        self.capture_size_mm = self.well_radius_mm * 1.5
+        self.well_depth_mm = cfg['well_depth']
+
+        self.well_spacing_steps = int(self.well_spacing_mm * STEPS_PER_MM)
+        self.corner_offset_x_steps = int(self.corner_offset_x_mm * STEPS_PER_MM)
+        self.corner_offset_y_steps = int(self.corner_offset_y_mm * STEPS_PER_MM)
+
+        # Plate outline: corner offset on both sides of the well grid
+        self.width_mm = 2 * self.corner_offset_x_mm + (self.cols - 1) * self.well_spacing_mm
+        self.height_mm = 2 * self.corner_offset_y_mm + (self.rows - 1) * self.well_spacing_mm
+
+        cols = np.arange(self.cols)
+        rows = np.arange(self.rows)
+        # Same expression as the per-well computation, so float values match exactly
+        self.centers_x_mm = np.array([self.corner_offset_x_mm + col * self.well_spacing_mm for col in range(self.cols)])
+        self.centers_y_mm = np.array([self.corner_offset_y_mm + row * self.well_spacing_mm for row in range(self.rows)])
+        self.centers_mm = np.stack(np.broadcast_arrays(self.centers_x_mm[None, :], self.centers_y_mm[:, None]), axis=-1)
+        self.centers_steps = np.stack(np.broadcast_arrays(
+            (self.corner_offset_x_steps + cols * self.well_spacing_steps)[None, :],
+            (self.corner_offset_y_steps + rows * self.well_spacing_steps)[:, None]), axis=-1)
+        self.absolute_centers_mm = self.centers_mm + np.array(self.bottom_left) / STEPS_PER_MM
+        self.absolute_centers_steps = self.centers_steps + np.array(self.bottom_left)
+        self.labels = [[f"{cfg['row_labels'][row]}{col + 1}" for col in range(self.cols)] for row in range(self.rows)]
+        for array in (self.centers_x_mm, self.centers_y_mm, self.centers_mm, self.centers_steps,
+                      self.absolute_centers_mm, self.absolute_centers_steps):
+            array.flags.writeable = False
+
+    def well_position_steps(self, row: int, col: int) -> (int, int):
+        """Plate-relative center of a well in steps."""
+        return int(self.centers_steps[row, col, 0]), int(self.centers_steps[row, col, 1])
+
+    def well_at(self, x_mm: float, y_mm: float):
+        """
+        Well whose capture square contains the plate-relative point, by index arithmetic.
+        Capture squares of neighbouring wells overlap, the lowest row and then the lowest
+        column wins, which is the first match of a row-major scan over all wells.
+
+        Returns:
+            tuple: (row, col) or None
+        """
+        row = self._first_index(y_mm, self.centers_y_mm)
+        if row is None:
+            return None
+        col = self._first_index(x_mm, self.centers_x_mm)
+        if col is None:
+            return None
+        return row, col
+
+    def well_at_absolute(self, x_mm: float, y_mm: float):
+        """well_at() for a robot position in absolute mm."""
+        return self.well_at(x_mm - self.bottom_left[0] / STEPS_PER_MM, y_mm - self.bottom_left[1] / STEPS_PER_MM)
+
+    def _first_index(self, value: float, centers: np.ndarray):
+        first = math.floor((value - centers[0] - self.capture_size_mm) / self.well_spacing_mm)
+        last = math.ceil((value - centers[0] + self.capture_size_mm) / self.well_spacing_mm)
+        # Candidates are a handful around the estimate, checked with the exact containment test
+        for index in range(max(first, 0), min(last, len(centers) - 1) + 1):
+            if abs(value - centers[index]) <= self.capture_size_mm:
+                return index
+        return None
+
+    def label_to_index(self, label: str):
+        """(row, col) of a well label such as 'B12', None when the plate has no such well."""
+        label = label.upper()
+        for row, row_label in enumerate(self.config['row_labels']):
+            if label.startswith(row_label) and label[len(row_label):].isdigit():
+                col = int(label[len(row_label):]) - 1
+                if 0 <= col < self.cols:
+                    return row, col
+        return None
+
+
+@lru_cache(maxsize=32)
+def _cached_plate_geometry(plate_type: str, bottom_left: (int, int)) -> PlateGeometry:
+    return PlateGeometry(plate_type, bottom_left)
+
+
+def get_plate_geometry(plate_type: str, bottom_left=(0, 0)) -> PlateGeometry:
+    """Shared geometry for a plate type and calibration offset (steps)."""
+    return _cached_plate_geometry(plate_type, (int(bottom_left[0]), int(bottom_left[1])))
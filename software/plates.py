@@ -50,7 +50,20 @@ PLATE_TYPES = {
     },
 }
 
+# Autofocus search (services/focus_search.py), a plate type may override any key with its own 'focus_search' entry.
+# strategy: grid, golden, peak_fit or brent; options: its parameters in steps (tolerance, max_evaluations,
+# step for grid, initial_points and gaussian for peak_fit, initial_step for brent);
+# range: steps searched below the autofocus start; settle_seconds: wait after each move before the frame
+DEFAULT_FOCUS_SEARCH = {
+    'strategy': 'peak_fit',
+    'options': {'tolerance': 2.0, 'max_evaluations': 15},
+    'range': 150,
+    'settle_seconds': 0.5,
+}
+
 STEPS_PER_MM = 200.0
+# Manifold tip below the manifold carriage (mm), shared by renderer and collision checks
+MANIFOLD_TIP_LENGTH = 20.0
 
 def get_plate_config(plate_type: str) -> dict:
     if plate_type not in PLATE_TYPES:
@@ -61,6 +74,7 @@ def get_plate_config(plate_type: str) -> dict:
     scale = base['steps_per_well']
     base['bottom_left'] = (0, 0)
     base['top_right'] = ((base['cols'] - 1) * scale, (base['rows'] - 1) * scale)
+    base['focus_search'] = dict(DEFAULT_FOCUS_SEARCH, **base.get('focus_search', {}))
     return base
 
 def get_available_plate_types() -> list:
@@ -0,0 +1,93 @@
+from services.fresco_xyz import FrescoXYZ
+from services.async_serial_connection import AsyncSerialConnection
+from services.fresco_command import FrescoCommand
+import asyncio
+import logging
+
+
+class AsyncFrescoXYZ:
+    """
+    Awaitable facade over FrescoXYZ for code running on a single asyncio event loop.
+    Virtual state, collision warnings and the renderer are shared with the wrapped
+    FrescoXYZ, only the round-trip to the firmware is awaited instead of blocking:
+
+        xyz = AsyncFrescoXYZ(fresco_xyz, global_services.serial_service.current_async_connection)
+        await xyz.delta(0, 0, 100)
+        image = await xyz.grab_image(camera)
+    """
+
+    def __init__(self, fresco_xyz: FrescoXYZ, connection: AsyncSerialConnection = None):
+        self.fresco_xyz = fresco_xyz
+        self.connection = connection
+
+    async def execute_command(self, message) -> str:
+        command = FrescoCommand.coerce(message)
+        logging.debug(f"[AsyncFrescoXYZ] Executing: {command}")
+        response = self.fresco_xyz._emulate_command(command)
+        outgoing_commands = self.fresco_xyz.move_coalescer.push(command)
+        if not self.fresco_xyz.virtual_only:
+            response = 'Done \n'
+            for outgoing in outgoing_commands:
+                response = await self.connection.execute_command(outgoing.to_wire())
+        return response
+
+    async def white_led_switch(self, state: bool):
+        await self.execute_command(FrescoCommand('SwitchLedW', 1 if state else 0))
+
+    async def blue_led_switch(self, state: bool):
+        await self.execute_command(FrescoCommand('SwitchLedB', 1 if state else 0))
+
+    async def delta(self, x: float, y: float, z: float):
+        """Move relative to current position (steps), see FrescoXYZ.delta."""
+        position = self.fresco_xyz.virtual_position
+        new_pos = {'x': position['x'] + x, 'y': position['y'] + y, 'z': position['z'] + z}
+        # The clearance hook (FluidicsScheduler) is synchronous, a retraction blocks the loop for its round-trip
+        self.fresco_xyz._ensure_clearance(new_pos)
+        self.fresco_xyz._warn_collision(new_pos)
+        await self.execute_command(FrescoCommand('Delta', x, y, z))
+
+    async def delta_pump(self, pump_index: int, delta: float):
+        await self.execute_command(FrescoCommand('DeltaPump', pump_index, delta))
+
+    async def delta_pumps(self, deltas: dict):
+        """Drive several pumps with one round-trip, see FrescoXYZ.delta_pumps."""
+        deltas = {int(pump_index): delta for pump_index, delta in deltas.items() if delta}
+        if len(deltas) < 2 or not self.fresco_xyz.batched_pumps_supported:
+            for pump_index, delta in deltas.items():
+                await self.delta_pump(pump_index, delta)
+            return
+        parameters = [parameter for pump_index, delta in sorted(deltas.items()) for parameter in (pump_index, delta)]
+        response = await self.execute_command(FrescoCommand('DeltaPumps', *parameters))
+        if response and 'UnknownCommand' in response:
+            logging.warning("[AsyncFrescoXYZ] Firmware does not know DeltaPumps, driving pumps one by one")
+            self.fresco_xyz.batched_pumps_supported = False
+            for pump_index, delta in sorted(deltas.items()):
+                for outgoing in self.fresco_xyz.move_coalescer.push(FrescoCommand('DeltaPump', pump_index, delta)):
+                    await self.connection.execute_command(outgoing.to_wire())
+
+    async def manifold_delta(self, delta: float):
+        await self.execute_command(FrescoCommand('ManifoldDelta', delta))
+
+    async def set_position(self, x: float, y: float, z: float):
+        """Move to absolute plate-relative position (steps), see FrescoXYZ.set_position."""
+        absolute_x, absolute_y = self.fresco_xyz.plate_to_absolute(x, y)
+        self.fresco_xyz._ensure_clearance({'x': absolute_x, 'y': absolute_y, 'z': z})
+        self.fresco_xyz._warn_collision({'x': absolute_x, 'y': absolute_y, 'z': z})
+        await self.execute_command(FrescoCommand('SetPosition', int(absolute_x), int(absolute_y), int(z)))
+
+    async def go_to_zero(self):
+        await self.set_position(0, 0, self.fresco_xyz.SAFE_DEFAULT_Z)
+
+    async def go_to_zero_manifold(self):
+        await self.execute_command(FrescoCommand('ManifoldZero'))
+
+    async def go_to_zero_z(self):
+        await self.execute_command(FrescoCommand('VerticalZero'))
+
+    async def grab_image(self, camera):
+        """
+        Grab a frame on the default executor, so stage motion awaited on the
+        same loop keeps going while the camera blocks.
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, camera.get_current_image)
@@ -0,0 +1,109 @@
+from serial import Serial
+from services.serial_telemetry import SerialTelemetry
+from collections import deque
+from datetime import datetime
+import asyncio
+import logging
+
+
+class AsyncSerialConnection:
+    """
+    asyncio counterpart of SerialConnection.
+    The serial port is opened non-blocking and its file descriptor is watched by the
+    event loop (loop.add_reader), so awaiting a command does not need a thread.
+    Replies are matched to commands in order, like the pipelined SerialConnection.
+    Requires a POSIX event loop (file descriptor readers are not available for serial
+    ports on Windows).
+    """
+    RESPONSE_TOKENS = ('Done', 'EdgeCoordinates', 'UnknownCommand')
+    DEFAULT_MAX_IN_FLIGHT = 2
+
+    def __init__(self, port: str, frequency: int, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.port = port
+        self.frequency = frequency
+        self.max_in_flight = max_in_flight
+        self.serial = Serial(port, frequency, timeout=0)
+        self.serial.reset_input_buffer()
+        self.serial.reset_output_buffer()
+        self.loop = None
+        self._buffer = bytearray()
+        self._in_flight = deque()
+        self._window = None
+        self._sequence = 0
+        self.telemetry = SerialTelemetry()
+
+    async def open(self):
+        """Attach the reader callback to the running event loop."""
+        if self.loop is not None:
+            return
+        self.loop = asyncio.get_event_loop()
+        self._window = asyncio.Semaphore(self.max_in_flight)
+        self.loop.add_reader(self.serial.fileno(), self._on_readable)
+        logging.info(f"[AsyncSerialConnection] Reading {self.port} on event loop")
+
+    def close(self):
+        if self.loop is not None:
+            self.loop.remove_reader(self.serial.fileno())
+            self.loop = None
+        for entry in self._in_flight:
+            if not entry[2].done():
+                entry[2].set_exception(ConnectionError('Serial connection closed'))
+        self._in_flight.clear()
+        self.serial.close()
+
+    def send_message_line(self, message: str):
+        byte_message = bytearray(message + '\n', 'utf8')
+        self.serial.write(byte_message)
+        self.telemetry.record_sent(len(byte_message))
+
+    async def execute_command(self, message: str) -> str:
+        """
+        Send a command and wait for its reply without blocking the event loop.
+
+        Args:
+            message: Command line to execute
+
+        Returns:
+            str: reply line starting with Done / EdgeCoordinates / UnknownCommand
+        """
+        await self.open()
+        async with self._window:
+            self._sequence += 1
+            future = self.loop.create_future()
+            self._in_flight.append((self._sequence, message, future, datetime.now()))
+            logging.debug(f"[AsyncSerialConnection] -> #{self._sequence} {message}")
+            self.send_message_line(message)
+            return await future
+
+    def _on_readable(self):
+        try:
+            data = self.serial.read(self.serial.in_waiting or 1)
+        except Exception as e:
+            logging.error(f"[AsyncSerialConnection] Read failed: {e}")
+            self.close()
+            return
+        self.telemetry.record_received(len(data))
+        self._buffer.extend(data)
+        while b'\n' in self._buffer:
+            raw_line, _, rest = bytes(self._buffer).partition(b'\n')
+            self._buffer = bytearray(rest)
+            self._handle_line(raw_line.decode('utf-8', errors='replace').strip())
+
+    def _handle_line(self, line: str):
+        positions = [line.find(token) for token in self.RESPONSE_TOKENS if token in line]
+        if not positions:
+            if line:
+                logging.debug(f"[AsyncSerialConnection] Firmware output: {line}")
+            else:
+                self.telemetry.record_empty_read()
+            return
+        response = line[min(positions):]
+        if not self._in_flight:
+            logging.warning(f"[AsyncSerialConnection] Unexpected response without command in flight: {response}")
+            return
+        sequence, message, future, time_begin = self._in_flight.popleft()
+        elapsed = datetime.now() - time_begin
+        self.telemetry.record_command(message, elapsed.total_seconds(), response)
+        logging.debug(f"[AsyncSerialConnection] <- #{sequence} {response} ({elapsed})")
+        if not future.done():
+            future.set_result(response)
@@ -0,0 +1,242 @@
+from plates import STEPS_PER_MM, MANIFOLD_TIP_LENGTH
+from plate_geometry import PlateGeometry
+from services.fresco_command import FrescoCommand
+import numpy as np
+import threading
+import logging
+
+
+class CollisionPreflightError(Exception):
+    """Raised when a protocol is not started because its preflight found an unsafe move."""
+
+    def __init__(self, report):
+        super(CollisionPreflightError, self).__init__(str(report.first_issue))
+        self.report = report
+
+
+class CommandRecorder:
+    """
+    Records the emulated command stream of a FrescoXYZ (fresco_xyz.command_recorder = recorder)
+    as motor positions before and after every command, in steps.
+    """
+    # Firmware moves Z first for these (FrescoXYZ::goToZero), X, Y, Z otherwise
+    Z_FIRST_COMMANDS = ('Zero', 'VerticalZero')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = []
+        self.rows = []
+
+    def record(self, command: FrescoCommand, steps_before: dict, steps_after: dict):
+        row = (steps_before['x'], steps_before['y'], steps_before['z'], steps_before['manifold'],
+               steps_after['x'], steps_after['y'], steps_after['z'], steps_after['manifold'],
+               1.0 if command.name in self.Z_FIRST_COMMANDS else 0.0)
+        with self.lock:
+            self.commands.append(command)
+            self.rows.append(row)
+
+    def as_array(self) -> np.ndarray:
+        """(number of commands, 9): x0 y0 z0 m0 x1 y1 z1 m1 z_first"""
+        with self.lock:
+            return np.array(self.rows, dtype=np.float64).reshape(-1, 9)
+
+    def clear(self):
+        with self.lock:
+            self.commands = []
+            self.rows = []
+
+
+class PreflightIssue:
+
+    def __init__(self, command_index: int, command: FrescoCommand, reason: str, position_mm: (float, float, float)):
+        self.command_index = command_index
+        self.command = command
+        self.reason = reason
+        self.position_mm = position_mm
+
+    def __str__(self):
+        x, y, z = self.position_mm
+        return f"Command #{self.command_index} '{self.command}': {self.reason} at ({x:.1f}, {y:.1f}, {z:.1f})mm"
+
+
+class PreflightReport:
+
+    def __init__(self, number_of_commands: int, number_of_legs: int, issues: [PreflightIssue]):
+        self.number_of_commands = number_of_commands
+        self.number_of_legs = number_of_legs
+        self.issues = issues
+
+    @property
+    def is_safe(self) -> bool:
+        return not self.issues
+
+    @property
+    def first_issue(self):
+        return self.issues[0] if self.issues else None
+
+    def summary(self) -> str:
+        if self.is_safe:
+            return f"Preflight passed: {self.number_of_commands} commands, {self.number_of_legs} moves checked"
+        return (f"Preflight failed: {len(self.issues)} unsafe moves in {self.number_of_commands} commands, "
+                f"first: {self.first_issue}")
+
+
+class CollisionPreflight:
+    """
+    Swept-path check of a whole command stream before anything moves.
+    Every command is split into the axis-aligned legs the firmware drives
+    (X, then Y, then Z, then the manifold) and each leg is tested as a whole,
+    not only its end point, against the plate, the wells and the manifold tip:
+
+    - inside the plate outline but outside a well opening the tip must stay
+      SURFACE_CLEARANCE above the plate top
+    - inside a well opening (the round well, not the larger square the renderer
+      highlights) the tip must stay above the well bottom
+    - every leg must stay within BOUNDS_MARGIN of the plate outline
+
+    As in FrescoXYZ._check_collision, the tip is only checked while the manifold
+    is lowered (manifold position not 0). All legs are checked at once with numpy.
+    """
+    SURFACE_CLEARANCE = 2.0
+    WELL_BOTTOM_CLEARANCE = 0.5
+    BOUNDS_MARGIN = 15.0
+    # Order of the motors in a recorded row
+    X, Y, Z, MANIFOLD = 0, 1, 2, 3
+
+    def __init__(self, geometry: PlateGeometry, bottom_left: (float, float) = None):
+        self.geometry = geometry
+        self.bottom_left = geometry.bottom_left if bottom_left is None else bottom_left
+        self.plate_top = geometry.config['plate_thickness']
+
+    def check_recorder(self, recorder: CommandRecorder, max_issues: int = 100) -> PreflightReport:
+        return self.check(recorder.as_array(), list(recorder.commands), max_issues)
+
+    def check(self, rows: np.ndarray, commands: [FrescoCommand], max_issues: int = 100) -> PreflightReport:
+        starts, ends, command_indices, lowest_tip, hits_surface, hits_well_bottom, out_of_bounds = self._sweep(rows)
+
+        issues = []
+        unsafe = np.flatnonzero(hits_surface | hits_well_bottom | out_of_bounds)
+        # One issue per command, its first unsafe leg
+        _, first_legs = np.unique(command_indices[unsafe], return_index=True)
+        for leg in unsafe[first_legs][:max_issues]:
+            if out_of_bounds[leg]:
+                reason = 'Move leaves the plate area'
+            elif hits_surface[leg]:
+                reason = f'Manifold tip crosses the plate surface (tip at {lowest_tip[leg]:.1f}mm)'
+            else:
+                reason = f'Manifold tip below well bottom (tip at {lowest_tip[leg]:.1f}mm)'
+            position = (ends[leg, self.X] / STEPS_PER_MM, ends[leg, self.Y] / STEPS_PER_MM,
+                        -ends[leg, self.Z] / STEPS_PER_MM)
+            command_index = int(command_indices[leg])
+            issues.append(PreflightIssue(command_index, commands[command_index], reason, position))
+
+        report = PreflightReport(len(rows), len(starts), issues)
+        logging.info(f"[CollisionPreflight] {report.summary()}")
+        return report
+
+    def tip_collisions(self, rows: np.ndarray) -> np.ndarray:
+        """Per command: does any of its legs drive the manifold tip into the plate (bounds are not checked)."""
+        _, _, command_indices, _, hits_surface, hits_well_bottom, _ = self._sweep(rows)
+        collisions = np.zeros(len(rows), dtype=bool)
+        collisions[command_indices[hits_surface | hits_well_bottom]] = True
+        return collisions
+
+    def _sweep(self, rows: np.ndarray):
+        starts, ends, command_indices = self._legs(rows)
+        moved = np.any(starts != ends, axis=1)
+        starts, ends, command_indices = starts[moved], ends[moved], command_indices[moved]
+
+        # Plate-relative mm, tip height in plate coordinates (positive is up)
+        offset = np.array(self.bottom_left, dtype=np.float64) / STEPS_PER_MM
+        x_a = np.minimum(starts[:, self.X], ends[:, self.X]) / STEPS_PER_MM - offset[0]
+        x_b = np.maximum(starts[:, self.X], ends[:, self.X]) / STEPS_PER_MM - offset[0]
+        y_a = np.minimum(starts[:, self.Y], ends[:, self.Y]) / STEPS_PER_MM - offset[1]
+        y_b = np.maximum(starts[:, self.Y], ends[:, self.Y]) / STEPS_PER_MM - offset[1]
+        tip_start = self._tip_z(starts)
+        tip_end = self._tip_z(ends)
+        # A leg that lowers the tip is at its lowest at the end, a horizontal leg keeps it.
+        # Raising legs are never the offending move, their start was the end of an earlier leg
+        lowest_tip = np.where(tip_end > tip_start, np.inf, tip_end)
+        manifold_lowered = (starts[:, self.MANIFOLD] != 0) | (ends[:, self.MANIFOLD] != 0)
+
+        geometry = self.geometry
+        spacing = geometry.well_spacing_mm
+        radius = geometry.well_radius_mm
+        # Distance to the nearest row / column of well centers, clamped to the plate
+        dx = self._distance_to_nearest(x_a, geometry.corner_offset_x_mm, spacing, geometry.cols)
+        dy = self._distance_to_nearest(y_a, geometry.corner_offset_y_mm, spacing, geometry.rows)
+        moves_x = x_a != x_b
+        moves_y = y_a != y_b
+        # Half length of the chord a leg along one axis cuts through a well opening
+        chord_x = np.sqrt(np.maximum(radius * radius - dy * dy, 0.0))
+        chord_y = np.sqrt(np.maximum(radius * radius - dx * dx, 0.0))
+        point_in_well = dx * dx + dy * dy <= radius * radius
+        any_in_well = np.where(
+            moves_x, (dy < radius) & self._intersects(x_a, x_b, geometry.corner_offset_x_mm, spacing, geometry.cols, chord_x),
+            np.where(moves_y, (dx < radius) & self._intersects(y_a, y_b, geometry.corner_offset_y_mm, spacing, geometry.rows, chord_y),
+                     point_in_well))
+        all_in_well = np.where(
+            moves_x, (dy < radius) & self._covered(x_a, x_b, geometry.corner_offset_x_mm, spacing, geometry.cols, chord_x),
+            np.where(moves_y, (dx < radius) & self._covered(y_a, y_b, geometry.corner_offset_y_mm, spacing, geometry.rows, chord_y),
+                     point_in_well))
+        on_plate = (x_b >= 0) & (x_a <= geometry.width_mm) & (y_b >= 0) & (y_a <= geometry.height_mm)
+
+        surface_limit = self.plate_top + self.SURFACE_CLEARANCE
+        well_floor = self.plate_top - geometry.well_depth_mm - self.WELL_BOTTOM_CLEARANCE
+        hits_surface = manifold_lowered & on_plate & ~all_in_well & (lowest_tip < surface_limit)
+        hits_well_bottom = manifold_lowered & any_in_well & (lowest_tip < well_floor)
+        margin = self.BOUNDS_MARGIN
+        out_of_bounds = ((x_a < -margin) | (x_b > geometry.width_mm + margin) |
+                         (y_a < -margin) | (y_b > geometry.height_mm + margin))
+
+        return starts, ends, command_indices, lowest_tip, hits_surface, hits_well_bottom, out_of_bounds
+
+    def _legs(self, rows: np.ndarray):
+        """
+        Waypoints of every command in firmware order, returns (leg starts, leg ends, command index),
+        four legs per command, legs of the same command are consecutive.
+        """
+        before, after = rows[:, 0:4], rows[:, 4:8]
+        z_first = rows[:, 8:9] > 0
+        waypoints = np.empty((len(rows), 5, 4))
+        waypoints[:, 0] = before
+        # X, Y, Z, then manifold
+        waypoints[:, 1] = np.column_stack([after[:, 0], before[:, 1], before[:, 2], before[:, 3]])
+        waypoints[:, 2] = np.column_stack([after[:, 0], after[:, 1], before[:, 2], before[:, 3]])
+        # Z, X, Y for the zeroing commands
+        z_first_1 = np.column_stack([before[:, 0], before[:, 1], after[:, 2], before[:, 3]])
+        z_first_2 = np.column_stack([after[:, 0], before[:, 1], after[:, 2], before[:, 3]])
+        waypoints[:, 1] = np.where(z_first, z_first_1, waypoints[:, 1])
+        waypoints[:, 2] = np.where(z_first, z_first_2, waypoints[:, 2])
+        waypoints[:, 3] = np.column_stack([after[:, 0], after[:, 1], after[:, 2], before[:, 3]])
+        waypoints[:, 4] = after
+        starts = waypoints[:, :-1].reshape(-1, 4)
+        ends = waypoints[:, 1:].reshape(-1, 4)
+        command_indices = np.repeat(np.arange(len(rows)), 4)
+        return starts, ends, command_indices
+
+    def _tip_z(self, positions: np.ndarray) -> np.ndarray:
+        # Negative z steps are up, the manifold moves down from its zero
+        return -positions[:, self.Z] / STEPS_PER_MM - positions[:, self.MANIFOLD] / STEPS_PER_MM - MANIFOLD_TIP_LENGTH
+
+    @staticmethod
+    def _distance_to_nearest(value, first_center, spacing, count):
+        index = np.clip(np.round((value - first_center) / spacing), 0, count - 1)
+        return np.abs(value - (first_center + index * spacing))
+
+    @staticmethod
+    def _intersects(a, b, first_center, spacing, count, half_size):
+        """Does [a, b] touch any interval [c - half_size, c + half_size], c = first_center + k * spacing."""
+        lowest = np.maximum(np.ceil((a - half_size - first_center) / spacing), 0)
+        highest = np.minimum(np.floor((b + half_size - first_center) / spacing), count - 1)
+        return lowest <= highest
+
+    @staticmethod
+    def _covered(a, b, first_center, spacing, count, half_size):
+        """Is [a, b] completely inside the union of the intervals."""
+        # Neighbouring intervals that overlap form one interval over the whole row
+        in_joined = (a >= first_center - half_size) & (b <= first_center + (count - 1) * spacing + half_size)
+        index = np.clip(np.round((a - first_center) / spacing), 0, count - 1)
+        center = first_center + index * spacing
+        in_single = (np.abs(a - center) <= half_size) & (np.abs(b - center) <= half_size)
+        return np.where(2 * half_size >= spacing, in_joined, in_single)
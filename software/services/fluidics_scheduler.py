@@ -0,0 +1,86 @@
+from services.fresco_xyz import FrescoXYZ
+from services.collision_preflight import CollisionPreflight
+import numpy as np
+import logging
+
+
+class FluidicsScheduler:
+    """
+    Keeps the manifold parked at its dispense depth between pump commands.
+    Instead of zero, lower, pump, zero for every well, dispense() only moves the
+    manifold when the requested depth differs from where it is, so consecutive
+    dispenses at the same depth share one stroke. While attached, every XYZ move
+    of the FrescoXYZ is swept with CollisionPreflight first and the manifold is
+    retracted only when its tip would not clear the plate on the way.
+
+        with FluidicsScheduler(fresco_xyz) as fluidics:
+            for well in wells:
+                ...
+                fluidics.dispense(pump_index, volume, depth)
+
+    The manifold is retracted when the block is left.
+    """
+
+    def __init__(self, fresco_xyz: FrescoXYZ):
+        self.fresco_xyz = fresco_xyz
+        self.preflight = CollisionPreflight(fresco_xyz.plate_geometry)
+        self.dispenses = 0
+        self.manifold_strokes = 0
+
+    def __enter__(self):
+        self.attach()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.retract()
+        finally:
+            self.detach()
+            self.log_statistics()
+
+    def attach(self):
+        self.fresco_xyz.clearance_hook = self.ensure_clearance
+
+    def detach(self):
+        if self.fresco_xyz.clearance_hook == self.ensure_clearance:
+            self.fresco_xyz.clearance_hook = None
+
+    def dispense(self, pump_index: int, volume: float, depth: float):
+        """
+        Pump with the manifold lowered to depth (steps below its zero), leaving it there.
+
+        Args:
+            pump_index: pump to drive
+            volume: pump steps
+            depth: manifold position in steps
+        """
+        manifold = self.fresco_xyz.virtual_manifold_position
+        if manifold != depth:
+            self.fresco_xyz.manifold_delta(depth - manifold)
+            self.manifold_strokes += 1
+        self.fresco_xyz.delta_pump(pump_index, volume)
+        self.dispenses += 1
+
+    def retract(self):
+        """Raise the manifold to its zero if it is lowered."""
+        if self.fresco_xyz.virtual_manifold_position != 0:
+            self.fresco_xyz.go_to_zero_manifold()
+            self.manifold_strokes += 1
+
+    def ensure_clearance(self, start: dict, target: dict):
+        """
+        Called by FrescoXYZ before a stage move (absolute steps), retracts the manifold
+        when its tip would touch the plate anywhere along the firmware path.
+        """
+        manifold = self.fresco_xyz.virtual_manifold_position
+        if manifold == 0:
+            return
+        rows = np.array([[start['x'], start['y'], start['z'], manifold,
+                          target['x'], target['y'], target['z'], manifold, 0.0]], dtype=np.float64)
+        if self.preflight.tip_collisions(rows)[0]:
+            self.retract()
+
+    def log_statistics(self):
+        # Zero, lower and zero again for every dispense without the scheduler
+        logging.info(f"[FluidicsScheduler] {self.dispenses} dispenses, {self.manifold_strokes} manifold strokes "
+                     f"instead of {2 * self.dispenses}")
@@ -0,0 +1,255 @@
+import numpy as np
+import logging
+import math
+
+GOLDEN_RATIO = (1 + math.sqrt(5)) / 2
+# 1 / golden ratio, the fraction of the interval golden-section search keeps per step
+INVERSE_GOLDEN_RATIO = GOLDEN_RATIO - 1
+
+
+class FocusSearch:
+    """
+    Search for the z with the highest focus measure within [low, high] (stage steps).
+
+    measure_at(z) moves the stage to z, grabs a frame and returns its focus measure, every
+    call costs a move and a frame. The stage only stops on whole steps, so z is rounded and
+    every step is measured at most once. The frames of the last search are kept in samples.
+    Strategies differ in how they use the shape of the focus curve: it rises to a single peak
+    and falls off on both sides, close to a Gaussian around the peak.
+    """
+    name = None
+
+    def __init__(self, tolerance: float = 2.0, max_evaluations: int = 30):
+        self.tolerance = tolerance  # steps
+        self.max_evaluations = max_evaluations
+        self.samples = {}  # z -> measure
+
+    def search(self, measure_at, low: float, high: float, start: float = None) -> (float, float):
+        """
+        Returns:
+            (z of the best focus in steps, its focus measure)
+        """
+        self.samples = {}
+        self._measure_at = measure_at
+        self._low, self._high = int(math.ceil(min(low, high))), int(math.floor(max(low, high)))
+        start = (self._low + self._high) / 2 if start is None else start
+        best_z = self._search(float(np.clip(start, self._low, self._high)))
+        best_measure = self.samples.get(int(round(best_z)), max(self.samples.values()))
+        logging.info(f"[FocusSearch] {self.name}: z {best_z:.1f}, measure {best_measure:.2f}, "
+                     f"{self.evaluations} frames")
+        return best_z, best_measure
+
+    @property
+    def evaluations(self) -> int:
+        return len(self.samples)
+
+    def _search(self, start: float) -> float:
+        raise NotImplementedError
+
+    def _measure(self, z: float) -> float:
+        z = int(round(np.clip(z, self._low, self._high)))
+        if z not in self.samples:
+            self.samples[z] = float(self._measure_at(z))
+        return self.samples[z]
+
+    def _exhausted(self) -> bool:
+        return self.evaluations >= self.max_evaluations
+
+    def _best_sample(self) -> float:
+        return max(self.samples, key=self.samples.get)
+
+
+class GridSearch(FocusSearch):
+    """Every step-th z from high to low, the best one wins. What ZCamera.focus_on_current_object does."""
+    name = 'grid'
+
+    def __init__(self, step: float = 5, **kwargs):
+        kwargs.setdefault('max_evaluations', 1000)
+        super().__init__(**kwargs)
+        self.step = step
+
+    def _search(self, start: float) -> float:
+        for z in np.arange(self._high, self._low - 1e-9, -self.step):
+            if self._exhausted():
+                break
+            self._measure(z)
+        return self._best_sample()
+
+
+class GoldenSectionSearch(FocusSearch):
+    """
+    Golden-section search over the whole range: two inner points, the side of the worse one
+    is dropped and one new point is measured per step, until the bracket is within tolerance.
+    Needs the curve to have a single peak in the range, flat noisy tails can mislead it.
+    """
+    name = 'golden'
+
+    def _search(self, start: float) -> float:
+        low, high = float(self._low), float(self._high)
+        inner_low = high - INVERSE_GOLDEN_RATIO * (high - low)
+        inner_high = low + INVERSE_GOLDEN_RATIO * (high - low)
+        measure_low, measure_high = self._measure(inner_low), self._measure(inner_high)
+        while high - low > self.tolerance and not self._exhausted():
+            if measure_low > measure_high:
+                high, inner_high, measure_high = inner_high, inner_low, measure_low
+                inner_low = high - INVERSE_GOLDEN_RATIO * (high - low)
+                measure_low = self._measure(inner_low)
+            else:
+                low, inner_low, measure_low = inner_low, inner_high, measure_high
+                inner_high = low + INVERSE_GOLDEN_RATIO * (high - low)
+                measure_high = self._measure(inner_high)
+        return self._best_sample()
+
+
+class PeakFitSearch(FocusSearch):
+    """
+    Coarse samples across the range, then repeatedly fit the best sample and its neighbours and
+    measure at the fitted peak. gaussian=True fits a parabola to the log of the measure (a Gaussian
+    peak, which matches a focus curve further out), otherwise to the measure itself. Stops once
+    the fitted peak is within tolerance of a measured z.
+    """
+    name = 'peak_fit'
+
+    def __init__(self, initial_points: int = 5, gaussian: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.initial_points = initial_points
+        self.gaussian = gaussian
+
+    def _search(self, start: float) -> float:
+        for z in np.linspace(self._low, self._high, self.initial_points):
+            self._measure(z)
+        peak = self._best_sample()
+        while not self._exhausted():
+            evaluations = self.evaluations
+            z = np.array(sorted(self.samples), dtype=np.float64)
+            index = int(np.searchsorted(z, self._best_sample()))
+            if index == 0 or index == len(z) - 1:
+                # Best at the edge of what was measured, close in on it
+                neighbour = z[1] if index == 0 else z[-2]
+                peak = float(z[index])
+                if abs(neighbour - peak) <= self.tolerance:
+                    break
+                self._measure((peak + neighbour) / 2)
+            else:
+                around = z[index - 1:index + 2]
+                peak = self._fit_peak(around, np.array([self.samples[int(value)] for value in around]))
+                if float(np.min(np.abs(z - peak))) <= self.tolerance:
+                    break
+                self._measure(peak)
+            if self.evaluations == evaluations:
+                # Rounded onto a z that was already measured
+                break
+        return peak
+
+    def _fit_peak(self, z: np.ndarray, measures: np.ndarray) -> float:
+        """Vertex of the parabola through three points, or the middle of the wider gap if it does not open downwards."""
+        if self.gaussian and np.all(measures > 0):
+            measures = np.log(measures)
+        (a, b, _) = np.polyfit(z - z[1], measures, 2)
+        if a >= 0:
+            return float((z[0] + z[1]) / 2 if z[1] - z[0] > z[2] - z[1] else (z[1] + z[2]) / 2)
+        return float(np.clip(z[1] - b / (2 * a), z[0], z[2]))
+
+
+class BrentSearch(FocusSearch):
+    """
+    Brent's method: parabolic steps through the last three points where they behave, golden-section
+    steps where they do not. Starts from `start` and expands the bracket by the golden ratio from
+    initial_step until the measure falls again on both sides, so a good start (the previous focus)
+    needs few frames and the peak does not have to be in the middle of the range.
+    """
+    name = 'brent'
+    MAX_ITERATIONS = 100
+
+    def __init__(self, initial_step: float = 20, **kwargs):
+        super().__init__(**kwargs)
+        self.initial_step = initial_step
+
+    def _search(self, start: float) -> float:
+        low, middle, high = self._bracket(start)
+        return self._brent(low, middle, high)
+
+    def _bracket(self, start: float) -> (float, float, float):
+        """(low, middle, high) with middle measuring better than both ends, or ending at the range."""
+        a, b = start, start + self.initial_step
+        if b > self._high:
+            a, b = start, start - self.initial_step
+        a, b = float(np.clip(a, self._low, self._high)), float(np.clip(b, self._low, self._high))
+        if self._measure(b) < self._measure(a):
+            a, b = b, a
+        c = float(np.clip(b + GOLDEN_RATIO * (b - a), self._low, self._high))
+        while self._measure(c) > self._measure(b) and c not in (self._low, self._high) and not self._exhausted():
+            a, b = b, c
+            c = float(np.clip(b + GOLDEN_RATIO * (b - a), self._low, self._high))
+        if self._measure(c) > self._measure(b):
+            # Still rising at the end of the range
+            a, b = b, c
+        return min(a, c), b, max(a, c)
+
+    def _brent(self, low: float, middle: float, high: float) -> float:
+        """Brent's minimization of -measure within [low, high], Numerical Recipes layout with an absolute tolerance."""
+        def cost(z):
+            return -self._measure(z)
+
+        tolerance = self.tolerance / 2
+        x = w = v = middle
+        fx = fw = fv = cost(x)
+        step = previous_step = 0.0
+        for _ in range(self.MAX_ITERATIONS):
+            center = (low + high) / 2
+            if abs(x - center) <= 2 * tolerance - (high - low) / 2 or self._exhausted():
+                break
+            use_golden = True
+            if abs(previous_step) > tolerance:
+                # Parabola through x, w and v
+                r = (x - w) * (fx - fv)
+                q = (x - v) * (fx - fw)
+                p = (x - v) * q - (x - w) * r
+                q = 2 * (q - r)
+                if q > 0:
+                    p = -p
+                q = abs(q)
+                if abs(p) < abs(0.5 * q * previous_step) and q * (low - x) < p < q * (high - x):
+                    previous_step, step = step, p / q
+                    use_golden = False
+                    if (x + step) - low < 2 * tolerance or high - (x + step) < 2 * tolerance:
+                        step = math.copysign(tolerance, center - x)
+            if use_golden:
+                previous_step = (low if x >= center else high) - x
+                step = (1 - INVERSE_GOLDEN_RATIO) * previous_step
+            u = x + (step if abs(step) >= tolerance else math.copysign(tolerance, step))
+            fu = cost(u)
+            if fu <= fx:
+                if u >= x:
+                    low = x
+                else:
+                    high = x
+                v, w, x = w, x, u
+                fv, fw, fx = fw, fx, fu
+            else:
+                if u < x:
+                    low = u
+                else:
+                    high = u
+                if fu <= fw or w == x:
+                    v, w = w, u
+                    fv, fw = fw, fu
+                elif fu <= fv or v == x or v == w:
+                    v, fv = u, fu
+        return x
+
+
+FOCUS_SEARCHES = {
+    GridSearch.name: GridSearch,
+    GoldenSectionSearch.name: GoldenSectionSearch,
+    PeakFitSearch.name: PeakFitSearch,
+    BrentSearch.name: BrentSearch,
+}
+
+
+def create_focus_search(config: dict) -> FocusSearch:
+    """Strategy of a plate's 'focus_search' config (see plates.py), created with its 'options'."""
+    strategy = config.get('strategy', BrentSearch.name)
+    if strategy not in FOCUS_SEARCHES:
+        raise ValueError(f"Unknown focus search strategy {strategy}")
+    return FOCUS_SEARCHES[strategy](**config.get('options', {}))
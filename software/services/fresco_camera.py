@@ -1,4 +1,5 @@
 from services.image_processor import ImageProcessor
+import numpy as np
 
 
 class BaseCamera:
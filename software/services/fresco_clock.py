@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+import threading
+import time
+
+
+class WallClock:
+    """
+    Real time. Sleeping blocks the calling thread, emulated motion takes no time.
+    """
+    is_simulated = False
+
+    def __init__(self):
+        self.started = time.time()
+
+    def now(self) -> float:
+        """Seconds since the epoch, like time.time()."""
+        return time.time()
+
+    def elapsed(self) -> float:
+        return self.now() - self.started
+
+    def sleep(self, seconds: float, time_scale: float = 1.0):
+        actual_seconds = seconds * time_scale
+        if actual_seconds > 0:
+            time.sleep(actual_seconds)
+
+    def advance(self, seconds: float):
+        # Real hardware moves in real time, nothing to account for
+        pass
+
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.now())
+
+
+class SimulatedClock(WallClock):
+    """
+    Discrete-event clock for --simulate runs.
+    Sleeping and emulated motion advance virtual time instantly, so a whole plate
+    protocol runs at CPU speed while timestamps and durations stay those of the
+    real machine. time_scale is ignored, virtual time is never scaled.
+    """
+    is_simulated = True
+
+    def __init__(self, start: float = None):
+        self.lock = threading.Lock()
+        self.started = time.time() if start is None else start
+        self._now = self.started
+
+    def now(self) -> float:
+        with self.lock:
+            return self._now
+
+    def sleep(self, seconds: float, time_scale: float = 1.0):
+        self.advance(seconds)
+
+    def advance(self, seconds: float):
+        if seconds <= 0:
+            return
+        with self.lock:
+            self._now += seconds
+
+    def reset(self):
+        with self.lock:
+            self._now = self.started
+
+
+def format_duration(seconds: float) -> str:
+    return str(timedelta(seconds=round(seconds, 3)))
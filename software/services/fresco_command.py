@@ -0,0 +1,54 @@
+class FrescoCommand:
+    """
+    One firmware command (see firmware/FrescoMFirmware/Command.h), built once by
+    FrescoXYZ and passed around as name + numeric parameters.
+    It is turned into a protocol line only when it goes to a real serial connection.
+    """
+    __slots__ = ('name', 'parameters')
+
+    def __init__(self, name: str, *parameters):
+        self.name = name
+        self.parameters = parameters
+
+    @classmethod
+    def parse(cls, message: str) -> 'FrescoCommand':
+        """Build a command from a protocol line, e.g. 'Delta 10 0 -5'."""
+        parts = message.strip().split()
+        if not parts:
+            return cls('')
+        return cls(parts[0], *(cls._parse_parameter(part) for part in parts[1:]))
+
+    @classmethod
+    def coerce(cls, command) -> 'FrescoCommand':
+        """Accept either a FrescoCommand or a protocol line (generated protocols still send strings)."""
+        if isinstance(command, FrescoCommand):
+            return command
+        return cls.parse(command)
+
+    @staticmethod
+    def _parse_parameter(part: str):
+        try:
+            return int(part)
+        except ValueError:
+            pass
+        try:
+            return float(part)
+        except ValueError:
+            return part
+
+    def to_wire(self) -> str:
+        if not self.parameters:
+            return self.name
+        return self.name + ' ' + ' '.join(str(parameter) for parameter in self.parameters)
+
+    def __str__(self):
+        return self.to_wire()
+
+    def __repr__(self):
+        return f'FrescoCommand({self.to_wire()!r})'
+
+    def __eq__(self, other):
+        return isinstance(other, FrescoCommand) and self.name == other.name and self.parameters == other.parameters
+
+    def __hash__(self):
+        return hash((self.name, self.parameters))
@@ -3,52 +3,30 @@ from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import numpy as np
+import ctypes
 import logging
 import threading
-from plates import get_plate_config, STEPS_PER_MM
-
-
-class Well:
-    def __init__(self, row, col, center_x, center_y, radius, depth, label):
-        self.row = row
-        self.col = col
-        self.label = label
-        self.center_x = center_x
-        self.center_y = center_y
-        self.radius = radius
-        self.depth = depth
-        self.capture_size = radius * 1.5
-        self.pump_events = []
-    
-    def contains_point(self, x, y):
-        return (abs(x - self.center_x) <= self.capture_size and 
-                abs(y - self.center_y) <= self.capture_size)
-    
-    def add_pump_event(self, pump_index, volume):
-        import time
-        self.pump_events.append((time.time(), pump_index, volume))
+from plates import STEPS_PER_MM, MANIFOLD_TIP_LENGTH
+from services.plate_mesh import get_plate_mesh
+from services.plate_scene import PlateScene
+from services.trajectory_store import TrajectoryStore
 
 
-class FrescoRenderer:
-    MANIFOLD_TIP_LENGTH = 20.0
+class FrescoRenderer(PlateScene):
+    MANIFOLD_TIP_LENGTH = MANIFOLD_TIP_LENGTH
     WELL_SEGMENTS = 12
-    TRAJECTORY_MAX_POINTS = 100
+    # Drawn path keeps its shape to within this many pixels
+    TRAJECTORY_TOLERANCE_PIXELS = 1.0
+    FIELD_OF_VIEW = 45.0
     
     def __init__(self, image_processor, fresco_xyz, plate_type='96-well'):
+        super().__init__(fresco_xyz, plate_type)
         self.image_processor = image_processor
-        self.fresco_xyz = fresco_xyz
-        self.plate_type = plate_type
-        self.plate_config = get_plate_config(plate_type)
-        
+
         self.width = 800
         self.height = 800
-        
+
         cfg = self.plate_config
-        # Plate dimensions include corner offset plus well spacing
-        # Add extra margin on opposite side equal to corner offset
-        self.plate_width = cfg['corner_offset_x'] + (cfg['cols'] - 1) * cfg['well_spacing'] + cfg['corner_offset_x']
-        self.plate_height = cfg['corner_offset_y'] + (cfg['rows'] - 1) * cfg['well_spacing'] + cfg['corner_offset_y']
-        
         pygame.init()
         self.screen = pygame.display.set_mode((self.width, self.height), OPENGL | HIDDEN)
         pygame.display.set_caption("Fresco 3D View")
@@ -62,8 +40,6 @@ class FrescoRenderer:
         font_size = max(6, int(24 * (scale_factor ** 1.5)))
         self.label_font = pygame.font.SysFont('Arial', font_size, bold=True)
         self.robot_scale = scale_factor
-        self.label_scale = 10.0 * scale_factor  # Scale OpenGL text labels
-        self.label_offset = 8.0 * scale_factor  # Distance from plate edge to labels
 
         self._init_opengl()
 
@@ -73,24 +49,26 @@ class FrescoRenderer:
         self.zoom_level = 1.0
         self.target_position = {'x': self.plate_width / 2, 'y': self.plate_height / 2, 'z': 0.0}
 
-        self.wells = self._create_wells()
-        self.current_well = None
-
-        self.position_history = []
-        self.position_lock = threading.Lock()
         self.frame_count = 0
         self.last_render_pos = None
         self.is_moving = False
-        self.collision_state = False
         self.cached_image = None
+        self.cached_fingerprint = None
+        # Every frame is read back into this array, see _read_frame
+        self.frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self.frame_lock = threading.Lock()
+        self.frames_reused = 0
+        # Thread that owns the GL context, a RenderService sets itself here when it created the renderer
         self.main_thread_id = threading.get_ident()
+        self.render_service = None
 
-        self.pump_colors = [
-            (1.0, 0.3, 0.3), (0.3, 1.0, 0.3), (0.3, 0.3, 1.0), (1.0, 1.0, 0.3),
-            (1.0, 0.3, 1.0), (0.3, 1.0, 1.0), (1.0, 0.6, 0.3), (0.6, 0.3, 1.0),
-        ]
-
-        self.camera_flash = False  # Camera flash effect (yellow for 1 frame)
+        # Plate mesh in GL buffers, see _plate_buffers
+        self._plate_mesh_key = None
+        self._plate_mesh = None
+        self._plate_mesh_buffers = None
+        self._cell_vertex_colors = None
+        self._well_vertex_colors = None
+        self._well_colors = None
 
         logging.info(f"Renderer initialized with {plate_type} plate")
     
@@ -102,82 +80,119 @@ class FrescoRenderer:
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
         glClearColor(0.95, 0.95, 0.95, 1.0)
-        
+
+        self.offscreen = self._init_offscreen()
+
         glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
-        gluPerspective(45.0, self.width / self.height, 1.0, 1000.0)
+        gluPerspective(self.FIELD_OF_VIEW, self.width / self.height, 1.0, 1000.0)
+        if self.offscreen:
+            # glReadPixels returns rows bottom-up, rendering upside down makes them land top-down
+            glScalef(1.0, -1.0, 1.0)
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
     
-    def _create_wells(self):
-        cfg = self.plate_config
-        wells = []
-
-        well_radius = cfg['well_diameter'] / 2
-        # Offset from plate corner to A1 center
-        offset_x = cfg['corner_offset_x']
-        offset_y = cfg['corner_offset_y']
-
-        for row in range(cfg['rows']):
-            for col in range(cfg['cols']):
-                # Wells positioned relative to plate corner (0,0)
-                x = offset_x + col * cfg['well_spacing']
-                y = offset_y + row * cfg['well_spacing']
-                label = f"{cfg['row_labels'][row]}{col + 1}"
-                well = Well(row, col, x, y, well_radius, cfg['well_depth'], label)
-                wells.append(well)
-
-        return wells
-
-    def clear_position_history(self):
-        with self.position_lock:
-            self.position_history = []
-            logging.info("Position history cleared due to plate calibration change")
-
-    def record_position(self, x_mm, y_mm, z_mm):
-        # Robot position is recorded in absolute coordinates (not transformed by plate offset)
-        # The plate wells will be drawn at positions adjusted by the offset
-        pos = {'x': self.plate_width - x_mm, 'y': self.plate_height - y_mm, 'z': z_mm}
-        with self.position_lock:
-            if (not self.position_history or
-                abs(pos['x'] - self.position_history[-1]['x']) > 0.001 or
-                abs(pos['y'] - self.position_history[-1]['y']) > 0.001 or
-                abs(pos['z'] - self.position_history[-1]['z']) > 0.001):
-                self.position_history.append(pos)
-                if len(self.position_history) > self.TRAJECTORY_MAX_POINTS:
-                    self.position_history.pop(0)
-
-    def get_well_at_position(self, x_mm, y_mm):
-        # Convert robot absolute position to plate-relative position
-        # Wells are in plate-relative coordinates (0 to plate_width)
-        if self.fresco_xyz and hasattr(self.fresco_xyz, 'plate'):
-            plate_offset_x = self.fresco_xyz.plate['bottom_left'][0] / STEPS_PER_MM
-            plate_offset_y = self.fresco_xyz.plate['bottom_left'][1] / STEPS_PER_MM
-            plate_relative_x = x_mm - plate_offset_x
-            plate_relative_y = y_mm - plate_offset_y
-        else:
-            plate_relative_x = x_mm
-            plate_relative_y = y_mm
+    def _init_offscreen(self):
+        """
+        Framebuffer object to render into and two pixel buffer objects to read it back
+        asynchronously. Returns False when the driver lacks them, frames are then read
+        back from the window synchronously.
+        """
+        try:
+            self._framebuffer = glGenFramebuffers(1)
+            glBindFramebuffer(GL_FRAMEBUFFER, self._framebuffer)
+            color_buffer, depth_buffer = glGenRenderbuffers(2)
+            glBindRenderbuffer(GL_RENDERBUFFER, color_buffer)
+            glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color_buffer)
+            glBindRenderbuffer(GL_RENDERBUFFER, depth_buffer)
+            glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.width, self.height)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth_buffer)
+            glBindRenderbuffer(GL_RENDERBUFFER, 0)
+            status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+            if status != GL_FRAMEBUFFER_COMPLETE:
+                raise RuntimeError(f'framebuffer incomplete ({status})')
+
+            self._pixel_buffers = [int(buffer) for buffer in glGenBuffers(2)]
+            for buffer in self._pixel_buffers:
+                glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+                glBufferData(GL_PIXEL_PACK_BUFFER, self.frame_nbytes, None, GL_STREAM_READ)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+            glPixelStorei(GL_PACK_ALIGNMENT, 1)
+            glReadBuffer(GL_COLOR_ATTACHMENT0)
+            self._next_pixel_buffer = 0
+            # Pixel buffer holding a frame that was rendered but not copied into self.frame yet
+            self._pending_pixel_buffer = None
+            return True
+        except Exception as e:
+            logging.warning(f"Off-screen rendering not available ({e}), reading frames back from the window")
+            try:
+                glBindFramebuffer(GL_FRAMEBUFFER, 0)
+            except Exception:
+                pass
+            return False
+
+    @property
+    def frame_nbytes(self):
+        return self.width * self.height * 3
+
+    def _frame_fingerprint(self):
+        """Everything a frame depends on, cheap to build; equal fingerprints render equal frames."""
+        xyz = self.fresco_xyz
+        scene = None
+        if xyz:
+            position = xyz.virtual_position
+            # Pump colors switch off PUMP_COLOR_SECONDS after each event, re-check once a second until the last one is off
+            pump_colors_fading = (self.last_pump_event_time is not None and
+                                  xyz.clock.now() - self.last_pump_event_time < self.PUMP_COLOR_SECONDS + 1.0)
+            scene = (position['x'], position['y'], position['z'], getattr(xyz, 'virtual_manifold_position', 0),
+                     getattr(xyz, 'white_led_on', False), getattr(xyz, 'blue_led_on', False),
+                     getattr(xyz, 'is_capturing', False), tuple(xyz.plate['bottom_left']),
+                     self.pump_events_recorded, int(xyz.clock.now()) if pump_colors_fading else None)
+        target = self.target_position
+        return (scene, self.collision_state, self.camera_flash, self.trajectory.version,
+                self.camera_distance, self.camera_elevation, self.camera_azimuth, self.zoom_level,
+                target['x'], target['y'], target['z'])
 
-        for well in self.wells:
-            if well.contains_point(plate_relative_x, plate_relative_y):
-                return well
-        return None
-    
-    def record_pump_event(self, pump_index, volume):
-        if self.current_well:
-            self.current_well.add_pump_event(pump_index, volume)
-            logging.info(f"Pump event recorded: Well {self.current_well.label}, Pump {pump_index}, Volume {volume}")
-    
     def get_current_image(self):
-        # OpenGL can ONLY be called from the main thread
-        # If called from another thread (e.g. focus), return cached image
+        """
+        Frame of the current scene. On the main thread the returned array is the
+        renderer's frame buffer and is overwritten by the next rendered frame.
+        """
+        return self._render_image(pipelined=False)
+
+    def get_preview_image(self):
+        """
+        Like get_current_image, but the readback overlaps rendering of the next frame,
+        so while the scene changes the image is one frame behind. For the live view.
+        """
+        return self._render_image(pipelined=True)
+
+    def _render_image(self, pipelined):
+        # OpenGL can ONLY be called from the thread that created the context
         if threading.get_ident() != self.main_thread_id:
+            if self.render_service is not None:
+                # Live view takes the last completed frame, everyone else waits for a fresh one
+                if pipelined:
+                    return self.render_service.latest_frame()
+                return self.render_service.request_frame()
+            # If called from another thread (e.g. focus), return a copy of the cached image
             if self.cached_image is not None:
-                return self.cached_image
+                with self.frame_lock:
+                    return self.cached_image.copy()
             # No cached image yet, return black
             return np.zeros((self.height, self.width, 3), dtype=np.uint8)
 
+        # Nothing changed since the last frame: no render, only a readback still in flight
+        fingerprint = self._frame_fingerprint()
+        if fingerprint == self.cached_fingerprint and self.cached_image is not None:
+            self.is_moving = False
+            self.frames_reused += 1
+            if self.offscreen and self._pending_pixel_buffer is not None:
+                self._copy_pixel_buffer(self._pending_pixel_buffer)
+                self._pending_pixel_buffer = None
+            return self.cached_image
+
         # Clear any previous OpenGL errors
         while glGetError() != GL_NO_ERROR:
             pass
@@ -195,30 +210,23 @@ class FrescoRenderer:
             glMatrixMode(GL_MODELVIEW)
             glLoadIdentity()
 
-            camera_x = self.target_position['x'] + self.camera_distance * np.cos(np.radians(self.camera_elevation)) * np.sin(np.radians(self.camera_azimuth))
-            camera_y = self.target_position['y'] + self.camera_distance * np.cos(np.radians(self.camera_elevation)) * np.cos(np.radians(self.camera_azimuth))
-            camera_z = self.target_position['z'] + self.camera_distance * np.sin(np.radians(self.camera_elevation))
-
+            camera_x, camera_y, camera_z = self._camera_eye()
             gluLookAt(
-                camera_x / self.zoom_level, camera_y / self.zoom_level, camera_z / self.zoom_level,
+                camera_x, camera_y, camera_z,
                 self.target_position['x'], self.target_position['y'], self.target_position['z'],
                 0, 0, 1
             )
 
             self._draw_scene(robot_pos, led_color)
-
-            # Read from front buffer (working in original commit)
-            glReadBuffer(GL_FRONT)
-            pixels = glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE)
-            image = np.frombuffer(pixels, dtype=np.uint8).reshape(self.height, self.width, 3)
-            image = np.flipud(image)
+            image = self._read_frame(pipelined)
 
             # Clear camera flash after rendering 1 frame
             if self.camera_flash:
                 self.camera_flash = False
 
-            # Cache the image for non-main thread requests
+            # Cache the image for non-main thread requests and unchanged scenes
             self.cached_image = image
+            self.cached_fingerprint = fingerprint
             self.frame_count += 1
             return image
         except Exception as e:
@@ -226,6 +234,42 @@ class FrescoRenderer:
             # Return black image on error to prevent crashes
             return np.zeros((self.height, self.width, 3), dtype=np.uint8)
     
+    def _read_frame(self, pipelined):
+        if not self.offscreen:
+            # Read from front buffer (working in original commit)
+            glReadBuffer(GL_FRONT)
+            pixels = glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE)
+            with self.frame_lock:
+                np.copyto(self.frame, np.frombuffer(pixels, dtype=np.uint8).reshape(self.height, self.width, 3)[::-1])
+            return self.frame
+
+        # Start the transfer of this frame into a pixel buffer, returns without waiting for the GPU
+        pixel_buffer = self._next_pixel_buffer
+        self._next_pixel_buffer = 1 - pixel_buffer
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self._pixel_buffers[pixel_buffer])
+        glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        if pipelined:
+            # Previous frame has had a whole frame time to arrive, this one is collected next time
+            if self._pending_pixel_buffer is not None:
+                self._copy_pixel_buffer(self._pending_pixel_buffer)
+            self._pending_pixel_buffer = pixel_buffer
+        else:
+            self._copy_pixel_buffer(pixel_buffer)
+            self._pending_pixel_buffer = None
+        return self.frame
+
+    def _copy_pixel_buffer(self, pixel_buffer):
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self._pixel_buffers[pixel_buffer])
+        try:
+            address = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+            if address:
+                with self.frame_lock:
+                    ctypes.memmove(self.frame.ctypes.data, address, self.frame_nbytes)
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        finally:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
     def _draw_scene(self, robot_pos, led_color):
         self._draw_plate_with_cells()
         self._draw_well_labels()
@@ -234,256 +278,113 @@ class FrescoRenderer:
         self._draw_manifold(robot_pos)
     
     def _draw_plate_with_cells(self):
-        cfg = self.plate_config
-        thickness = cfg['plate_thickness']
-        depth = cfg['well_depth']
-
-        min_x = 0
-        min_y = 0
-        max_x = self.plate_width
-        max_y = self.plate_height
-
-        for well in self.wells:
-            is_current = (well == self.current_well)
-            self._draw_cell_with_well(well, is_current, thickness, depth)
-    
-    def _draw_cell_with_well(self, well, is_current, plate_thickness, well_depth):
-        cfg = self.plate_config
-        cell_half_size = cfg['well_spacing'] / 2
-        segments = self.WELL_SEGMENTS
-
-        plate_thickness = plate_thickness * 0.5
-
-        # Transform well position by plate offset
-        # Well positions are plate-relative, add offset to get absolute position
-        if self.fresco_xyz and hasattr(self.fresco_xyz, 'plate'):
-            plate_offset_x = self.fresco_xyz.plate['bottom_left'][0] / STEPS_PER_MM
-            plate_offset_y = self.fresco_xyz.plate['bottom_left'][1] / STEPS_PER_MM
-        else:
-            plate_offset_x = 0
-            plate_offset_y = 0
-
-        well_abs_x = well.center_x + plate_offset_x
-        well_abs_y = well.center_y + plate_offset_y
-
-        cx = self.plate_width - well_abs_x
-        cy = self.plate_height - well_abs_y
-        z_plate_bottom = 0.0
-        z_plate_top = plate_thickness
-        z_well_rim = plate_thickness
-        z_well_bottom = plate_thickness - well_depth
-
-        if is_current:
-            well_color = (0.5, 0.7, 1.0, 0.9)
-            cell_color = (0.75, 0.75, 0.75, 0.95)
-            outline_color = (0.0, 0.3, 1.0)
-            outline_width = 3.0
-        else:
-            cell_color = (0.7, 0.7, 0.7, 0.95)
-            outline_color = (0.3, 0.3, 0.3)
-            outline_width = 1.0
-
-            if well.pump_events:
-                import time
-                current_time = time.time()
-                recent_events = [e for e in well.pump_events if current_time - e[0] < 10.0]
-                if recent_events:
-                    last_pump_idx = recent_events[-1][1]
-                    pump_color = self.pump_colors[last_pump_idx % len(self.pump_colors)]
-                    well_color = (*pump_color, 0.7)
-                else:
-                    well_color = (0.3, 0.3, 0.3, 0.9)
-            else:
-                well_color = (0.3, 0.3, 0.3, 0.9)
-
-        glColor4f(*cell_color)
-
-        x_min = cx - cell_half_size
-        x_max = cx + cell_half_size
-        y_min = cy - cell_half_size
-        y_max = cy + cell_half_size
-
-        corner_segments = 32
-        for i in range(corner_segments):
-            angle1 = 2.0 * np.pi * i / corner_segments
-            angle2 = 2.0 * np.pi * (i + 1) / corner_segments
-
-            edge_r = cell_half_size * 1.5
-            x_outer1 = cx + edge_r * np.cos(angle1)
-            y_outer1 = cy + edge_r * np.sin(angle1)
-            x_outer2 = cx + edge_r * np.cos(angle2)
-            y_outer2 = cy + edge_r * np.sin(angle2)
-
-            x_outer1 = max(x_min, min(x_max, x_outer1))
-            y_outer1 = max(y_min, min(y_max, y_outer1))
-            x_outer2 = max(x_min, min(x_max, x_outer2))
-            y_outer2 = max(y_min, min(y_max, y_outer2))
-
-            x_inner1 = cx + well.radius * np.cos(angle1)
-            y_inner1 = cy + well.radius * np.sin(angle1)
-            x_inner2 = cx + well.radius * np.cos(angle2)
-            y_inner2 = cy + well.radius * np.sin(angle2)
-
-            glBegin(GL_QUADS)
-            glVertex3f(x_inner1, y_inner1, z_plate_top)
-            glVertex3f(x_inner2, y_inner2, z_plate_top)
-            glVertex3f(x_outer2, y_outer2, z_plate_top)
-            glVertex3f(x_outer1, y_outer1, z_plate_top)
-            glEnd()
-
-            glBegin(GL_QUADS)
-            glVertex3f(x_inner1, y_inner1, z_plate_bottom)
-            glVertex3f(x_inner2, y_inner2, z_plate_bottom)
-            glVertex3f(x_outer2, y_outer2, z_plate_bottom)
-            glVertex3f(x_outer1, y_outer1, z_plate_bottom)
-            glEnd()
-
-        for i in range(4):
-            if i == 0:
-                vx1, vy1, vx2, vy2 = x_min, y_min, x_max, y_min
-            elif i == 1:
-                vx1, vy1, vx2, vy2 = x_max, y_min, x_max, y_max
-            elif i == 2:
-                vx1, vy1, vx2, vy2 = x_max, y_max, x_min, y_max
-            else:
-                vx1, vy1, vx2, vy2 = x_min, y_max, x_min, y_min
-
-            glBegin(GL_QUADS)
-            glVertex3f(vx1, vy1, z_plate_bottom)
-            glVertex3f(vx2, vy2, z_plate_bottom)
-            glVertex3f(vx2, vy2, z_plate_top)
-            glVertex3f(vx1, vy1, z_plate_top)
-            glEnd()
-
-        glColor4f(*well_color)
-
-        glBegin(GL_TRIANGLE_FAN)
-        glVertex3f(cx, cy, z_well_rim)
-        for i in range(segments + 1):
-            angle = 2.0 * np.pi * i / segments
-            glVertex3f(cx + well.radius * np.cos(angle),
-                      cy + well.radius * np.sin(angle),
-                      z_well_rim)
-        glEnd()
+        mesh, buffers = self._plate_buffers()
+        self._update_well_colors(mesh, buffers)
+        cell_buffer, cell_color_buffer, well_buffer, well_color_buffer, outline_buffer, _ = buffers
 
-        glBegin(GL_QUAD_STRIP)
-        for i in range(segments + 1):
-            angle = 2.0 * np.pi * i / segments
-            x = cx + well.radius * np.cos(angle)
-            y = cy + well.radius * np.sin(angle)
-            glVertex3f(x, y, z_well_rim)
-            glVertex3f(x, y, z_well_bottom)
-        glEnd()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        try:
+            self._bind_arrays(cell_buffer, cell_color_buffer)
+            glDrawArrays(GL_QUADS, 0, len(mesh.cell_vertices))
+
+            self._bind_arrays(well_buffer, well_color_buffer)
+            glDrawArrays(GL_TRIANGLES, 0, len(mesh.well_vertices))
+            glDisableClientState(GL_COLOR_ARRAY)
+
+            glBindBuffer(GL_ARRAY_BUFFER, outline_buffer)
+            glVertexPointer(3, GL_FLOAT, 0, None)
+            glColor3f(0.3, 0.3, 0.3)
+            glLineWidth(1.0)
+            glDrawArrays(GL_LINES, 0, len(mesh.outline_vertices))
+            if self.current_well is not None:
+                # Highlighted rim drawn again on top, wider
+                index = self.well_index(self.current_well)
+                glColor3f(0.0, 0.3, 1.0)
+                glLineWidth(3.0)
+                glDrawArrays(GL_LINES, index * mesh.outline_vertices_per_well, mesh.outline_vertices_per_well)
+        finally:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+
+    def _bind_arrays(self, vertex_buffer, color_buffer):
+        glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, color_buffer)
+        glColorPointer(4, GL_FLOAT, 0, None)
+
+    def _plate_buffers(self):
+        """GL buffers of the plate mesh, rebuilt only when the plate type or calibration offset changes."""
+        bottom_left = self.fresco_xyz.plate['bottom_left'] if self.fresco_xyz and hasattr(self.fresco_xyz, 'plate') else (0, 0)
+        key = (self.plate_type, int(bottom_left[0]), int(bottom_left[1]))
+        if key != self._plate_mesh_key:
+            if self._plate_mesh_buffers is not None:
+                glDeleteBuffers(len(self._plate_mesh_buffers), self._plate_mesh_buffers)
+            mesh = get_plate_mesh(self.plate_type, bottom_left, self.WELL_SEGMENTS)
+            # Vertex colors are rewritten in place, one color per well repeated over its vertices
+            self._cell_vertex_colors = np.zeros((len(mesh.cell_vertices), 4), dtype=np.float32)
+            self._well_vertex_colors = np.zeros((len(mesh.well_vertices), 4), dtype=np.float32)
+            buffers = [int(buffer) for buffer in glGenBuffers(6)]
+            for buffer, array, usage in zip(buffers,
+                                            (mesh.cell_vertices, self._cell_vertex_colors, mesh.well_vertices,
+                                             self._well_vertex_colors, mesh.outline_vertices, mesh.label_vertices),
+                                            (GL_STATIC_DRAW, GL_DYNAMIC_DRAW, GL_STATIC_DRAW, GL_DYNAMIC_DRAW,
+                                             GL_STATIC_DRAW, GL_STATIC_DRAW)):
+                glBindBuffer(GL_ARRAY_BUFFER, buffer)
+                glBufferData(GL_ARRAY_BUFFER, array.nbytes, array, usage)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            self._plate_mesh = mesh
+            self._plate_mesh_buffers = buffers
+            self._plate_mesh_key = key
+            self._well_colors = None
+            logging.info(f"Plate mesh built: {len(mesh.cell_vertices) + len(mesh.well_vertices)} vertices, "
+                         f"{len(mesh.label_vertices) // 2} label strokes")
+        return self._plate_mesh, self._plate_mesh_buffers
+
+    def _update_well_colors(self, mesh, buffers):
+        """Upload per-well cell and well colors, only when one of them changed since the last frame."""
+        number_of_wells = mesh.number_of_wells
+        colors = np.empty((2, number_of_wells, 4), dtype=np.float32)
+        colors[0] = (0.7, 0.7, 0.7, 0.95)
+        colors[1] = (0.3, 0.3, 0.3, 0.9)
+        current_time = self.fresco_xyz.clock.now() if self.fresco_xyz else 0.0
+        # Last pump event within 10s colors the well
+        recent_pumps = self.pump_events.recent_pumps(current_time, self.PUMP_COLOR_SECONDS)
+        colored = recent_pumps >= 0
+        colors[1, colored, :3] = np.array(self.pump_colors, dtype=np.float32)[recent_pumps[colored] % len(self.pump_colors)]
+        colors[1, colored, 3] = 0.7
+        if self.current_well is not None:
+            index = self.well_index(self.current_well)
+            colors[0, index] = (0.75, 0.75, 0.75, 0.95)
+            colors[1, index] = (0.5, 0.7, 1.0, 0.9)
+
+        if self._well_colors is not None and np.array_equal(colors, self._well_colors):
+            return
+        self._well_colors = colors
+        _, cell_color_buffer, _, well_color_buffer, _, _ = buffers
+        for buffer, vertex_colors, well_colors in ((cell_color_buffer, self._cell_vertex_colors, colors[0]),
+                                                   (well_color_buffer, self._well_vertex_colors, colors[1])):
+            vertex_colors.reshape(number_of_wells, -1, 4)[:] = well_colors[:, None, :]
+            glBindBuffer(GL_ARRAY_BUFFER, buffer)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, vertex_colors.nbytes, vertex_colors)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
 
-        glColor3f(*outline_color)
-        glLineWidth(outline_width)
-        glBegin(GL_LINE_LOOP)
-        for i in range(segments):
-            angle = 2.0 * np.pi * i / segments
-            glVertex3f(cx + well.radius * np.cos(angle),
-                      cy + well.radius * np.sin(angle),
-                      z_well_rim)
-        glEnd()
-    
     def _draw_well_labels(self):
-        cfg = self.plate_config
-        plate_thickness = cfg['plate_thickness']
-        label_z = plate_thickness + 0.1
-
-        # Get plate offset for transforming well positions
-        if self.fresco_xyz and hasattr(self.fresco_xyz, 'plate'):
-            plate_offset_x = self.fresco_xyz.plate['bottom_left'][0] / STEPS_PER_MM
-            plate_offset_y = self.fresco_xyz.plate['bottom_left'][1] / STEPS_PER_MM
-        else:
-            plate_offset_x = 0
-            plate_offset_y = 0
-
-        drawn_rows = set()
-        drawn_cols = set()
-
-        for well in self.wells:
-            well_abs_x = well.center_x + plate_offset_x
-            well_abs_y = well.center_y + plate_offset_y
-
-            if well.row not in drawn_rows:
-                row_label = cfg['row_labels'][well.row]
-                # Row labels shift horizontally with plate, vertically with row position
-                label_x = self.plate_width - plate_offset_x + self.label_offset
-                label_y = self.plate_height - well_abs_y
-                self._draw_text_3d(row_label, label_x, label_y, label_z, scale=self.label_scale)
-                drawn_rows.add(well.row)
-
-            if well.col not in drawn_cols:
-                col_label = str(well.col + 1)
-                # Column labels shift horizontally with column position, vertically with plate
-                label_x = self.plate_width - well_abs_x
-                label_y = self.plate_height - plate_offset_y + self.label_offset
-                self._draw_text_3d(col_label, label_x, label_y, label_z, scale=self.label_scale)
-                drawn_cols.add(well.col)
-    
-    def _draw_text_3d(self, text, x, y, z, scale=1.0):
-        glPushMatrix()
-        glTranslatef(x, y, z)
-        glScalef(scale, scale, scale)
-
-        glColor3f(0.2, 0.2, 0.2)
-        glLineWidth(2.0)
-
-        char_width = 0.35 if len(text) >= 2 else 0.5
-        for i, char in enumerate(text):
-            self._draw_character(char, i * char_width, 0)
-
-        glPopMatrix()
-    
-    def _draw_character(self, char, offset_x, offset_y):
-        patterns = {
-            'A': [(-0.2, 0, 0, 0.4), (0, 0.4, 0.2, 0), (0.2, 0, 0, 0.4), (-0.1, 0.2, 0.1, 0.2)],
-            'B': [(0, 0, 0, 0.4), (0, 0.4, 0.15, 0.4), (0.15, 0.4, 0.15, 0.2), (0.15, 0.2, 0, 0.2), 
-                  (0, 0.2, 0.15, 0.2), (0.15, 0.2, 0.15, 0), (0.15, 0, 0, 0)],
-            'C': [(0.2, 0, 0, 0), (0, 0, 0, 0.4), (0, 0.4, 0.2, 0.4)],
-            'D': [(0, 0, 0, 0.4), (0, 0.4, 0.15, 0.3), (0.15, 0.3, 0.15, 0.1), (0.15, 0.1, 0, 0)],
-            'E': [(0.2, 0, 0, 0), (0, 0, 0, 0.4), (0, 0.4, 0.2, 0.4), (0, 0.2, 0.15, 0.2)],
-            'F': [(0, 0, 0, 0.4), (0, 0.4, 0.2, 0.4), (0, 0.2, 0.15, 0.2)],
-            'G': [(0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0), (0, 0, 0.2, 0), (0.2, 0, 0.2, 0.2), (0.2, 0.2, 0.1, 0.2)],
-            'H': [(0, 0, 0, 0.4), (0.2, 0, 0.2, 0.4), (0, 0.2, 0.2, 0.2)],
-            'I': [(0.05, 0, 0.05, 0.4), (0, 0, 0.1, 0), (0, 0.4, 0.1, 0.4)],
-            'J': [(0.15, 0.4, 0.15, 0.1), (0.15, 0.1, 0.1, 0), (0.1, 0, 0, 0), (0, 0, 0, 0.05)],
-            'K': [(0, 0, 0, 0.4), (0.2, 0.4, 0, 0.2), (0, 0.2, 0.2, 0)],
-            'L': [(0, 0.4, 0, 0), (0, 0, 0.2, 0)],
-            'M': [(0, 0, 0, 0.4), (0, 0.4, 0.1, 0.2), (0.1, 0.2, 0.2, 0.4), (0.2, 0.4, 0.2, 0)],
-            'N': [(0, 0, 0, 0.4), (0, 0.4, 0.2, 0), (0.2, 0, 0.2, 0.4)],
-            'O': [(0, 0, 0.2, 0), (0.2, 0, 0.2, 0.4), (0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0)],
-            'P': [(0, 0, 0, 0.4), (0, 0.4, 0.2, 0.4), (0.2, 0.4, 0.2, 0.2), (0.2, 0.2, 0, 0.2)],
-            '1': [(0.1, 0, 0.1, 0.4), (0.05, 0.35, 0.1, 0.4)],
-            '2': [(0, 0.4, 0.2, 0.4), (0.2, 0.4, 0.2, 0.2), (0.2, 0.2, 0, 0), (0, 0, 0.2, 0)],
-            '3': [(0, 0.4, 0.2, 0.4), (0.2, 0.4, 0.2, 0), (0.2, 0, 0, 0), (0, 0.2, 0.2, 0.2)],
-            '4': [(0, 0.4, 0, 0.2), (0, 0.2, 0.2, 0.2), (0.2, 0.4, 0.2, 0)],
-            '5': [(0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0.2), (0, 0.2, 0.2, 0.2), (0.2, 0.2, 0.2, 0), (0.2, 0, 0, 0)],
-            '6': [(0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0), (0, 0, 0.2, 0), (0.2, 0, 0.2, 0.2), (0.2, 0.2, 0, 0.2)],
-            '7': [(0, 0.4, 0.2, 0.4), (0.2, 0.4, 0.1, 0)],
-            '8': [(0, 0.2, 0.2, 0.2), (0, 0.2, 0, 0), (0, 0, 0.2, 0), (0.2, 0, 0.2, 0.2), 
-                  (0.2, 0.2, 0.2, 0.4), (0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0.2)],
-            '9': [(0.2, 0, 0, 0), (0, 0, 0, 0.2), (0, 0.2, 0.2, 0.2), (0.2, 0.2, 0.2, 0.4), (0.2, 0.4, 0, 0.4)],
-            '0': [(0, 0, 0.2, 0), (0.2, 0, 0.2, 0.4), (0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0)],
-        }
-        
-        if char in patterns:
-            glBegin(GL_LINES)
-            for line in patterns[char]:
-                x1, y1, x2, y2 = line
-                glVertex3f(offset_x + x1, offset_y + y1, 0)
-                glVertex3f(offset_x + x2, offset_y + y2, 0)
-            glEnd()
-    
-    def _get_robot_position_physical(self):
-        if self.fresco_xyz and hasattr(self.fresco_xyz, 'virtual_position'):
-            pos = self.fresco_xyz.virtual_position.copy()
-            return {
-                'x': pos['x'] / STEPS_PER_MM,
-                'y': pos['y'] / STEPS_PER_MM,
-                'z': -pos['z'] / STEPS_PER_MM
-            }
-        return {'x': 0.0, 'y': 0.0, 'z': 0.0}
+        mesh, buffers = self._plate_buffers()
+        if not len(mesh.label_vertices):
+            return
+        glEnableClientState(GL_VERTEX_ARRAY)
+        try:
+            label_buffer = buffers[5]
+            glBindBuffer(GL_ARRAY_BUFFER, label_buffer)
+            glVertexPointer(3, GL_FLOAT, 0, None)
+            glColor3f(0.2, 0.2, 0.2)
+            glLineWidth(2.0)
+            glDrawArrays(GL_LINES, 0, len(mesh.label_vertices))
+        finally:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glDisableClientState(GL_VERTEX_ARRAY)
 
     def _get_robot_position(self):
         if self.fresco_xyz and hasattr(self.fresco_xyz, 'virtual_position'):
@@ -495,34 +396,6 @@ class FrescoRenderer:
             }
         return {'x': 0.0, 'y': 0.0, 'z': 0.0}
     
-    def _get_led_color(self):
-        if not self.fresco_xyz:
-            return (0.5, 0.5, 0.5)
-
-        # Camera flash (yellow) - overrides everything
-        if self.camera_flash:
-            return (1.0, 1.0, 0.0)
-
-        if self.collision_state:
-            return (1.0, 0.0, 0.0)
-
-        if hasattr(self.fresco_xyz, 'is_capturing') and self.fresco_xyz.is_capturing:
-            return (1.0, 1.0, 0.0)
-
-        # LED logic: white, blue, or both (blueish-white)
-        white_on = hasattr(self.fresco_xyz, 'white_led_on') and self.fresco_xyz.white_led_on
-        blue_on = hasattr(self.fresco_xyz, 'blue_led_on') and self.fresco_xyz.blue_led_on
-
-        if white_on and blue_on:
-            # Both white and blue: blueish-white
-            return (0.7, 0.8, 1.0)
-        elif blue_on:
-            return (0.2, 0.4, 1.0)
-        elif white_on:
-            return (1.0, 1.0, 0.8)
-        else:
-            return (0.3, 0.3, 0.3)
-    
     def _update_position_history(self, current_pos):
         if self.last_render_pos is not None:
             dx = abs(current_pos['x'] - self.last_render_pos['x'])
@@ -533,17 +406,38 @@ class FrescoRenderer:
         self.last_render_pos = current_pos.copy()
     
     def _draw_trajectory(self):
-        with self.position_lock:
-            if len(self.position_history) < 2:
-                return
-            trajectory_copy = list(self.position_history)
+        if len(self.trajectory) < 2:
+            return
+        cell_size = TrajectoryStore.cell_size_for(self._mm_per_pixel(), self.TRAJECTORY_TOLERANCE_PIXELS)
+        points = self.trajectory.decimated(cell_size)
+        # Renderer frame is mirrored
+        vertices = np.empty((len(points), 3), dtype=np.float32)
+        vertices[:, 0] = self.plate_width - points[:, 0]
+        vertices[:, 1] = self.plate_height - points[:, 1]
+        vertices[:, 2] = points[:, 2]
 
         glColor4f(0.1, 0.3, 0.9, 0.6)
         glLineWidth(2.0)
-        glBegin(GL_LINE_STRIP)
-        for pos in trajectory_copy:
-            glVertex3f(pos['x'], pos['y'], pos['z'])
-        glEnd()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        try:
+            glVertexPointer(3, GL_FLOAT, 0, vertices)
+            glDrawArrays(GL_LINE_STRIP, 0, len(vertices))
+        finally:
+            glDisableClientState(GL_VERTEX_ARRAY)
+
+    def _mm_per_pixel(self):
+        """Size of one pixel at the view target."""
+        eye = self._camera_eye()
+        target = self.target_position
+        distance = np.sqrt((eye[0] - target['x']) ** 2 + (eye[1] - target['y']) ** 2 + (eye[2] - target['z']) ** 2)
+        return 2.0 * distance * np.tan(np.radians(self.FIELD_OF_VIEW / 2)) / self.height
+
+    def _camera_eye(self):
+        elevation, azimuth = np.radians(self.camera_elevation), np.radians(self.camera_azimuth)
+        camera_x = self.target_position['x'] + self.camera_distance * np.cos(elevation) * np.sin(azimuth)
+        camera_y = self.target_position['y'] + self.camera_distance * np.cos(elevation) * np.cos(azimuth)
+        camera_z = self.target_position['z'] + self.camera_distance * np.sin(elevation)
+        return camera_x / self.zoom_level, camera_y / self.zoom_level, camera_z / self.zoom_level
     
     def _draw_robot(self, pos, color):
         glPushMatrix()
@@ -642,11 +536,5 @@ class FrescoRenderer:
     def should_update_frequently(self):
         return self.is_moving or self.camera_flash
 
-    def set_exposure(self, millis: int):
-        pass
-    
-    def set_auto_exposure(self, auto: bool):
-        pass
-    
     def __del__(self):
         pygame.quit()
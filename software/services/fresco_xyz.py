@@ -1,6 +1,17 @@
-from plates import get_plate_config
+from plates import get_plate_config, MANIFOLD_TIP_LENGTH
+from plate_geometry import get_plate_geometry, PlateGeometry
 from services.services import global_services
+from services.serial_telemetry import SerialTelemetry
+from services.move_coalescer import MoveCoalescer
+from services.fresco_command import FrescoCommand
+from services.fresco_clock import WallClock
+from services.motion_time_model import MotionTimeModel
+from services.travel_planner import TravelPlanner
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
 import logging
+import math
 
 
 class CollisionWarning(Warning):
@@ -11,14 +22,14 @@ class CollisionWarning(Warning):
 class FrescoXYZ:
     STEPS_PER_MM = 200.0
     SAFE_DEFAULT_Z = -4000  # -20mm above plate (negative is up)
-
-    def __init__(self, virtual_only: bool, plate_type):
+    def __init__(self, virtual_only: bool, plate_type, clock: WallClock = None):
         if not virtual_only:
             self.serial_service = global_services.serial_service
             print('Serial service initialized')
         else:
             print('Running in virtual-only mode')
 
+        self.plate_type = plate_type
         self.plate = get_plate_config(plate_type)
         self.virtual_only = virtual_only
         self.virtual_position = {'x': self.plate['bottom_left'][0], 'y': self.plate['bottom_left'][1], 'z': self.SAFE_DEFAULT_Z}
@@ -32,231 +43,306 @@ class FrescoXYZ:
         
         self.renderer = None
         self.stop_requested = False
+        # FrescoXYZ whose stop requests this one follows, a preflight dry run follows the real machine
+        self.stop_source = None
         self.collision_warnings_enabled = True
         self.time_scale_var = None  # Will be set by UI for runtime time scale changes
+        self.virtual_telemetry = SerialTelemetry()
+        self.move_coalescer = MoveCoalescer()
+        self.clock = clock if clock is not None else WallClock()
+        self.motion_model = MotionTimeModel.load()
+        # Receives every emulated command with the motor positions before and after (see CommandRecorder)
+        self.command_recorder = None
+        # Called with (start, target) absolute positions before every stage move (see FluidicsScheduler)
+        self.clearance_hook = None
+        # Cleared when the firmware answers DeltaPumps with UnknownCommand, pumps are then driven one by one
+        self.batched_pumps_supported = True
+        # Last emulated stage move as (clock time, position before, position after), see virtual_position_at
+        self.virtual_motion = None
+
+        # Command name -> (emulator, minimum number of parameters)
+        self._command_emulators = {
+            'Delta': (self._emulate_delta, 3),
+            'DeltaPump': (self._emulate_delta_pump, 2),
+            'DeltaPumps': (self._emulate_delta_pumps, 2),
+            'ManifoldDelta': (self._emulate_manifold_delta, 1),
+            'SetPosition': (self._emulate_set_position, 3),
+            'Zero': (self._emulate_zero, 0),
+            'ManifoldZero': (self._emulate_manifold_zero, 0),
+            'VerticalZero': (self._emulate_vertical_zero, 0),
+            'GetTopLeftBottomRightCoordinates': (self._emulate_get_coordinates, 0),
+            'RememberTopLeft': (self._emulate_remember_corner, 0),
+            'RememberBottomRight': (self._emulate_remember_corner, 0),
+            'RememberBottomLeft': (self._emulate_remember_corner, 0),
+            'RememberTopRight': (self._emulate_remember_corner, 0),
+            'SwitchLedW': (self._emulate_switch_led_w, 1),
+            'SwitchLedB': (self._emulate_switch_led_b, 1),
+        }
 
-    def send(self, message: str):
-        logging.debug(f"[FrescoXYZ] Sending: {message}")
-        self._emulate_command(message)
-        if not self.virtual_only:
-            self.serial_service.current_connection.send_message_line(message)
-
-    def execute_command(self, message: str) -> str:
-        logging.debug(f"[FrescoXYZ] Executing: {message}")
-        response = self._emulate_command(message)
+    @property
+    def telemetry(self) -> SerialTelemetry:
+        """Telemetry of the current serial link, or of emulated commands in virtual-only mode."""
+        if not self.virtual_only and self.serial_service.current_connection is not None:
+            return self.serial_service.current_connection.telemetry
+        return self.virtual_telemetry
+
+    def send(self, message):
+        command = FrescoCommand.coerce(message)
+        logging.debug(f"[FrescoXYZ] Sending: {command}")
+        self._emulate_command(command)
+        for outgoing in self.move_coalescer.push(command):
+            self._write_command(outgoing)
+
+    def execute_command(self, message) -> str:
+        command = FrescoCommand.coerce(message)
+        logging.debug(f"[FrescoXYZ] Executing: {command}")
+        time_begin = datetime.now()
+        response = self._emulate_command(command)
+        outgoing_commands = self.move_coalescer.push(command)
         if not self.virtual_only:
-            return self.serial_service.current_connection.execute_command_sync(message)
+            # Commands absorbed by an open batch are acknowledged when the batch is flushed
+            response = 'Done \n'
+            for outgoing in outgoing_commands:
+                response = self.serial_service.current_connection.execute_command_sync(outgoing.to_wire())
+            return response
+        self.virtual_telemetry.record_command(command.name, (datetime.now() - time_begin).total_seconds(), response)
         return response
-        
-    def _emulate_command(self, message: str) -> str:
-        parts = message.strip().split()
 
-        if not parts:
-            logging.warning(f"[Emulator] Malformed message: {message}")
+    def execute_command_async(self, message) -> Future:
+        """
+        Queue a command without waiting for the firmware reply.
+        The virtual state is updated immediately, the returned future is resolved
+        with the reply line once the firmware answers. Only pipelined connections
+        (SerialConnection.start_pipeline) keep several commands in flight.
+
+        Args:
+            message: FrescoCommand or command line to execute
+
+        Returns:
+            Future: resolved with the response string
+        """
+        command = FrescoCommand.coerce(message)
+        logging.debug(f"[FrescoXYZ] Queueing: {command}")
+        response = self._emulate_command(command)
+        outgoing_commands = self.move_coalescer.push(command)
+        if not self.virtual_only and outgoing_commands:
+            futures = [self.serial_service.current_connection.execute_command_async(outgoing.to_wire())
+                       for outgoing in outgoing_commands]
+            return futures[-1]
+        future = Future()
+        future.set_result(response if self.virtual_only else 'Done \n')
+        return future
+
+    def _write_command(self, command: FrescoCommand):
+        if self.virtual_only:
+            return
+        connection = self.serial_service.current_connection
+        if connection.pipelined:
+            # Reply still has to be consumed in order, so go through the queue without waiting
+            connection.execute_command_async(command.to_wire())
+        else:
+            connection.send_message_line(command.to_wire())
+
+    @contextmanager
+    def batch(self):
+        """
+        Open a batch in which relative moves, manifold moves and LED switches are
+        coalesced before they go to the firmware (see MoveCoalescer).
+        Virtual position and renderer trajectory still follow every single command.
+        Do not grab camera frames inside a batch, the stage only reaches the final
+        position when the batch is flushed.
+
+            with fresco_xyz.batch():
+                fresco_xyz.delta(1800, 0, 0)
+                fresco_xyz.delta(0, -1800, 0)
+        """
+        self.move_coalescer.begin()
+        try:
+            yield self
+        finally:
+            if self.move_coalescer.end():
+                self.flush()
+                self.move_coalescer.log_statistics()
+
+    def flush(self):
+        """Send all commands held back by an open batch."""
+        for outgoing in self.move_coalescer.flush():
+            if not self.virtual_only:
+                self.serial_service.current_connection.execute_command_sync(outgoing.to_wire())
+
+    def _emulate_command(self, command: FrescoCommand) -> str:
+        if self.stop_source is not None and self.stop_source.should_stop():
+            # Dry runs stop on the next command, also for protocols that never check should_stop()
+            raise InterruptedError("Dry run stopped by user")
+        entry = self._command_emulators.get(command.name)
+        if entry is None:
+            if not command.name:
+                logging.warning(f"[Emulator] Malformed message: {command}")
             return "OK"
+        emulator, number_of_parameters = entry
+        if len(command.parameters) < number_of_parameters:
+            return "OK"
+        steps_before = self._moved_steps()
+        position_before = dict(self.virtual_position)
+        start_time = self.clock.now()
+        try:
+            response = emulator(command)
+        except (TypeError, ValueError):
+            logging.warning(f"[Emulator] Invalid parameters: {command}")
+            return "OK"
+        if self.virtual_position != position_before:
+            self.virtual_motion = (start_time, position_before, dict(self.virtual_position))
+        if self.clock.is_simulated or self.command_recorder is not None:
+            steps_after = self._moved_steps()
+            if self.clock.is_simulated:
+                self.clock.advance(self.motion_model.move_duration(
+                    {motor: steps - steps_before.get(motor, 0) for motor, steps in steps_after.items()}))
+            if self.command_recorder is not None:
+                self.command_recorder.record(command, steps_before, steps_after)
+        return response if response is not None else "OK"
+
+    def _moved_steps(self) -> dict:
+        steps = dict(self.virtual_position)
+        steps['manifold'] = self.virtual_manifold_position
+        for pump_index, position in self.virtual_pump_positions.items():
+            steps[f'pump{pump_index}'] = position
+        return steps
+
+    def virtual_position_at(self, timestamp: float) -> dict:
+        """
+        Where the emulated stage is at a clock time. Commands update virtual_position at once,
+        this follows the last move through the motion model instead (X, then Y, then Z like the firmware).
+        """
+        if self.virtual_motion is None or self.virtual_motion[2] != self.virtual_position:
+            return dict(self.virtual_position)
+        start_time, before, after = self.virtual_motion
+        elapsed = timestamp - start_time
+        position = dict(before)
+        for axis in ('x', 'y', 'z'):
+            distance = after[axis] - before[axis]
+            motion = self.motion_model.axis(axis)
+            position[axis] = before[axis] + math.copysign(float(motion.distance_at(elapsed, distance)), distance)
+            elapsed -= motion.duration(distance)
+        return position
+
+    def estimate_delta_duration(self, x: float, y: float, z: float) -> float:
+        """Seconds the stage needs for delta(x, y, z), from the calibrated motion model."""
+        return self.motion_model.delta_duration(x, y, z)
+
+    def estimate_set_position_duration(self, x: float, y: float, z: float) -> float:
+        """Seconds the stage needs for set_position(x, y, z) from the current virtual position."""
+        absolute_x, absolute_y = self.plate_to_absolute(x, y)
+        return self.motion_model.delta_duration(absolute_x - self.virtual_position['x'],
+                                                absolute_y - self.virtual_position['y'],
+                                                z - self.virtual_position['z'])
+
+    def _record_renderer_position(self):
+        if self.renderer:
+            x_mm = self.virtual_position['x'] / self.STEPS_PER_MM
+            y_mm = self.virtual_position['y'] / self.STEPS_PER_MM
+            z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
+            self.renderer.record_position(x_mm, y_mm, z_mm)
+
+    def _emulate_delta(self, command: FrescoCommand):
+        dx, dy, dz = (float(value) for value in command.parameters[:3])
+        self.virtual_position['x'] += dx
+        self.virtual_position['y'] += dy
+        self.virtual_position['z'] += dz
+        self._record_renderer_position()
+        logging.info(f"[Emulator] Delta ({dx}, {dy}, {dz}) -> {self.virtual_position}")
+
+    def _emulate_delta_pump(self, command: FrescoCommand):
+        pump_idx = int(command.parameters[0])
+        delta = float(command.parameters[1])
+        if pump_idx not in self.virtual_pump_positions:
+            self.virtual_pump_positions[pump_idx] = 0
+        self.virtual_pump_positions[pump_idx] += delta
+
+        # Record pump event in renderer
+        if self.renderer:
+            self.renderer.record_pump_event(pump_idx, delta)
+
+        logging.info(f"[Emulator] Pump {pump_idx} -> {self.virtual_pump_positions[pump_idx]}")
+
+    def _emulate_delta_pumps(self, command: FrescoCommand):
+        parameters = command.parameters
+        deltas = {}
+        for index in range(0, len(parameters) - 1, 2):
+            pump_idx = int(parameters[index])
+            deltas[pump_idx] = deltas.get(pump_idx, 0) + float(parameters[index + 1])
+        for pump_idx, delta in deltas.items():
+            self.virtual_pump_positions[pump_idx] = self.virtual_pump_positions.get(pump_idx, 0) + delta
+
+        if self.renderer:
+            self.renderer.record_pump_events(deltas)
+
+        logging.info(f"[Emulator] Pumps {deltas} -> {self.virtual_pump_positions}")
+
+    def _emulate_manifold_delta(self, command: FrescoCommand):
+        self.virtual_manifold_position += float(command.parameters[0])
+        logging.info(f"[Emulator] Manifold -> {self.virtual_manifold_position}")
+
+    def _emulate_set_position(self, command: FrescoCommand):
+        x, y, z = (float(value) for value in command.parameters[:3])
+        self.virtual_position = {'x': x, 'y': y, 'z': z}
+        self._record_renderer_position()
+        logging.info(f"[Emulator] SetPosition -> {self.virtual_position}")
+
+    def _emulate_zero(self, command: FrescoCommand):
+        self.virtual_position = {'x': self.plate['bottom_left'][0], 'y': self.plate['bottom_left'][1], 'z': self.SAFE_DEFAULT_Z}
+        self._record_renderer_position()
+        logging.info("[Emulator] Zero XYZ (raised to safe height)")
 
-        cmd = parts[0]
-
-        if cmd == "Delta" and len(parts) >= 4:
-            try:
-                dx, dy, dz = float(parts[1]), float(parts[2]), float(parts[3])
-                self.virtual_position['x'] += dx
-                self.virtual_position['y'] += dy
-                self.virtual_position['z'] += dz
-
-                if self.renderer:
-                    x_mm = self.virtual_position['x'] / self.STEPS_PER_MM
-                    y_mm = self.virtual_position['y'] / self.STEPS_PER_MM
-                    z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
-                    self.renderer.record_position(x_mm, y_mm, z_mm)
-
-                logging.info(f"[Emulator] Delta ({dx}, {dy}, {dz}) -> {self.virtual_position}")
-            except ValueError:
-                pass
-
-        elif cmd == "DeltaPump" and len(parts) >= 3:
-            try:
-                pump_idx = int(parts[1])
-                delta = float(parts[2])
-                if pump_idx not in self.virtual_pump_positions:
-                    self.virtual_pump_positions[pump_idx] = 0
-                self.virtual_pump_positions[pump_idx] += delta
-                
-                # Record pump event in renderer
-                if self.renderer:
-                    self.renderer.record_pump_event(pump_idx, delta)
-                
-                logging.info(f"[Emulator] Pump {pump_idx} -> {self.virtual_pump_positions[pump_idx]}")
-            except ValueError:
-                pass
-
-        elif cmd == "ManifoldDelta" and len(parts) >= 2:
-            try:
-                delta = float(parts[1])
-                self.virtual_manifold_position += delta
-                logging.info(f"[Emulator] Manifold -> {self.virtual_manifold_position}")
-            except ValueError:
-                pass
-
-        elif cmd == "SetPosition" and len(parts) >= 4:
-            try:
-                x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                self.virtual_position = {'x': x, 'y': y, 'z': z}
-
-                if self.renderer:
-                    x_mm = self.virtual_position['x'] / self.STEPS_PER_MM
-                    y_mm = self.virtual_position['y'] / self.STEPS_PER_MM
-                    z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
-                    self.renderer.record_position(x_mm, y_mm, z_mm)
-
-                logging.info(f"[Emulator] SetPosition -> {self.virtual_position}")
-            except ValueError:
-                pass
-
-        elif cmd == "Zero":
-            self.virtual_position = {'x': self.plate['bottom_left'][0], 'y': self.plate['bottom_left'][1], 'z': self.SAFE_DEFAULT_Z}
-
-            if self.renderer:
-                x_mm = self.virtual_position['x'] / self.STEPS_PER_MM
-                y_mm = self.virtual_position['y'] / self.STEPS_PER_MM
-                z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
-                self.renderer.record_position(x_mm, y_mm, z_mm)
-
-            logging.info("[Emulator] Zero XYZ (raised to safe height)")
-
-        elif cmd == "ManifoldZero":
-            self.virtual_manifold_position = 0
-            logging.info("[Emulator] Zero Manifold")
-
-        elif cmd == "VerticalZero":
-            self.virtual_position['z'] = self.SAFE_DEFAULT_Z
-
-            if self.renderer:
-                x_mm = self.virtual_position['x'] / self.STEPS_PER_MM
-                y_mm = self.virtual_position['y'] / self.STEPS_PER_MM
-                z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
-                self.renderer.record_position(x_mm, y_mm, z_mm)
-
-            logging.info("[Emulator] Zero Z (raised to safe height)")
-
-        elif cmd == "GetTopLeftBottomRightCoordinates":
-            logging.info(f"[Emulator] TopLeft: {self.topLeftPosition}, BottomRight: {self.bottomRightPosition}")
-            return f"OK {self.topLeftPosition[0]} {self.topLeftPosition[1]} {self.bottomRightPosition[0]} {self.bottomRightPosition[1]}"
-
-        elif cmd == "RememberTopLeft":
-            curr_x = int(self.virtual_position['x'])
-            curr_y = int(self.virtual_position['y'])
-            self.topLeftPosition = (curr_x, curr_y)
-
-            # Current position becomes top-left well (e.g. H1 for 96-well)
-            # Calculate plate dimensions from config
-            plate_width = (self.plate['cols'] - 1) * self.plate['steps_per_well']
-            plate_height = (self.plate['rows'] - 1) * self.plate['steps_per_well']
-
-            # Top-left well is at (bottom_left.x, bottom_left.y + plate_height)
-            # So: bottom_left = (curr_x, curr_y - plate_height)
-            self.plate['bottom_left'] = (curr_x, curr_y - plate_height)
-            self.plate['top_right'] = (curr_x + plate_width, curr_y)
-
-            # Clear position history and re-record current position with new offset
-            if self.renderer:
-                self.renderer.clear_position_history()
-                x_mm = curr_x / self.STEPS_PER_MM
-                y_mm = curr_y / self.STEPS_PER_MM
-                z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
-                self.renderer.record_position(x_mm, y_mm, z_mm)
-
-            logging.info(f"[Emulator] Remembered top-left position: ({curr_x}, {curr_y})")
-            logging.info(f"[Emulator] Plate bounds: bottom_left={self.plate['bottom_left']}, top_right={self.plate['top_right']}")
-
-        elif cmd == "RememberBottomRight":
-            curr_x = int(self.virtual_position['x'])
-            curr_y = int(self.virtual_position['y'])
-            self.bottomRightPosition = (curr_x, curr_y)
-
-            # Current position becomes bottom-right well (e.g. A12 for 96-well)
-            # Calculate plate dimensions from config
-            plate_width = (self.plate['cols'] - 1) * self.plate['steps_per_well']
-            plate_height = (self.plate['rows'] - 1) * self.plate['steps_per_well']
-
-            # Bottom-right well is at (bottom_left.x + plate_width, bottom_left.y)
-            # So: bottom_left = (curr_x - plate_width, curr_y)
-            self.plate['bottom_left'] = (curr_x - plate_width, curr_y)
-            self.plate['top_right'] = (curr_x, curr_y + plate_height)
-
-            # Clear position history and re-record current position with new offset
-            if self.renderer:
-                self.renderer.clear_position_history()
-                x_mm = curr_x / self.STEPS_PER_MM
-                y_mm = curr_y / self.STEPS_PER_MM
-                z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
-                self.renderer.record_position(x_mm, y_mm, z_mm)
-
-            logging.info(f"[Emulator] Remembered bottom-right position: ({curr_x}, {curr_y})")
-            logging.info(f"[Emulator] Plate bounds: bottom_left={self.plate['bottom_left']}, top_right={self.plate['top_right']}")
-
-        elif cmd == "RememberBottomLeft":
-            curr_x = int(self.virtual_position['x'])
-            curr_y = int(self.virtual_position['y'])
-            self.topLeftPosition = (curr_x, curr_y)  # Reuse for consistency
-
-            # Current position becomes bottom-left well (e.g. A1 for 96-well)
-            # Calculate plate dimensions from config
-            plate_width = (self.plate['cols'] - 1) * self.plate['steps_per_well']
-            plate_height = (self.plate['rows'] - 1) * self.plate['steps_per_well']
-
-            # Bottom-left well is at (bottom_left.x, bottom_left.y)
-            # So: bottom_left = (curr_x, curr_y)
-            self.plate['bottom_left'] = (curr_x, curr_y)
-            self.plate['top_right'] = (curr_x + plate_width, curr_y + plate_height)
-
-            # Clear position history and re-record current position with new offset
-            if self.renderer:
-                self.renderer.clear_position_history()
-                x_mm = curr_x / self.STEPS_PER_MM
-                y_mm = curr_y / self.STEPS_PER_MM
-                z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
-                self.renderer.record_position(x_mm, y_mm, z_mm)
-
-            logging.info(f"[Emulator] Remembered bottom-left position: ({curr_x}, {curr_y})")
-            logging.info(f"[Emulator] Plate bounds: bottom_left={self.plate['bottom_left']}, top_right={self.plate['top_right']}")
-
-        elif cmd == "RememberTopRight":
-            curr_x = int(self.virtual_position['x'])
-            curr_y = int(self.virtual_position['y'])
-            self.bottomRightPosition = (curr_x, curr_y)  # Reuse for consistency
-
-            # Current position becomes top-right well (e.g. H12 for 96-well)
-            # Calculate plate dimensions from config
-            plate_width = (self.plate['cols'] - 1) * self.plate['steps_per_well']
-            plate_height = (self.plate['rows'] - 1) * self.plate['steps_per_well']
-
-            # Top-right well is at (bottom_left.x + plate_width, bottom_left.y + plate_height)
-            # So: bottom_left = (curr_x - plate_width, curr_y - plate_height)
-            self.plate['bottom_left'] = (curr_x - plate_width, curr_y - plate_height)
-            self.plate['top_right'] = (curr_x, curr_y)
-
-            # Clear position history and re-record current position with new offset
-            if self.renderer:
-                self.renderer.clear_position_history()
-                x_mm = curr_x / self.STEPS_PER_MM
-                y_mm = curr_y / self.STEPS_PER_MM
-                z_mm = -self.virtual_position['z'] / self.STEPS_PER_MM
-                self.renderer.record_position(x_mm, y_mm, z_mm)
-
-            logging.info(f"[Emulator] Remembered top-right position: ({curr_x}, {curr_y})")
-            logging.info(f"[Emulator] Plate bounds: bottom_left={self.plate['bottom_left']}, top_right={self.plate['top_right']}")
-
-        elif cmd == "SwitchLedW" and len(parts) >= 2:
-            self.white_led_on = parts[1] == "1"
-            logging.info(f"[Emulator] White LED: {'ON' if self.white_led_on else 'OFF'}")
-        
-        elif cmd == "SwitchLedB" and len(parts) >= 2:
-            self.blue_led_on = parts[1] == "1"
-            logging.info(f"[Emulator] Blue LED: {'ON' if self.blue_led_on else 'OFF'}")
+    def _emulate_manifold_zero(self, command: FrescoCommand):
+        self.virtual_manifold_position = 0
+        logging.info("[Emulator] Zero Manifold")
+
+    def _emulate_vertical_zero(self, command: FrescoCommand):
+        self.virtual_position['z'] = self.SAFE_DEFAULT_Z
+        self._record_renderer_position()
+        logging.info("[Emulator] Zero Z (raised to safe height)")
+
+    def _emulate_get_coordinates(self, command: FrescoCommand):
+        logging.info(f"[Emulator] TopLeft: {self.topLeftPosition}, BottomRight: {self.bottomRightPosition}")
+        return f"OK {self.topLeftPosition[0]} {self.topLeftPosition[1]} {self.bottomRightPosition[0]} {self.bottomRightPosition[1]}"
+
+    # Remember command -> (stored attribute, corner name, bottom-left offset in plate widths / heights)
+    REMEMBERED_CORNERS = {
+        'RememberTopLeft': ('topLeftPosition', 'top-left', (0, -1)),
+        'RememberBottomRight': ('bottomRightPosition', 'bottom-right', (-1, 0)),
+        'RememberBottomLeft': ('topLeftPosition', 'bottom-left', (0, 0)),  # Reuse for consistency
+        'RememberTopRight': ('bottomRightPosition', 'top-right', (-1, -1)),  # Reuse for consistency
+    }
+
+    def _emulate_remember_corner(self, command: FrescoCommand):
+        attribute, corner_name, (offset_x, offset_y) = self.REMEMBERED_CORNERS[command.name]
+        curr_x = int(self.virtual_position['x'])
+        curr_y = int(self.virtual_position['y'])
+        setattr(self, attribute, (curr_x, curr_y))
+
+        # Current position becomes the given corner well, plate dimensions come from config
+        plate_width = (self.plate['cols'] - 1) * self.plate['steps_per_well']
+        plate_height = (self.plate['rows'] - 1) * self.plate['steps_per_well']
+        bottom_left = (curr_x + offset_x * plate_width, curr_y + offset_y * plate_height)
+        self.plate['bottom_left'] = bottom_left
+        self.plate['top_right'] = (bottom_left[0] + plate_width, bottom_left[1] + plate_height)
+
+        # Clear position history and re-record current position with new offset
+        if self.renderer:
+            self.renderer.clear_position_history()
+            self._record_renderer_position()
+
+        logging.info(f"[Emulator] Remembered {corner_name} position: ({curr_x}, {curr_y})")
+        logging.info(f"[Emulator] Plate bounds: bottom_left={self.plate['bottom_left']}, top_right={self.plate['top_right']}")
+
+    def _emulate_switch_led_w(self, command: FrescoCommand):
+        self.white_led_on = str(command.parameters[0]) == "1"
+        logging.info(f"[Emulator] White LED: {'ON' if self.white_led_on else 'OFF'}")
+
+    def _emulate_switch_led_b(self, command: FrescoCommand):
+        self.blue_led_on = str(command.parameters[0]) == "1"
+        logging.info(f"[Emulator] Blue LED: {'ON' if self.blue_led_on else 'OFF'}")
 
-        return "OK"
-    
     def _check_collision(self, new_pos_steps):
         """Advisory collision check - warns but doesn't block."""
         if not self.renderer or not self.collision_warnings_enabled:
@@ -269,12 +355,13 @@ class FrescoXYZ:
         # Calculate plate bounds in absolute coordinates (accounting for offset)
         plate_offset_x = self.plate['bottom_left'][0] / self.STEPS_PER_MM
         plate_offset_y = self.plate['bottom_left'][1] / self.STEPS_PER_MM
+        geometry = self.plate_geometry
 
         margin = 15
         min_x = plate_offset_x - margin
         min_y = plate_offset_y - margin
-        max_x = plate_offset_x + self.renderer.plate_width + margin
-        max_y = plate_offset_y + self.renderer.plate_height + margin
+        max_x = plate_offset_x + geometry.width_mm + margin
+        max_y = plate_offset_y + geometry.height_mm + margin
 
         warnings = []
 
@@ -285,21 +372,44 @@ class FrescoXYZ:
         
         # Only check manifold collision if manifold is not at zero/home position
         if self.virtual_manifold_position != 0:
-            well = self.renderer.get_well_at_position(x_mm, y_mm)
+            well = geometry.well_at(x_mm - plate_offset_x, y_mm - plate_offset_y)
             manifold_z_mm = z_mm - (self.virtual_manifold_position / self.STEPS_PER_MM)
-            tip_z = manifold_z_mm - 20.0
+            tip_z = manifold_z_mm - MANIFOLD_TIP_LENGTH
 
-            plate_top = self.renderer.plate_config['plate_thickness']
+            plate_top = self.plate['plate_thickness']
 
             if well is None and tip_z > -2.0 and tip_z < plate_top + 2.0:
                 warnings.append(f"Manifold tip near plate surface at Z={tip_z:.1f}mm")
-            elif well and tip_z < (plate_top - well.depth - 0.5):
-                warnings.append(f"Manifold tip penetrating well {well.label} bottom")
+            elif well and tip_z < (plate_top - geometry.well_depth_mm - 0.5):
+                warnings.append(f"Manifold tip penetrating well {geometry.labels[well[0]][well[1]]} bottom")
         
         self.renderer.collision_state = bool(warnings)
         
         return warnings if warnings else None
     
+    def _warn_collision(self, new_pos_steps):
+        warnings = self._check_collision(new_pos_steps)
+        if warnings:
+            for warning in warnings:
+                logging.warning(f"COLLISION WARNING: {warning}")
+                import warnings as warn_module
+                warn_module.warn(warning, CollisionWarning, stacklevel=3)
+
+    def _ensure_clearance(self, new_pos_steps):
+        if self.clearance_hook is not None:
+            self.clearance_hook(dict(self.virtual_position), new_pos_steps)
+
+    @property
+    def plate_geometry(self) -> PlateGeometry:
+        """Cached well centers for the plate type and current calibration offset."""
+        return get_plate_geometry(self.plate_type, self.plate['bottom_left'])
+
+    def plate_to_absolute(self, x: float, y: float):
+        """Convert plate-relative coordinates (steps) to absolute robot coordinates by adding the plate offset."""
+        if self.plate:
+            return x + self.plate['bottom_left'][0], y + self.plate['bottom_left'][1]
+        return x, y
+
     def request_stop(self):
         """Request protocol stop - should be checked in protocol loops."""
         self.stop_requested = True
@@ -307,19 +417,17 @@ class FrescoXYZ:
     
     def should_stop(self) -> bool:
         """Check if protocol should stop."""
-        return self.stop_requested
+        return self.stop_requested or (self.stop_source is not None and self.stop_source.should_stop())
     
     def reset_stop_flag(self):
         """Reset stop flag for new protocol."""
         self.stop_requested = False
 
     def white_led_switch(self, state: bool):
-        message = 'SwitchLedW 1' if state else 'SwitchLedW 0'
-        self.send(message)
+        self.send(FrescoCommand('SwitchLedW', 1 if state else 0))
 
     def blue_led_switch(self, state: bool):
-        message = 'SwitchLedB 1' if state else 'SwitchLedB 0'
-        self.send(message)
+        self.send(FrescoCommand('SwitchLedB', 1 if state else 0))
 
     def delta(self, x: float, y: float, z: float):
         """
@@ -336,24 +444,39 @@ class FrescoXYZ:
             'y': self.virtual_position['y'] + y,
             'z': self.virtual_position['z'] + z
         }
+        self._ensure_clearance(new_pos)
+        self._warn_collision(new_pos)
 
-        warnings = self._check_collision(new_pos)
-        if warnings:
-            for warning in warnings:
-                logging.warning(f"COLLISION WARNING: {warning}")
-                import warnings as warn_module
-                warn_module.warn(warning, CollisionWarning, stacklevel=2)
-
-        message = f'Delta {x} {y} {z}'
-        self.execute_command(message)
+        self.execute_command(FrescoCommand('Delta', x, y, z))
 
     def delta_pump(self, pump_index: int, delta: float):
-        message = f'DeltaPump {pump_index} {delta}'
-        self.execute_command(message)
+        self.execute_command(FrescoCommand('DeltaPump', pump_index, delta))
+
+    def delta_pumps(self, deltas: dict):
+        """
+        Drive several pumps with one round-trip, e.g. delta_pumps({0: 50, 3: 20}).
+        Falls back to one DeltaPump per pump on firmware without DeltaPumps.
+
+        Args:
+            deltas: pump index -> steps, positive=dispense, negative=aspirate
+        """
+        deltas = {int(pump_index): delta for pump_index, delta in deltas.items() if delta}
+        if len(deltas) < 2 or not self.batched_pumps_supported:
+            for pump_index, delta in deltas.items():
+                self.delta_pump(pump_index, delta)
+            return
+        parameters = [parameter for pump_index, delta in sorted(deltas.items()) for parameter in (pump_index, delta)]
+        response = self.execute_command(FrescoCommand('DeltaPumps', *parameters))
+        if response and 'UnknownCommand' in response:
+            logging.warning("[FrescoXYZ] Firmware does not know DeltaPumps, driving pumps one by one")
+            self.batched_pumps_supported = False
+            # Virtual state already has the whole dispense, only the firmware still has to move
+            for pump_index, delta in sorted(deltas.items()):
+                for outgoing in self.move_coalescer.push(FrescoCommand('DeltaPump', pump_index, delta)):
+                    self.serial_service.current_connection.execute_command_sync(outgoing.to_wire())
 
     def manifold_delta(self, delta: float):
-        message = f'ManifoldDelta {delta}'
-        self.execute_command(message)
+        self.execute_command(FrescoCommand('ManifoldDelta', delta))
 
     def set_position(self, x: float, y: float, z: float):
         """
@@ -365,26 +488,33 @@ class FrescoXYZ:
             y: Y position in steps (plate-relative)
             z: Z position in steps
         """
-        # Convert plate-relative coordinates to absolute robot coordinates
-        # by adding the plate offset
-        if self.plate:
-            absolute_x = x + self.plate['bottom_left'][0]
-            absolute_y = y + self.plate['bottom_left'][1]
-        else:
-            absolute_x = x
-            absolute_y = y
+        absolute_x, absolute_y = self.plate_to_absolute(x, y)
+        self._ensure_clearance({'x': absolute_x, 'y': absolute_y, 'z': z})
+        self._warn_collision({'x': absolute_x, 'y': absolute_y, 'z': z})
 
-        new_pos = {'x': absolute_x, 'y': absolute_y, 'z': z}
+        self.execute_command(FrescoCommand('SetPosition', int(absolute_x), int(absolute_y), int(z)))
 
-        warnings = self._check_collision(new_pos)
-        if warnings:
-            for warning in warnings:
-                logging.warning(f"COLLISION WARNING: {warning}")
-                import warnings as warn_module
-                warn_module.warn(warning, CollisionWarning, stacklevel=2)
+    def travel_to(self, x: float, y: float, z: float):
+        """
+        Move to absolute plate-relative position like set_position, raising Z on the way
+        only as far as the lowered manifold needs to clear the plate (see TravelPlanner).
+        Use this instead of go_to_zero_z() followed by set_position().
+
+        Args:
+            x: X position in steps (plate-relative)
+            y: Y position in steps (plate-relative)
+            z: Z position in steps
+        """
+        absolute_x, absolute_y = self.plate_to_absolute(x, y)
+        self._ensure_clearance({'x': absolute_x, 'y': absolute_y, 'z': z})
+        self._warn_collision({'x': absolute_x, 'y': absolute_y, 'z': z})
 
-        message = f'SetPosition {int(absolute_x)} {int(absolute_y)} {int(z)}'
-        self.execute_command(message)
+        planner = TravelPlanner(self.plate_geometry)
+        legs = planner.plan(self.virtual_position, self.virtual_manifold_position, (absolute_x, absolute_y, z))
+        if len(legs) > 1:
+            logging.debug(f"[FrescoXYZ] Travel via clearance height {legs[0][2]}: {legs}")
+        for leg_x, leg_y, leg_z in legs:
+            self.execute_command(FrescoCommand('SetPosition', leg_x, leg_y, leg_z))
 
     def go_to_zero(self):
         """
@@ -394,29 +524,30 @@ class FrescoXYZ:
         self.set_position(0, 0, self.SAFE_DEFAULT_Z)
 
     def go_to_zero_manifold(self):
-        self.execute_command('ManifoldZero')
+        self.execute_command(FrescoCommand('ManifoldZero'))
 
     def go_to_zero_z(self):
-        self.execute_command('VerticalZero')
+        self._ensure_clearance(dict(self.virtual_position, z=self.SAFE_DEFAULT_Z))
+        self.execute_command(FrescoCommand('VerticalZero'))
 
     def remember_top_left_position(self):
         self.go_to_zero_z()
-        self.execute_command('RememberTopLeft')
+        self.execute_command(FrescoCommand('RememberTopLeft'))
 
     def remember_bottom_right_position(self):
         self.go_to_zero_z()
-        self.execute_command('RememberBottomRight')
+        self.execute_command(FrescoCommand('RememberBottomRight'))
 
     def remember_bottom_left_position(self):
         self.go_to_zero_z()
-        self.execute_command('RememberBottomLeft')
+        self.execute_command(FrescoCommand('RememberBottomLeft'))
 
     def remember_top_right_position(self):
         self.go_to_zero_z()
-        self.execute_command('RememberTopRight')
+        self.execute_command(FrescoCommand('RememberTopRight'))
 
     def update_top_left_bottom_right(self):
-        coordinates_response = self.execute_command('GetTopLeftBottomRightCoordinates')
+        coordinates_response = self.execute_command(FrescoCommand('GetTopLeftBottomRightCoordinates'))
         tokens = coordinates_response.split(' ')
         self.topLeftPosition = (int(tokens[1]), int(tokens[2]))
         self.bottomRightPosition = (int(tokens[3]), int(tokens[4]))
@@ -24,3 +24,18 @@ class ImagesStorage:
         path = self.storage_root_path + timestamp_prefix
         os.makedirs(path)
         return path
+
+
+class DryRunImagesStorage(ImagesStorage):
+    """Storage for protocol dry runs: folders go to a temporary directory, images are dropped."""
+
+    def __init__(self):
+        import tempfile
+        self.storage_root_path = tempfile.mkdtemp(prefix='fresco_dry_run_') + '/'
+
+    def save(self, image, name):
+        pass
+
+    def cleanup(self):
+        import shutil
+        shutil.rmtree(self.storage_root_path, ignore_errors=True)
@@ -0,0 +1,180 @@
+import numpy as np
+import logging
+import json
+import os
+
+
+class AxisMotion:
+    """
+    Trapezoidal velocity profile of one motor: accelerate to speed, cruise, decelerate.
+    An acceleration of 0 means the motor starts at full speed (current firmware behaviour).
+    """
+
+    def __init__(self, speed: float, acceleration: float = 0.0):
+        self.speed = speed  # steps / s
+        self.acceleration = acceleration  # steps / s^2
+
+    def duration(self, distance: float) -> float:
+        distance = abs(distance)
+        if distance == 0:
+            return 0.0
+        if self.acceleration <= 0:
+            return distance / self.speed
+        ramp_distance = self.speed * self.speed / self.acceleration
+        if distance >= ramp_distance:
+            return distance / self.speed + self.speed / self.acceleration
+        # Triangle profile, top speed is never reached
+        return 2.0 * np.sqrt(distance / self.acceleration)
+
+    def durations(self, distances: np.ndarray) -> np.ndarray:
+        """Vectorized duration() for an array of distances."""
+        distances = np.abs(np.asarray(distances, dtype=np.float64))
+        if self.acceleration <= 0:
+            return distances / self.speed
+        ramp_distance = self.speed * self.speed / self.acceleration
+        trapezoid = distances / self.speed + self.speed / self.acceleration
+        triangle = 2.0 * np.sqrt(distances / self.acceleration)
+        return np.where(distances >= ramp_distance, trapezoid, triangle)
+
+    def distance_at(self, elapsed, distance: float):
+        """
+        Steps covered after elapsed seconds of a move over distance, inverse of duration().
+        Works on scalars and arrays of elapsed times, clipped to the move.
+        """
+        distance = abs(distance)
+        total = self.duration(distance)
+        elapsed = np.clip(elapsed, 0.0, total)
+        if self.acceleration <= 0:
+            return np.minimum(elapsed * self.speed, distance)
+        ramp_time = min(self.speed / self.acceleration, total / 2)
+        top_speed = self.acceleration * ramp_time
+        accelerating = 0.5 * self.acceleration * elapsed ** 2
+        cruising = 0.5 * self.acceleration * ramp_time ** 2 + top_speed * (elapsed - ramp_time)
+        decelerating = distance - 0.5 * self.acceleration * (total - elapsed) ** 2
+        return np.where(elapsed < ramp_time, accelerating, np.where(elapsed < total - ramp_time, cruising, decelerating))
+
+    def to_dict(self) -> dict:
+        return {'speed': self.speed, 'acceleration': self.acceleration}
+
+
+class MotionTimeModel:
+    """
+    How long the firmware needs for a command.
+    The firmware moves X, then Y, then Z (FrescoXYZ.cpp), so axis times add up,
+    plus a fixed overhead per command for the serial round-trip and parsing.
+
+    The model is fitted by MotionTimeCalibration from measured command latencies
+    and stored next to the software as motion_time_model.json.
+    """
+    DEFAULT_PATH = './motion_time_model.json'
+    # Motors that have their own entry; every pump shares the 'pump' entry
+    AXES = ('x', 'y', 'z', 'manifold', 'pump')
+    # FrescoMotor.cpp: 100us HIGH + 100us LOW per step, no acceleration
+    DEFAULT_SPEED = 5000.0
+    DEFAULT_COMMAND_OVERHEAD = 0.02
+
+    def __init__(self, axes: dict = None, command_overhead: float = DEFAULT_COMMAND_OVERHEAD):
+        self.axes = {axis: AxisMotion(self.DEFAULT_SPEED) for axis in self.AXES}
+        if axes:
+            self.axes.update(axes)
+        self.command_overhead = command_overhead
+        # Axes the last fit() had samples for but could not fit, they kept their previous parameters
+        self.unfitted_axes = set()
+
+    def axis(self, name: str) -> AxisMotion:
+        return self.axes['pump' if name.startswith('pump') else name]
+
+    def move_duration(self, distances: dict) -> float:
+        """
+        Duration of one command moving the given motors one after another.
+
+        Args:
+            distances: motor name ('x', 'y', 'z', 'manifold', 'pump1', ...) -> steps
+        """
+        return self.command_overhead + sum(self.axis(name).duration(distance) for name, distance in distances.items())
+
+    def delta_duration(self, x: float, y: float, z: float) -> float:
+        return self.move_duration({'x': x, 'y': y, 'z': z})
+
+    def fit(self, samples: [(dict, float)]) -> 'MotionTimeModel':
+        """
+        Least-squares fit of speed, acceleration and command overhead.
+        For moves longer than the ramp a trapezoid takes distance / speed + speed / acceleration,
+        which is linear in (1 / speed, speed / acceleration) per axis plus the overhead.
+        Moves that turn out to be shorter than the fitted ramp are dropped and the fit is repeated once.
+        Axes that were never moved keep their current parameters, so are axes the samples
+        do not determine (listed in unfitted_axes).
+
+        Args:
+            samples: list of (motor name -> steps, measured seconds)
+        """
+        self._solve(samples)
+        long_samples = [(distances, seconds) for distances, seconds in samples
+                        if all(self._is_past_ramp(name, distance) for name, distance in distances.items())]
+        if len(long_samples) < len(samples):
+            self._solve(long_samples)
+        return self
+
+    def _is_past_ramp(self, name: str, distance: float) -> bool:
+        axis = self.axis(name)
+        return axis.acceleration <= 0 or abs(distance) >= axis.speed * axis.speed / axis.acceleration
+
+    def _solve(self, samples: [(dict, float)]):
+        axes = sorted({self._axis_name(name) for distances, _ in samples for name in distances})
+        self.unfitted_axes = set()
+        rows = []
+        durations = []
+        for distances, seconds in samples:
+            row = [1.0]
+            for axis in axes:
+                moved = [abs(distance) for name, distance in distances.items() if self._axis_name(name) == axis]
+                row += [sum(moved), float(sum(1 for distance in moved if distance))]
+            rows.append(row)
+            durations.append(seconds)
+        solution, _, _, _ = np.linalg.lstsq(np.array(rows), np.array(durations), rcond=None)
+
+        self.command_overhead = max(float(solution[0]), 0.0)
+        for index, axis in enumerate(axes):
+            seconds_per_step, ramp_seconds = solution[1 + 2 * index], solution[2 + 2 * index]
+            if seconds_per_step <= 0:
+                logging.warning(f"[MotionTimeModel] Not enough data to fit {axis}, keeping previous speed")
+                self.unfitted_axes.add(axis)
+                continue
+            speed = 1.0 / float(seconds_per_step)
+            acceleration = speed / float(ramp_seconds) if ramp_seconds > 0 else 0.0
+            self.axes[axis] = AxisMotion(speed, acceleration)
+
+    def _axis_name(self, name: str) -> str:
+        return 'pump' if name.startswith('pump') else name
+
+    def to_dict(self) -> dict:
+        return {'command_overhead': self.command_overhead,
+                'axes': {name: axis.to_dict() for name, axis in self.axes.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'MotionTimeModel':
+        axes = {name: AxisMotion(values['speed'], values.get('acceleration', 0.0))
+                for name, values in data.get('axes', {}).items()}
+        return cls(axes, data.get('command_overhead', cls.DEFAULT_COMMAND_OVERHEAD))
+
+    def save(self, path: str = DEFAULT_PATH):
+        with open(path, 'w') as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> 'MotionTimeModel':
+        """Calibrated model of this machine, firmware defaults when it was never calibrated."""
+        if not os.path.isfile(path):
+            return cls()
+        try:
+            with open(path) as fp:
+                return cls.from_dict(json.load(fp))
+        except (ValueError, KeyError) as e:
+            logging.warning(f"[MotionTimeModel] Could not read {path}: {e}, using firmware defaults")
+            return cls()
+
+    def summary(self) -> str:
+        lines = [f'Command overhead: {self.command_overhead * 1000:.1f}ms']
+        for name, axis in self.axes.items():
+            lines.append(f'  {name:<9} speed={axis.speed:9.1f} steps/s acceleration={axis.acceleration:10.1f} steps/s^2')
+        return '\n'.join(lines)
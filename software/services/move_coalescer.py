@@ -0,0 +1,159 @@
+from services.fresco_command import FrescoCommand
+import threading
+import logging
+
+
+class MoveCoalescer:
+    """
+    Optimizer pass between FrescoXYZ and the serial link.
+    Tracks what has actually been sent to the firmware (LED states, manifold position)
+    and, while a batch is open, rewrites the command stream into fewer round-trips:
+
+    - consecutive Delta commands are merged into one as long as the merged move keeps the
+      firmware's X, then Y, then Z order (a raise is never folded into a later XY traverse),
+      Delta 0 0 0 is dropped
+    - LED switches that do not change the LED state are dropped
+    - ManifoldZero / ManifoldDelta chains collapse into the single relative move
+      between the last known and the final manifold position
+
+    Outside of a batch every command is passed through unchanged.
+    The virtual state is not touched here, FrescoXYZ emulates every original command.
+    """
+    LED_COMMANDS = ('SwitchLedW', 'SwitchLedB')
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.batch_depth = 0
+        self.pending_delta = None
+        self.pending_manifold_zero = False
+        self.pending_manifold_target = None
+        self.led_states = {}
+        # Manifold position is only known after a ManifoldZero went to the firmware
+        self.manifold_position = None
+        self.commands_received = 0
+        self.commands_sent = 0
+
+    @property
+    def is_batching(self) -> bool:
+        return self.batch_depth > 0
+
+    def begin(self):
+        with self.lock:
+            if self.batch_depth == 0:
+                self.commands_received = 0
+                self.commands_sent = 0
+            self.batch_depth += 1
+
+    def end(self) -> bool:
+        """Close one batch level, returns True when the outermost batch was closed."""
+        with self.lock:
+            self.batch_depth = max(0, self.batch_depth - 1)
+            return self.batch_depth == 0
+
+    def push(self, command: FrescoCommand) -> [FrescoCommand]:
+        """
+        Feed one command, returns the commands that have to be sent now (in order).
+        The list may be empty when the command was absorbed by a pending move.
+        """
+        with self.lock:
+            self.commands_received += 1
+            if not self.is_batching:
+                return self._emit([command])
+            name = command.name
+            parameters = command.parameters
+
+            if name == 'Delta' and len(parameters) >= 3:
+                delta = [self._number(value) for value in parameters[:3]]
+                if self.pending_manifold_target is not None or self.pending_manifold_zero:
+                    to_send = self._flush_manifold()
+                else:
+                    to_send = []
+                if self.pending_delta is None:
+                    self.pending_delta = delta
+                elif self._keeps_axis_order(self.pending_delta, delta):
+                    self.pending_delta = [a + b for a, b in zip(self.pending_delta, delta)]
+                else:
+                    to_send += self._flush_delta()
+                    self.pending_delta = delta
+                return self._emit(to_send)
+
+            if name in ('ManifoldZero', 'ManifoldDelta'):
+                to_send = self._flush_delta()
+                if name == 'ManifoldZero':
+                    if self.manifold_position is None and self.pending_manifold_target is None:
+                        self.pending_manifold_zero = True
+                    self.pending_manifold_target = 0
+                elif len(parameters) >= 1:
+                    start = self.pending_manifold_target
+                    if start is None:
+                        start = self.manifold_position
+                    if start is None:
+                        # Position unknown, the relative move can not be folded into anything
+                        to_send += self._flush_manifold() + [command]
+                        return self._emit(to_send)
+                    self.pending_manifold_target = start + self._number(parameters[0])
+                return self._emit(to_send)
+
+            if name in self.LED_COMMANDS and len(parameters) >= 1:
+                if self.led_states.get(name) == (str(parameters[0]) == '1'):
+                    return []
+            return self._emit(self._flush_pending() + [command])
+
+    @staticmethod
+    def _keeps_axis_order(first: list, second: list) -> bool:
+        """
+        True when first followed by second takes the same path as their sum. The firmware moves X,
+        then Y, then Z, so this holds only if second moves no axis that comes before the last axis
+        first moves (Z up then X across must stay two moves, X then Z may become one).
+        """
+        first_axes = [index for index, value in enumerate(first) if value]
+        second_axes = [index for index, value in enumerate(second) if value]
+        return not first_axes or not second_axes or first_axes[-1] <= second_axes[0]
+
+    def flush(self) -> [FrescoCommand]:
+        with self.lock:
+            return self._emit(self._flush_pending())
+
+    def _flush_pending(self) -> [FrescoCommand]:
+        return self._flush_delta() + self._flush_manifold()
+
+    def _flush_delta(self) -> [FrescoCommand]:
+        delta, self.pending_delta = self.pending_delta, None
+        if delta is None or not any(delta):
+            return []
+        return [FrescoCommand('Delta', *delta)]
+
+    def _flush_manifold(self) -> [FrescoCommand]:
+        to_send = []
+        if self.pending_manifold_zero:
+            to_send.append(FrescoCommand('ManifoldZero'))
+            self.manifold_position = 0
+        target = self.pending_manifold_target
+        if target is not None and target != self.manifold_position:
+            to_send.append(FrescoCommand('ManifoldDelta', target - self.manifold_position))
+        self.pending_manifold_zero = False
+        self.pending_manifold_target = None
+        return to_send
+
+    def _emit(self, commands: [FrescoCommand]) -> [FrescoCommand]:
+        for command in commands:
+            self._track(command)
+        self.commands_sent += len(commands)
+        return commands
+
+    def _track(self, command: FrescoCommand):
+        name = command.name
+        parameters = command.parameters
+        if name == 'ManifoldZero':
+            self.manifold_position = 0
+        elif name == 'ManifoldDelta' and len(parameters) >= 1 and self.manifold_position is not None:
+            self.manifold_position += self._number(parameters[0])
+        elif name in self.LED_COMMANDS and len(parameters) >= 1:
+            self.led_states[name] = str(parameters[0]) == '1'
+
+    def _number(self, value):
+        number = float(value)
+        return int(number) if number.is_integer() else number
+
+    def log_statistics(self):
+        logging.info(f"[MoveCoalescer] {self.commands_received} commands -> {self.commands_sent} sent")
@@ -0,0 +1,178 @@
+from plates import STEPS_PER_MM
+from plate_geometry import PlateGeometry, get_plate_geometry
+from functools import lru_cache
+import numpy as np
+
+# Label strokes (x1, y1, x2, y2) in glyph units, characters without strokes are skipped
+GLYPH_STROKES = {
+    'A': [(-0.2, 0, 0, 0.4), (0, 0.4, 0.2, 0), (0.2, 0, 0, 0.4), (-0.1, 0.2, 0.1, 0.2)],
+    'B': [(0, 0, 0, 0.4), (0, 0.4, 0.15, 0.4), (0.15, 0.4, 0.15, 0.2), (0.15, 0.2, 0, 0.2),
+          (0, 0.2, 0.15, 0.2), (0.15, 0.2, 0.15, 0), (0.15, 0, 0, 0)],
+    'C': [(0.2, 0, 0, 0), (0, 0, 0, 0.4), (0, 0.4, 0.2, 0.4)],
+    'D': [(0, 0, 0, 0.4), (0, 0.4, 0.15, 0.3), (0.15, 0.3, 0.15, 0.1), (0.15, 0.1, 0, 0)],
+    'E': [(0.2, 0, 0, 0), (0, 0, 0, 0.4), (0, 0.4, 0.2, 0.4), (0, 0.2, 0.15, 0.2)],
+    'F': [(0, 0, 0, 0.4), (0, 0.4, 0.2, 0.4), (0, 0.2, 0.15, 0.2)],
+    'G': [(0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0), (0, 0, 0.2, 0), (0.2, 0, 0.2, 0.2), (0.2, 0.2, 0.1, 0.2)],
+    'H': [(0, 0, 0, 0.4), (0.2, 0, 0.2, 0.4), (0, 0.2, 0.2, 0.2)],
+    'I': [(0.05, 0, 0.05, 0.4), (0, 0, 0.1, 0), (0, 0.4, 0.1, 0.4)],
+    'J': [(0.15, 0.4, 0.15, 0.1), (0.15, 0.1, 0.1, 0), (0.1, 0, 0, 0), (0, 0, 0, 0.05)],
+    'K': [(0, 0, 0, 0.4), (0.2, 0.4, 0, 0.2), (0, 0.2, 0.2, 0)],
+    'L': [(0, 0.4, 0, 0), (0, 0, 0.2, 0)],
+    'M': [(0, 0, 0, 0.4), (0, 0.4, 0.1, 0.2), (0.1, 0.2, 0.2, 0.4), (0.2, 0.4, 0.2, 0)],
+    'N': [(0, 0, 0, 0.4), (0, 0.4, 0.2, 0), (0.2, 0, 0.2, 0.4)],
+    'O': [(0, 0, 0.2, 0), (0.2, 0, 0.2, 0.4), (0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0)],
+    'P': [(0, 0, 0, 0.4), (0, 0.4, 0.2, 0.4), (0.2, 0.4, 0.2, 0.2), (0.2, 0.2, 0, 0.2)],
+    '1': [(0.1, 0, 0.1, 0.4), (0.05, 0.35, 0.1, 0.4)],
+    '2': [(0, 0.4, 0.2, 0.4), (0.2, 0.4, 0.2, 0.2), (0.2, 0.2, 0, 0), (0, 0, 0.2, 0)],
+    '3': [(0, 0.4, 0.2, 0.4), (0.2, 0.4, 0.2, 0), (0.2, 0, 0, 0), (0, 0.2, 0.2, 0.2)],
+    '4': [(0, 0.4, 0, 0.2), (0, 0.2, 0.2, 0.2), (0.2, 0.4, 0.2, 0)],
+    '5': [(0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0.2), (0, 0.2, 0.2, 0.2), (0.2, 0.2, 0.2, 0), (0.2, 0, 0, 0)],
+    '6': [(0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0), (0, 0, 0.2, 0), (0.2, 0, 0.2, 0.2), (0.2, 0.2, 0, 0.2)],
+    '7': [(0, 0.4, 0.2, 0.4), (0.2, 0.4, 0.1, 0)],
+    '8': [(0, 0.2, 0.2, 0.2), (0, 0.2, 0, 0), (0, 0, 0.2, 0), (0.2, 0, 0.2, 0.2),
+          (0.2, 0.2, 0.2, 0.4), (0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0.2)],
+    '9': [(0.2, 0, 0, 0), (0, 0, 0, 0.2), (0, 0.2, 0.2, 0.2), (0.2, 0.2, 0.2, 0.4), (0.2, 0.4, 0, 0.4)],
+    '0': [(0, 0, 0.2, 0), (0.2, 0, 0.2, 0.4), (0.2, 0.4, 0, 0.4), (0, 0.4, 0, 0)],
+}
+# Same strokes as arrays of line endpoints, (strokes * 2, 2)
+_GLYPH_POINTS = {char: np.array(strokes, dtype=np.float64).reshape(-1, 2) for char, strokes in GLYPH_STROKES.items()}
+
+
+class PlateMesh:
+    """
+    Vertex arrays of the whole plate for FrescoRenderer, built once with numpy.
+    Same shapes the renderer used to draw well by well in immediate mode:
+
+    - cells: plate material around every well, top and bottom annulus (GL_QUADS)
+      plus the four sides of the cell square
+    - wells: well opening and well wall (GL_TRIANGLES)
+    - outlines: rim of every well (GL_LINES)
+    - labels: row letters and column numbers around the plate (GL_LINES)
+
+    Coordinates are in the renderer frame (mirrored, x = plate_width - absolute x)
+    and include the calibration offset. Vertices of one well are consecutive, so
+    per-well colors are a repeat of one color per well.
+    """
+    CORNER_SEGMENTS = 32
+    # Labels scale with the well spacing, relative to a 96-well plate
+    BASE_WELL_SPACING = 9.0
+    LABEL_SCALE = 10.0
+    LABEL_OFFSET = 8.0
+
+    def __init__(self, geometry: PlateGeometry, well_segments: int):
+        self.geometry = geometry
+        self.well_segments = well_segments
+        self.number_of_wells = geometry.rows * geometry.cols
+        cfg = geometry.config
+
+        centers = geometry.absolute_centers_mm.reshape(-1, 2)
+        cx = (geometry.width_mm - centers[:, 0])[:, None]
+        cy = (geometry.height_mm - centers[:, 1])[:, None]
+        radius = geometry.well_radius_mm
+        cell_half_size = geometry.well_spacing_mm / 2
+        z_plate_bottom = 0.0
+        z_plate_top = cfg['plate_thickness'] * 0.5
+        z_well_bottom = z_plate_top - geometry.well_depth_mm
+
+        # Cells: annulus between the well and the cell square, outer circle clipped to the square
+        angles = 2.0 * np.pi * np.arange(self.CORNER_SEGMENTS + 1) / self.CORNER_SEGMENTS
+        edge_r = cell_half_size * 1.5
+        outer_x = np.clip(cx + edge_r * np.cos(angles), cx - cell_half_size, cx + cell_half_size)
+        outer_y = np.clip(cy + edge_r * np.sin(angles), cy - cell_half_size, cy + cell_half_size)
+        inner_x = cx + radius * np.cos(angles)
+        inner_y = cy + radius * np.sin(angles)
+        # Quad i: inner i, inner i+1, outer i+1, outer i
+        quad_x = np.stack([inner_x[:, :-1], inner_x[:, 1:], outer_x[:, 1:], outer_x[:, :-1]], axis=2)
+        quad_y = np.stack([inner_y[:, :-1], inner_y[:, 1:], outer_y[:, 1:], outer_y[:, :-1]], axis=2)
+        annulus_top = self._vertices(quad_x, quad_y, z_plate_top)
+        annulus_bottom = self._vertices(quad_x, quad_y, z_plate_bottom)
+
+        x_min, x_max = cx - cell_half_size, cx + cell_half_size
+        y_min, y_max = cy - cell_half_size, cy + cell_half_size
+        # Sides: (x1, y1) -> (x2, y2) along the square, bottom to top
+        side_x1 = np.stack([x_min, x_max, x_max, x_min], axis=1)
+        side_y1 = np.stack([y_min, y_min, y_max, y_max], axis=1)
+        side_x2 = np.stack([x_max, x_max, x_min, x_min], axis=1)
+        side_y2 = np.stack([y_min, y_max, y_max, y_min], axis=1)
+        side_x = np.concatenate([side_x1, side_x2, side_x2, side_x1], axis=2)
+        side_y = np.concatenate([side_y1, side_y2, side_y2, side_y1], axis=2)
+        side_z = np.broadcast_to(np.array([z_plate_bottom, z_plate_bottom, z_plate_top, z_plate_top]), side_x.shape)
+        sides = np.stack([side_x, side_y, side_z], axis=-1).reshape(self.number_of_wells, -1, 3)
+        self.cell_vertices = self._pack([annulus_top, annulus_bottom, sides])
+
+        # Wells: opening as a triangle fan unrolled into triangles, wall as two triangles per segment
+        angles = 2.0 * np.pi * np.arange(well_segments + 1) / well_segments
+        rim_x = cx + radius * np.cos(angles)
+        rim_y = cy + radius * np.sin(angles)
+        center_x = np.broadcast_to(cx, rim_x[:, :-1].shape)
+        center_y = np.broadcast_to(cy, rim_y[:, :-1].shape)
+        opening = self._vertices(np.stack([center_x, rim_x[:, :-1], rim_x[:, 1:]], axis=2),
+                                 np.stack([center_y, rim_y[:, :-1], rim_y[:, 1:]], axis=2), z_plate_top)
+        # Rim i top, rim i bottom, rim i+1 bottom and rim i top, rim i+1 bottom, rim i+1 top
+        first, second = rim_x[:, :-1], rim_x[:, 1:]
+        wall_x = np.stack([first, first, second, first, second, second], axis=2)
+        first, second = rim_y[:, :-1], rim_y[:, 1:]
+        wall_y = np.stack([first, first, second, first, second, second], axis=2)
+        wall_z = np.broadcast_to(np.array([z_plate_top, z_well_bottom, z_well_bottom,
+                                           z_plate_top, z_well_bottom, z_plate_top]), wall_x.shape)
+        wall = np.stack([wall_x, wall_y, wall_z], axis=-1).reshape(self.number_of_wells, -1, 3)
+        self.well_vertices = self._pack([opening, wall])
+
+        # Outlines: one line per rim segment
+        self.outline_vertices = self._pack([self._vertices(
+            np.stack([rim_x[:, :-1], rim_x[:, 1:]], axis=2), np.stack([rim_y[:, :-1], rim_y[:, 1:]], axis=2),
+            z_plate_top)])
+
+        self.label_vertices = self._label_vertices(cfg['plate_thickness'] + 0.1)
+
+        self.cell_vertices_per_well = len(self.cell_vertices) // self.number_of_wells
+        self.well_vertices_per_well = len(self.well_vertices) // self.number_of_wells
+        self.outline_vertices_per_well = len(self.outline_vertices) // self.number_of_wells
+        for array in (self.cell_vertices, self.well_vertices, self.outline_vertices, self.label_vertices):
+            array.flags.writeable = False
+
+    def _label_vertices(self, z: float) -> np.ndarray:
+        """Strokes of every row and column label, placed next to the plate edges."""
+        geometry = self.geometry
+        scale_factor = geometry.well_spacing_mm / self.BASE_WELL_SPACING
+        scale = self.LABEL_SCALE * scale_factor
+        offset = self.LABEL_OFFSET * scale_factor
+        offset_x, offset_y = np.array(geometry.bottom_left) / STEPS_PER_MM
+        centers = geometry.absolute_centers_mm
+
+        labels = []
+        for row in range(geometry.rows):
+            # Row labels shift horizontally with the plate, vertically with the row
+            labels.append((geometry.config['row_labels'][row],
+                           geometry.width_mm - offset_x + offset, geometry.height_mm - centers[row, 0, 1]))
+        for col in range(geometry.cols):
+            # Column labels shift horizontally with the column, vertically with the plate
+            labels.append((str(col + 1), geometry.width_mm - centers[0, col, 0], geometry.height_mm - offset_y + offset))
+
+        points = []
+        for text, x, y in labels:
+            char_width = 0.35 if len(text) >= 2 else 0.5
+            for i, char in enumerate(text):
+                if char in _GLYPH_POINTS:
+                    points.append((_GLYPH_POINTS[char] + (i * char_width, 0.0)) * scale + (x, y))
+        points = np.concatenate(points) if points else np.zeros((0, 2))
+        vertices = np.column_stack([points, np.full(len(points), z)])
+        return np.ascontiguousarray(vertices, dtype=np.float32)
+
+    def _vertices(self, x: np.ndarray, y: np.ndarray, z: float) -> np.ndarray:
+        """(wells, primitives, corners) coordinates -> (wells, primitives * corners, 3)"""
+        return np.stack([x, y, np.full(x.shape, z)], axis=-1).reshape(self.number_of_wells, -1, 3)
+
+    def _pack(self, parts: [np.ndarray]) -> np.ndarray:
+        # Well-major, float32 as the GL buffers expect
+        return np.ascontiguousarray(np.concatenate(parts, axis=1).reshape(-1, 3), dtype=np.float32)
+
+
+@lru_cache(maxsize=8)
+def _cached_plate_mesh(plate_type: str, bottom_left: (int, int), well_segments: int) -> PlateMesh:
+    return PlateMesh(get_plate_geometry(plate_type, bottom_left), well_segments)
+
+
+def get_plate_mesh(plate_type: str, bottom_left=(0, 0), well_segments: int = 12) -> PlateMesh:
+    """Shared mesh for a plate type and calibration offset (steps)."""
+    return _cached_plate_mesh(plate_type, (int(bottom_left[0]), int(bottom_left[1])), well_segments)
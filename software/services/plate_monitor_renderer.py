@@ -0,0 +1,217 @@
+from services.plate_scene import PlateScene
+import numpy as np
+import threading
+import logging
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    # Labels and the status line need PIL, the plate map itself is pure numpy
+    Image = None
+
+
+class PlateMonitorRenderer(PlateScene):
+    """
+    Top-down 2D plate map drawn with numpy, for monitoring without pygame or OpenGL.
+    Shows every well (pump color for PUMP_COLOR_SECONDS after a dispense, blue for the
+    current well), the robot XY as a marker in the LED color and a status line.
+
+    Frames are drawn incrementally into one array: only wells whose color changed are
+    refilled, the marker restores the pixels it covered before it moves, and an unchanged
+    scene returns the previous frame. Same camera interface as FrescoRenderer and StdoutView,
+    get_current_image() may be called from any thread.
+    """
+    MARGIN = 40
+    STATUS_HEIGHT = 28
+    MARKER_RADIUS = 7
+    BACKGROUND = (242, 242, 242)
+    PLATE_COLOR = (0.7, 0.7, 0.7)
+    WELL_COLOR = (0.3, 0.3, 0.3)
+    CURRENT_WELL_COLOR = (0.5, 0.7, 1.0)
+
+    def __init__(self, fresco_xyz, plate_type='96-well', width=800, height=800):
+        super().__init__(fresco_xyz, plate_type)
+        self.width = width
+        self.height = height
+        self.lock = threading.Lock()
+
+        # mm -> pixels, mirrored in x like the 3D view, row A at the top
+        self.scale = min((width - 2 * self.MARGIN) / self.plate_width,
+                         (height - 2 * self.MARGIN - self.STATUS_HEIGHT) / self.plate_height)
+        self.origin_x = (width - self.plate_width * self.scale) / 2
+        self.origin_y = (height - self.STATUS_HEIGHT - self.plate_height * self.scale) / 2
+
+        self.frame = self._draw_background()
+        self._flat_frame = self.frame.reshape(-1, 3)
+        self._well_pixels = self._well_pixel_indices()
+        self._well_colors = np.full((len(self.wells), 3), -1, dtype=np.int16)  # nothing drawn yet
+        self._pump_colors = self._to_rgb(self.pump_colors)
+        self._marker_offsets = self._disk_offsets(self.MARKER_RADIUS)
+        self._marker_saved = None  # (flat pixel indices, pixels under the marker)
+        self._status_text = None
+        self._fingerprint = None
+        self.is_moving = False
+        self.frames_reused = 0
+
+        logging.info(f"Plate monitor initialized with {plate_type} plate")
+
+    @staticmethod
+    def _to_rgb(colors) -> np.ndarray:
+        return np.round(np.array(colors, dtype=np.float64) * 255).astype(np.int16)
+
+    def _to_pixel(self, x_mm, y_mm):
+        """Plate-relative mm -> (column, row) in the image."""
+        return self.origin_x + (self.plate_width - x_mm) * self.scale, self.origin_y + y_mm * self.scale
+
+    @staticmethod
+    def _disk_offsets(radius: float) -> np.ndarray:
+        extent = int(np.ceil(radius))
+        dy, dx = np.mgrid[-extent:extent + 1, -extent:extent + 1]
+        inside = dx * dx + dy * dy <= radius * radius
+        return np.stack([dy[inside], dx[inside]], axis=1)
+
+    def _flat_indices(self, center_col: float, center_row: float, offsets: np.ndarray) -> np.ndarray:
+        rows = int(round(center_row)) + offsets[:, 0]
+        cols = int(round(center_col)) + offsets[:, 1]
+        visible = (rows >= 0) & (rows < self.height - self.STATUS_HEIGHT) & (cols >= 0) & (cols < self.width)
+        return rows[visible] * self.width + cols[visible]
+
+    def _well_pixel_indices(self) -> np.ndarray:
+        """Flat frame indices of every well disk, (wells, pixels per well)."""
+        offsets = self._disk_offsets(max(self.geometry.well_radius_mm * self.scale, 1.0))
+        centers = self.geometry.centers_mm.reshape(-1, 2)
+        return np.stack([self._flat_indices(*self._to_pixel(x, y), offsets) for x, y in centers])
+
+    def _draw_background(self) -> np.ndarray:
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[:] = self.BACKGROUND
+        left, top = self._to_pixel(self.plate_width, 0)
+        right, bottom = self._to_pixel(0, self.plate_height)
+        frame[int(top):int(bottom), int(left):int(right)] = self._to_rgb(self.PLATE_COLOR)
+        if Image is None:
+            return frame
+
+        image = Image.fromarray(frame)
+        draw = ImageDraw.Draw(image)
+        font = ImageFont.load_default()
+        geometry = self.geometry
+        for row in range(geometry.rows):
+            x, y = self._to_pixel(0, geometry.centers_y_mm[row])
+            draw.text((x + 6, y - 6), self.plate_config['row_labels'][row], fill=(50, 50, 50), font=font)
+        for col in range(geometry.cols):
+            x, y = self._to_pixel(geometry.centers_x_mm[col], 0)
+            draw.text((x - 6, y - 16), str(col + 1), fill=(50, 50, 50), font=font)
+        return np.array(image)
+
+    def get_current_image(self):
+        with self.lock:
+            self._update_frame()
+            return self.frame.copy()
+
+    def _update_frame(self):
+        position = self._get_robot_position_physical()
+        self.current_well = self.get_well_at_position(position['x'], position['y'])
+        led_color = self._get_led_color()
+        current_time = self.fresco_xyz.clock.now() if self.fresco_xyz else 0.0
+        recent_pumps = self.pump_events.recent_pumps(current_time, self.PUMP_COLOR_SECONDS)
+
+        fingerprint = (position['x'], position['y'], position['z'], led_color,
+                       self.plate_offset_mm(), recent_pumps.tobytes(), self.pump_events_recorded)
+        self.is_moving = self._fingerprint is not None and fingerprint[:3] != self._fingerprint[:3]
+        if fingerprint == self._fingerprint:
+            self.frames_reused += 1
+            return
+        self._fingerprint = fingerprint
+
+        self._restore_marker()
+        self._update_wells(recent_pumps)
+        self._draw_marker(position, led_color)
+        self._draw_status(position)
+        # The flash lasts one frame, like in the 3D view
+        self.camera_flash = False
+
+    def _update_wells(self, recent_pumps: np.ndarray):
+        colors = np.empty_like(self._well_colors)
+        colors[:] = self._to_rgb(self.WELL_COLOR)
+        pumped = recent_pumps >= 0
+        colors[pumped] = self._pump_colors[recent_pumps[pumped] % len(self._pump_colors)]
+        if self.current_well is not None:
+            colors[self.well_index(self.current_well)] = self._to_rgb(self.CURRENT_WELL_COLOR)
+
+        changed = np.flatnonzero(np.any(colors != self._well_colors, axis=1))
+        if len(changed):
+            self._flat_frame[self._well_pixels[changed]] = colors[changed, None, :]
+            self._well_colors[changed] = colors[changed]
+
+    def _restore_marker(self):
+        if self._marker_saved is not None:
+            indices, pixels = self._marker_saved
+            self._flat_frame[indices] = pixels
+            self._marker_saved = None
+
+    def _draw_marker(self, position: dict, led_color):
+        # Robot position is absolute, the plate is drawn at its calibrated offset
+        offset_x, offset_y = self.plate_offset_mm()
+        col, row = self._to_pixel(position['x'] - offset_x, position['y'] - offset_y)
+        outline = self._flat_indices(col, row, self._marker_offsets)
+        if not len(outline):
+            return
+        inner = self._flat_indices(col, row, self._marker_offsets[
+            np.sum(self._marker_offsets ** 2, axis=1) <= (self.MARKER_RADIUS - 2) ** 2])
+        self._marker_saved = (outline, self._flat_frame[outline].copy())
+        self._flat_frame[outline] = (20, 20, 20)
+        self._flat_frame[inner] = self._to_rgb(led_color)
+
+    def _draw_status(self, position: dict):
+        well = self.current_well.label if self.current_well is not None else '-'
+        text = (f"X {position['x']:7.2f}  Y {position['y']:7.2f}  Z {position['z']:6.2f} mm   Well {well}"
+                f"{'   COLLISION' if self.collision_state else ''}")
+        if text == self._status_text:
+            return
+        self._status_text = text
+        status = self.frame[self.height - self.STATUS_HEIGHT:]
+        status[:] = (40, 40, 40)
+        if Image is not None:
+            image = Image.fromarray(status)
+            ImageDraw.Draw(image).text((10, 8), text, fill=(230, 230, 230), font=ImageFont.load_default())
+            status[:] = np.asarray(image)
+
+    def should_update_frequently(self):
+        return self.is_moving or self.camera_flash
+
+    # The map has a fixed top-down view, the view controls of the 3D renderer do nothing
+    def zoom_in(self):
+        pass
+
+    def zoom_out(self):
+        pass
+
+    def rotate_left(self):
+        pass
+
+    def rotate_right(self):
+        pass
+
+    def rotate_up(self):
+        pass
+
+    def rotate_down(self):
+        pass
+
+    def center_on_robot(self):
+        pass
+
+    def reset_view(self):
+        pass
+
+    def pan_left(self):
+        pass
+
+    def pan_right(self):
+        pass
+
+    def pan_up(self):
+        pass
+
+    def pan_down(self):
+        pass
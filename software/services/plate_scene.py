@@ -0,0 +1,172 @@
+from plates import get_plate_config, STEPS_PER_MM
+from plate_geometry import get_plate_geometry
+from services.trajectory_store import TrajectoryStore
+from services.pump_event_store import PumpEventStore
+import logging
+
+
+class Well:
+    def __init__(self, row, col, center_x, center_y, radius, depth, label):
+        self.row = row
+        self.col = col
+        self.label = label
+        self.center_x = center_x
+        self.center_y = center_y
+        self.radius = radius
+        self.depth = depth
+        self.capture_size = radius * 1.5
+
+    def contains_point(self, x, y):
+        return (abs(x - self.center_x) <= self.capture_size and
+                abs(y - self.center_y) <= self.capture_size)
+
+
+class PlateScene:
+    """
+    What the plate views show, independent of how they draw it: wells, the robot path,
+    pump events and the LED / collision state. FrescoXYZ feeds it through record_position,
+    record_pump_event(s), clear_position_history and collision_state.
+
+    Subclasses render it with get_current_image() and should_update_frequently(),
+    the camera interface the UI expects.
+    """
+    PUMP_COLORS = [
+        (1.0, 0.3, 0.3), (0.3, 1.0, 0.3), (0.3, 0.3, 1.0), (1.0, 1.0, 0.3),
+        (1.0, 0.3, 1.0), (0.3, 1.0, 1.0), (1.0, 0.6, 0.3), (0.6, 0.3, 1.0),
+    ]
+    # A pump event colors its well for this long
+    PUMP_COLOR_SECONDS = 10.0
+
+    def __init__(self, fresco_xyz, plate_type='96-well'):
+        self.fresco_xyz = fresco_xyz
+        self.plate_type = plate_type
+        self.plate_config = get_plate_config(plate_type)
+        self.geometry = get_plate_geometry(plate_type)
+        # Plate dimensions include corner offset plus well spacing
+        # Add extra margin on opposite side equal to corner offset
+        self.plate_width = self.geometry.width_mm
+        self.plate_height = self.geometry.height_mm
+
+        self.wells = self._create_wells()
+        # Pump events of every well with per-well summaries, wells are indexed row * cols + col
+        self.pump_events = PumpEventStore(len(self.wells))
+        self.current_well = None
+        # Robot path in absolute mm, export with trajectory.export(path)
+        self.trajectory = TrajectoryStore()
+        self.pump_events_recorded = 0
+        self.last_pump_event_time = None
+        self.collision_state = False
+        self.camera_flash = False  # Camera flash effect (yellow for 1 frame)
+        self.pump_colors = list(self.PUMP_COLORS)
+
+    def _create_wells(self):
+        geometry = self.geometry
+        wells = []
+        # Row-major, so wells[row * cols + col] is the well at (row, col)
+        for row in range(geometry.rows):
+            for col in range(geometry.cols):
+                # Wells positioned relative to plate corner (0,0)
+                x, y = geometry.centers_mm[row, col]
+                well = Well(row, col, float(x), float(y), geometry.well_radius_mm, geometry.well_depth_mm,
+                            geometry.labels[row][col])
+                wells.append(well)
+
+        return wells
+
+    def well_by_index(self, row, col):
+        return self.wells[row * self.geometry.cols + col]
+
+    def well_index(self, well):
+        return well.row * self.geometry.cols + well.col
+
+    def well_by_label(self, label):
+        index = self.geometry.label_to_index(label)
+        return self.well_by_index(*index) if index else None
+
+    def plate_offset_mm(self):
+        """Calibrated bottom_left of the plate in mm."""
+        if self.fresco_xyz and hasattr(self.fresco_xyz, 'plate'):
+            return (self.fresco_xyz.plate['bottom_left'][0] / STEPS_PER_MM,
+                    self.fresco_xyz.plate['bottom_left'][1] / STEPS_PER_MM)
+        return 0.0, 0.0
+
+    def clear_position_history(self):
+        self.trajectory.clear()
+        logging.info("Position history cleared due to plate calibration change")
+
+    def record_position(self, x_mm, y_mm, z_mm):
+        # Robot position is recorded in absolute coordinates (not transformed by plate offset)
+        # The plate wells will be drawn at positions adjusted by the offset
+        timestamp = self.fresco_xyz.clock.now() if self.fresco_xyz else 0.0
+        self.trajectory.append(timestamp, x_mm, y_mm, z_mm)
+
+    def get_well_at_position(self, x_mm, y_mm):
+        # Convert robot absolute position to plate-relative position
+        # Wells are in plate-relative coordinates (0 to plate_width)
+        plate_offset_x, plate_offset_y = self.plate_offset_mm()
+        index = self.geometry.well_at(x_mm - plate_offset_x, y_mm - plate_offset_y)
+        return self.well_by_index(*index) if index else None
+
+    def record_pump_event(self, pump_index, volume):
+        if self.current_well:
+            self.pump_events.append(self.fresco_xyz.clock.now(), self.well_index(self.current_well), pump_index, volume)
+            self._pump_events_changed()
+            logging.info(f"Pump event recorded: Well {self.current_well.label}, Pump {pump_index}, Volume {volume}")
+
+    def record_pump_events(self, volumes: dict):
+        """Pump events of one batched dispense (pump index -> volume), all with the same timestamp."""
+        if self.current_well:
+            timestamp = self.fresco_xyz.clock.now()
+            well_index = self.well_index(self.current_well)
+            for pump_index, volume in volumes.items():
+                self.pump_events.append(timestamp, well_index, pump_index, volume)
+            self._pump_events_changed()
+            logging.info(f"Pump events recorded: Well {self.current_well.label}, Volumes {volumes}")
+
+    def _pump_events_changed(self):
+        self.pump_events_recorded += 1
+        self.last_pump_event_time = self.fresco_xyz.clock.now()
+
+    def _get_robot_position_physical(self):
+        if self.fresco_xyz and hasattr(self.fresco_xyz, 'virtual_position'):
+            pos = self.fresco_xyz.virtual_position.copy()
+            return {
+                'x': pos['x'] / STEPS_PER_MM,
+                'y': pos['y'] / STEPS_PER_MM,
+                'z': -pos['z'] / STEPS_PER_MM
+            }
+        return {'x': 0.0, 'y': 0.0, 'z': 0.0}
+
+    def _get_led_color(self):
+        if not self.fresco_xyz:
+            return (0.5, 0.5, 0.5)
+
+        # Camera flash (yellow) - overrides everything
+        if self.camera_flash:
+            return (1.0, 1.0, 0.0)
+
+        if self.collision_state:
+            return (1.0, 0.0, 0.0)
+
+        if hasattr(self.fresco_xyz, 'is_capturing') and self.fresco_xyz.is_capturing:
+            return (1.0, 1.0, 0.0)
+
+        # LED logic: white, blue, or both (blueish-white)
+        white_on = hasattr(self.fresco_xyz, 'white_led_on') and self.fresco_xyz.white_led_on
+        blue_on = hasattr(self.fresco_xyz, 'blue_led_on') and self.fresco_xyz.blue_led_on
+
+        if white_on and blue_on:
+            # Both white and blue: blueish-white
+            return (0.7, 0.8, 1.0)
+        elif blue_on:
+            return (0.2, 0.4, 1.0)
+        elif white_on:
+            return (1.0, 1.0, 0.8)
+        else:
+            return (0.3, 0.3, 0.3)
+
+    def set_exposure(self, millis: int):
+        pass
+
+    def set_auto_exposure(self, auto: bool):
+        pass
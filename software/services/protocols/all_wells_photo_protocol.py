@@ -2,6 +2,7 @@ from services.protocols.base_protocol import BaseProtocol
 from services.fresco_xyz import FrescoXYZ
 from services.z_camera import ZCamera
 from services.images_storage import ImagesStorage
+from services.fluidics_scheduler import FluidicsScheduler
 
 
 class AllWellsPhotoProtocol(BaseProtocol):
@@ -18,6 +19,11 @@ class AllWellsPhotoProtocol(BaseProtocol):
         self.pump_index = 1  # todo: fix, temp solution, number of used  pump should be taken from protocol
         self.manifold_offset = 5050  # todo: setup actual number
         self.solution_portion_in_steps = 50  # todo: make customizable
+        # The manifold position changes the illumination (see the white LED offset in CollectDataFocusStacks).
+        # By default it is raised right after each dispense, so the before and after images are taken
+        # under the same conditions. True keeps it lowered through the after image and the travel
+        # to the next well, fewer manifold strokes but the after images are lit differently.
+        self.keep_manifold_lowered = False
 
     def perform(self):
         super(AllWellsPhotoProtocol, self).perform()
@@ -25,22 +31,24 @@ class AllWellsPhotoProtocol(BaseProtocol):
         self.fresco_xyz.go_to_zero_manifold()
         session_folder_path = self.images_storage.create_new_session_folder()
         print('Folder ' + session_folder_path)
-        for column_number in range(0, self.plate_size_96[1] - 1):
-            for row_number in range(0, self.plate_size_96[0] - 1):
+        # Wells relative to the starting well, the stage moves towards -x along a row and -y to the next row
+        origin = dict(self.fresco_xyz.virtual_position)
+        wells = [(row, col) for row in range(0, self.plate_rows - 1) for col in range(0, self.plate_cols - 1)]
+        # With keep_manifold_lowered the manifold stays lowered between wells while its tip clears the plate,
+        # it is retracted at the end either way
+        with FluidicsScheduler(self.fresco_xyz) as fluidics:
+            for row, col in self.plan_visit_order(wells, start_well=(0, 0)):
+                self.delta_to(origin['x'] - col * self.well_spacing_steps, origin['y'] - row * self.well_spacing_steps)
                 self.z_camera.focus_on_current_object()
                 self.hold_position(1)
                 image_before_solution = self.z_camera.fresco_camera.get_current_image()
                 self.images_storage.save(image_before_solution,
-                                         session_folder_path + '/' + 'PI_b_' + str(row_number) + '_' + str(column_number) + '.png')
-                self.fresco_xyz.go_to_zero_manifold()
-                self.fresco_xyz.manifold_delta(self.manifold_offset)
-                self.fresco_xyz.delta_pump(self.pump_index, self.solution_portion_in_steps)
-                self.fresco_xyz.go_to_zero_manifold()
+                                         session_folder_path + '/' + 'PI_b_' + str(col) + '_' + str(row) + '.png')
+                fluidics.dispense(self.pump_index, self.solution_portion_in_steps, self.manifold_offset)
+                if not self.keep_manifold_lowered:
+                    fluidics.retract()
                 self.z_camera.focus_on_current_object()
                 self.hold_position(1)
                 image_after_solution = self.z_camera.fresco_camera.get_current_image()
                 self.images_storage.save(image_after_solution,
-                                         session_folder_path + '/' + 'PI_a_' + str(row_number) + '_' + str(column_number) + '.png')
-                self.fresco_xyz.delta(-1 * self.well_spacing_steps, 0, 0)
-            self.fresco_xyz.delta(self.well_spacing_steps * (self.plate_size_96[0] - 1), 0, 0)
-            self.fresco_xyz.delta(0, -1 * self.well_spacing_steps, 0)
+                                         session_folder_path + '/' + 'PI_a_' + str(col) + '_' + str(row) + '.png')
@@ -1,6 +1,8 @@
 from services.fresco_xyz import FrescoXYZ
 from services.z_camera import ZCamera
 from services.images_storage import ImagesStorage
+from services.visit_order_planner import VisitOrderPlanner
+from plate_geometry import get_plate_geometry
 import time
 
 
@@ -15,21 +17,13 @@ class BaseProtocol:
         self.images_storage = images_storage
         self.protocol_controller = None
 
-        if fresco_xyz.renderer:
-            cfg = fresco_xyz.renderer.plate_config
-            self.plate_rows = cfg['rows']
-            self.plate_cols = cfg['cols']
-            self.well_spacing_mm = cfg['well_spacing']
-            self.well_spacing_steps = int(self.well_spacing_mm * 200)
-            self.corner_offset_x_steps = int(cfg['corner_offset_x'] * 200)
-            self.corner_offset_y_steps = int(cfg['corner_offset_y'] * 200)
-        else:
-            self.plate_rows = 8
-            self.plate_cols = 12
-            self.well_spacing_mm = 9.0
-            self.well_spacing_steps = 1800
-            self.corner_offset_x_steps = int(14.38 * 200)  # 96-well default
-            self.corner_offset_y_steps = int(11.24 * 200)
+        self.plate_geometry = get_plate_geometry(fresco_xyz.plate_type)
+        self.plate_rows = self.plate_geometry.rows
+        self.plate_cols = self.plate_geometry.cols
+        self.well_spacing_mm = self.plate_geometry.well_spacing_mm
+        self.well_spacing_steps = self.plate_geometry.well_spacing_steps
+        self.corner_offset_x_steps = self.plate_geometry.corner_offset_x_steps
+        self.corner_offset_y_steps = self.plate_geometry.corner_offset_y_steps
         
         self.plate_size_96 = (self.plate_cols, self.plate_rows)
         self.time_scale = 1.0  # Default: real-time (1.0x speed)
@@ -41,6 +35,7 @@ class BaseProtocol:
         """
         Sleep for specified seconds, scaled by time_scale.
         Use this instead of time.sleep() for protocol timing.
+        With a simulated clock (--simulate) virtual time advances instantly and is not scaled.
 
         Args:
             seconds: Duration to sleep in seconds (will be scaled)
@@ -54,9 +49,7 @@ class BaseProtocol:
         except:
             time_scale = self.time_scale
 
-        actual_seconds = seconds * time_scale
-        if actual_seconds > 0:
-            time.sleep(actual_seconds)
+        self.fresco_xyz.clock.sleep(seconds, time_scale)
         self.check_pause_stop()
 
     def hold_position(self, seconds):
@@ -82,8 +75,7 @@ class BaseProtocol:
         Returns:
             tuple: (x_steps, y_steps, z_steps) for use with set_position()
         """
-        x_steps = self.corner_offset_x_steps + col * self.well_spacing_steps
-        y_steps = self.corner_offset_y_steps + row * self.well_spacing_steps
+        x_steps, y_steps = self.plate_geometry.well_position_steps(row, col)
 
         if z is None:
             z_steps = self.fresco_xyz.virtual_position['z']
@@ -105,6 +97,37 @@ class BaseProtocol:
         x, y, z = self.get_well_position(row, col, z)
         self.fresco_xyz.set_position(x, y, z)
 
+    def plan_visit_order(self, wells: [(int, int)], start_well: (int, int) = None, strategy: str = 'two_opt'):
+        """
+        Helper: Order wells for the shortest stage travel time (see VisitOrderPlanner).
+
+        Args:
+            wells: (row, col) of every well to visit, 0-based
+            start_well: (row, col) of the well the stage is at, current position if None
+            strategy: 'serpentine', 'nearest_neighbour' or 'two_opt'
+
+        Returns:
+            list: the same wells in visiting order
+        """
+        positions = [self.get_well_position(row, col, 0)[:2] for row, col in wells]
+        if start_well is not None:
+            start = self.get_well_position(start_well[0], start_well[1], 0)[:2]
+        else:
+            bottom_left = self.fresco_xyz.plate['bottom_left']
+            start = (self.fresco_xyz.virtual_position['x'] - bottom_left[0],
+                     self.fresco_xyz.virtual_position['y'] - bottom_left[1])
+        planner = VisitOrderPlanner(self.fresco_xyz.motion_model)
+        return planner.plan(wells, positions, start, strategy)
+
+    def delta_to(self, x: float, y: float):
+        """
+        Helper: Relative move to an absolute XY position (steps), keeping z.
+        For protocols that work relative to where the stage was started.
+        """
+        position = self.fresco_xyz.virtual_position
+        if x != position['x'] or y != position['y']:
+            self.fresco_xyz.delta(x - position['x'], y - position['y'], 0)
+
     def parse_well_label(self, well_label: str):
         """
         Parse well label (e.g., "A1", "B12") into row and column indices.
@@ -56,14 +56,16 @@ class CollectDataSegmentation(BaseProtocol):
         self.fresco_xyz.white_led_switch(True)
         self.fresco_xyz.go_to_zero_manifold()
         session_folder_path = self.images_storage.create_new_session_folder()
-        # not all wells (- 2) because of incorrectly designed plate holder
-        for column_number in range(0, self.plate_size_96[1] - 2):
-            for row_number in range(0, self.plate_size_96[0] - 2):
-                one_well_folder = session_folder_path + '/' + str(column_number) + '_' + str(row_number)
-                self.images_storage.create_folder(one_well_folder)
-                self.perform_for_one_well(one_well_folder)
-            self.fresco_xyz.delta(self.well_spacing_steps * (self.plate_size_96[0] - 1), 0, 0)
-            self.fresco_xyz.delta(0, -1 * self.well_spacing_steps, 0)
+        # Wells relative to the starting well, the stage moves towards -x along a row and -y to the next row.
+        # Not all wells (- 2) because of incorrectly designed plate holder
+        origin = dict(self.fresco_xyz.virtual_position)
+        wells = [(row, col) for row in range(0, self.plate_rows - 2) for col in range(0, self.plate_cols - 2)]
+        for row, col in self.plan_visit_order(wells, start_well=(0, 0)):
+            # Absolute target, so the drift left by the previous well's spiral is undone on the way
+            self.delta_to(origin['x'] - col * self.well_spacing_steps, origin['y'] - row * self.well_spacing_steps)
+            one_well_folder = session_folder_path + '/' + str(row) + '_' + str(col)
+            self.images_storage.create_folder(one_well_folder)
+            self.perform_for_one_well(one_well_folder)
 
     def perform_for_one_well(self, well_folder_path):
         offsets, coordinates = self.generate_quadratic_spiral_offsets()
@@ -78,9 +80,10 @@ class CollectDataSegmentation(BaseProtocol):
             self.images_storage.save(image, well_folder_path + '/' + self.image_prefix + str(image_index) + '.png')
             self.hold_position(0.3)
             # White LED offset randomization
-            self.fresco_xyz.go_to_zero_manifold()
             manifold_position = random.randint(3000, 5000)
-            self.fresco_xyz.manifold_delta(manifold_position)
+            with self.fresco_xyz.batch():
+                self.fresco_xyz.go_to_zero_manifold()
+                self.fresco_xyz.manifold_delta(manifold_position)
             image_index += 1
 
     def save_coordinates(self, folder, coordinates):
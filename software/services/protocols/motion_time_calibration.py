@@ -0,0 +1,74 @@
+from services.protocols.base_protocol import BaseProtocol
+from services.fresco_xyz import FrescoXYZ
+from services.z_camera import ZCamera
+from services.images_storage import ImagesStorage
+from services.motion_time_model import MotionTimeModel
+from services.fresco_command import FrescoCommand
+import logging
+
+
+class MotionTimeCalibration(BaseProtocol):
+    """
+    Fits the motion-time model of this machine from measured command latencies.
+    Every axis is moved out and back by increasing distances from the current position,
+    so start with the stage above the middle of the plate and the manifold raised.
+    The fit starts from the model in use, so axes without usable samples keep their calibration.
+    The result is saved to motion_time_model.json and used by FrescoXYZ right away, only on the
+    real machine: virtual and simulated runs (also preflight dry runs) measure the emulator,
+    and a fit with an axis that could not be determined is not saved either.
+    """
+
+    def __init__(self,
+                 fresco_xyz: FrescoXYZ,
+                 z_camera: ZCamera,
+                 images_storage: ImagesStorage):
+        super(MotionTimeCalibration, self).__init__(fresco_xyz=fresco_xyz,
+                                                    z_camera=z_camera,
+                                                    images_storage=images_storage)
+        self.xy_distances = [50, 200, 900, self.well_spacing_steps, 3 * self.well_spacing_steps]
+        self.z_distances = [20, 100, 400, 1000]
+        self.manifold_distances = [50, 200, 800, 2000]
+        self.number_of_repeats = 3
+        self.samples = []
+
+    def perform(self):
+        super(MotionTimeCalibration, self).perform()
+        self.fresco_xyz.go_to_zero_manifold()
+        for _ in range(0, self.number_of_repeats):
+            # Commands without motion measure the fixed overhead. white_led_switch() does not wait
+            # for the reply, the round-trip has to be timed through execute_command
+            self.measure({}, lambda: self.fresco_xyz.execute_command(FrescoCommand('SwitchLedW', 1)))
+            self.measure({}, lambda: self.fresco_xyz.execute_command(FrescoCommand('SwitchLedW', 0)))
+            for distance in self.xy_distances:
+                self.measure_out_and_back('x', distance, lambda d: self.fresco_xyz.delta(d, 0, 0))
+                self.measure_out_and_back('y', distance, lambda d: self.fresco_xyz.delta(0, d, 0))
+            for distance in self.z_distances:
+                # Negative z is up, away from the plate
+                self.measure_out_and_back('z', -distance, lambda d: self.fresco_xyz.delta(0, 0, d))
+            for distance in self.manifold_distances:
+                self.measure_out_and_back('manifold', distance, lambda d: self.fresco_xyz.manifold_delta(d))
+            self.check_pause_stop()
+        self.fresco_xyz.go_to_zero_manifold()
+
+        # Fit a copy, the model in use stays untouched unless the result is saved
+        model = MotionTimeModel.from_dict(self.fresco_xyz.motion_model.to_dict()).fit(self.samples)
+        logging.info(f'[MotionTimeCalibration] Fitted from {len(self.samples)} commands:\n{model.summary()}')
+        if self.fresco_xyz.virtual_only or self.fresco_xyz.clock.is_simulated:
+            logging.info('[MotionTimeCalibration] Virtual run, the fit is not saved')
+            return
+        if model.unfitted_axes:
+            logging.error(f'[MotionTimeCalibration] Could not fit {", ".join(sorted(model.unfitted_axes))}, '
+                          f'the fit is not saved')
+            return
+        model.save()
+        self.fresco_xyz.motion_model = model
+
+    def measure_out_and_back(self, motor: str, distance: int, move):
+        self.measure({motor: distance}, lambda: move(distance))
+        self.measure({motor: -distance}, lambda: move(-distance))
+
+    def measure(self, distances: dict, command):
+        clock = self.fresco_xyz.clock
+        time_begin = clock.now()
+        command()
+        self.samples.append((distances, clock.now() - time_begin))
@@ -90,11 +90,8 @@ class SpiralMovementProtocol(BaseProtocol):
             
             print(f"Moving to spiral position {position_index}: ({target_x}, {target_y}), radius: {radius:.0f}")
             
-            # Move to safe Z height before XY movement
-            self.fresco_xyz.go_to_zero_z()
-            
-            # Move to target position
-            self.fresco_xyz.set_position(target_x, target_y, 0)
+            # Move to target position, raising Z only if the manifold would touch the plate
+            self.fresco_xyz.travel_to(target_x, target_y, 0)
             self.hold_position(0.5)
             
             # Capture image at this position
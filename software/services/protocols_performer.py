@@ -1,11 +1,16 @@
 from services.fresco_xyz import FrescoXYZ
 from services.z_camera import ZCamera
-from services.images_storage import ImagesStorage
+from services.images_storage import ImagesStorage, DryRunImagesStorage
+from services.fresco_camera import DummyCamera
+from services.fresco_clock import SimulatedClock
+from services.collision_preflight import CollisionPreflight, CommandRecorder, CollisionPreflightError, PreflightReport
 from os import listdir
 from os.path import isfile, join
 from services.fresco_calss_loader import FrescoClassLoader
 from services.protocols.base_protocol import BaseProtocol
+from services.fresco_clock import format_duration
 import logging
+import random
 
 
 class ProtocolsPerformer:
@@ -26,17 +31,77 @@ class ProtocolsPerformer:
                 if isfile(join(self.protocols_folder_path, f)) and f.endswith('.py') and f != '__init__.py']
         return sorted(files)
 
-    def perform_protocol(self, path: str, time_scale: float = 1.0):
+    def preflight_protocol(self, path: str, seed: int = None) -> PreflightReport:
+        """
+        Run a protocol on a virtual copy of the machine with a simulated clock and
+        sweep the recorded command stream for collisions. Nothing is sent to the
+        hardware and no images are stored. A stop request on the real machine
+        stops the dry run too (InterruptedError or should_stop()).
+
+        Protocols drawing from `random` only get the same moves in the dry run and the
+        real run if both start from the same seed, see perform_protocol. Other sources of
+        variation (numpy random, decisions on camera images) are not covered.
+
+        Args:
+            path: Path to protocol file
+            seed: Seed for `random` before the dry run, None leaves it alone
+
+        Returns:
+            PreflightReport: unsafe moves in command order
+        """
+        logging.info(f'Preflight of protocol: {path}')
+        dry_run_xyz = FrescoXYZ(virtual_only=True, plate_type=self.fresco_xyz.plate_type, clock=SimulatedClock())
+        dry_run_xyz.plate['bottom_left'] = self.fresco_xyz.plate['bottom_left']
+        dry_run_xyz.plate['top_right'] = self.fresco_xyz.plate['top_right']
+        dry_run_xyz.virtual_position = dict(self.fresco_xyz.virtual_position)
+        dry_run_xyz.virtual_manifold_position = self.fresco_xyz.virtual_manifold_position
+        dry_run_xyz.motion_model = self.fresco_xyz.motion_model
+        dry_run_xyz.command_recorder = CommandRecorder()
+        dry_run_xyz.stop_source = self.fresco_xyz
+        dry_run_storage = DryRunImagesStorage()
+        try:
+            protocol_class = self.class_loader.import_class(path)
+            protocol = protocol_class(dry_run_xyz, ZCamera(dry_run_xyz, DummyCamera()), dry_run_storage)
+            if seed is not None:
+                random.seed(seed)
+            protocol.perform()
+        finally:
+            dry_run_storage.cleanup()
+        preflight = CollisionPreflight(dry_run_xyz.plate_geometry, dry_run_xyz.plate['bottom_left'])
+        report = preflight.check_recorder(dry_run_xyz.command_recorder)
+        logging.info(report.summary())
+        return report
+
+    def perform_protocol(self, path: str, time_scale: float = 1.0, preflight: bool = False):
         """Load and execute a protocol from file.
 
         Args:
             path: Path to protocol file
             time_scale: Time scale multiplier (0.1=10x faster, 1.0=real-time, 2.0=2x slower)
-        """
-        logging.info(f'Loading protocol from: {path}')
+            preflight: Dry-run the protocol first and refuse to start on an unsafe move
 
-        # Reset stop flag before starting
+        Raises:
+            CollisionPreflightError: preflight found an unsafe move
+        """
+        # Reset stop flag before starting, a stop during the preflight cancels the run
         self.fresco_xyz.reset_stop_flag()
+        seed = None
+        if preflight:
+            seed = random.randrange(2 ** 32)
+            try:
+                report = self.preflight_protocol(path, seed)
+            except InterruptedError:
+                logging.info('Preflight stopped by user request')
+                return
+            if self.fresco_xyz.should_stop():
+                logging.info('Preflight stopped by user request')
+                return
+            if not report.is_safe:
+                raise CollisionPreflightError(report)
+
+        logging.info(f'Loading protocol from: {path}')
+        clock = self.fresco_xyz.clock
+        time_begin = clock.now()
 
         try:
             protocol_class = self.class_loader.import_class(path)
@@ -44,12 +109,20 @@ class ProtocolsPerformer:
             self.current_protocol.time_scale = time_scale
 
             logging.info(f'Executing protocol: {protocol_class.__name__} (time_scale={time_scale}x)')
+            if seed is not None:
+                # Same draws from random as the preflight that checked this run
+                random.seed(seed)
             self.current_protocol.perform()
             
             if self.fresco_xyz.should_stop():
                 logging.info('Protocol stopped by user request')
             else:
                 logging.info('Protocol completed successfully')
+            duration = format_duration(clock.now() - time_begin)
+            if clock.is_simulated:
+                logging.info(f'Protocol duration: {duration} (virtual time)')
+            else:
+                logging.info(f'Protocol duration: {duration}')
                 
         except Exception as e:
             logging.error(f'Protocol execution failed: {e}')
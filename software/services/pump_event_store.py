@@ -0,0 +1,187 @@
+import numpy as np
+import threading
+import tempfile
+import logging
+import weakref
+import shutil
+import os
+
+EVENT_DTYPE = np.dtype([('time', 'f8'), ('well', 'i4'), ('pump', 'i2'), ('volume', 'f8')])
+
+
+class PumpEventStore:
+    """
+    Append-only pump event log of one plate, in columnar chunks (EVENT_DTYPE structured arrays).
+    Alongside the log it keeps O(1) summaries per well, updated on every append:
+
+    - cumulative[well, pump]: dispensed volume
+    - event_count[well], last_time[well], last_pump[well]
+    - last_event_index[well]: sequence number of the latest event, -1 without events
+
+    Full chunks beyond `chunks_in_memory` are spilled to .npy files in `spill_directory`
+    (a temporary directory by default) and memory-mapped when read again, so a
+    multi-day run keeps a bounded amount of events in memory. A temporary directory
+    is removed by close(), or when the store is garbage collected or the interpreter exits.
+    """
+    CHUNK_SIZE = 65536
+    CHUNKS_IN_MEMORY = 8
+    GAP_SECONDS = 5.0
+
+    def __init__(self, number_of_wells: int, number_of_pumps: int = 8, spill_directory: str = None,
+                 chunk_size: int = CHUNK_SIZE, chunks_in_memory: int = CHUNKS_IN_MEMORY):
+        self.number_of_wells = number_of_wells
+        self.chunk_size = chunk_size
+        self.chunks_in_memory = chunks_in_memory
+        self.spill_directory = spill_directory
+        self._remove_spill_directory = None  # weakref.finalize of a temporary spill directory
+        self.lock = threading.Lock()
+
+        # Full chunks, an array or the path of its spilled .npy file
+        self.chunks = []
+        self.current = np.zeros(chunk_size, dtype=EVENT_DTYPE)
+        self.count = 0  # events ever appended, also the sequence number of the next one
+        self.version = 0
+
+        self.cumulative = np.zeros((number_of_wells, number_of_pumps), dtype=np.float64)
+        self.event_count = np.zeros(number_of_wells, dtype=np.int64)
+        self.last_time = np.full(number_of_wells, np.nan)
+        self.last_pump = np.full(number_of_wells, -1, dtype=np.int64)
+        self.last_event_index = np.full(number_of_wells, -1, dtype=np.int64)
+
+    @property
+    def number_of_pumps(self) -> int:
+        return self.cumulative.shape[1]
+
+    def append(self, timestamp: float, well: int, pump: int, volume: float):
+        with self.lock:
+            if pump >= self.number_of_pumps:
+                self.cumulative = np.pad(self.cumulative, ((0, 0), (0, pump + 1 - self.number_of_pumps)))
+            self.current[self.count % self.chunk_size] = (timestamp, well, pump, volume)
+            self.cumulative[well, pump] += volume
+            self.event_count[well] += 1
+            self.last_time[well] = timestamp
+            self.last_pump[well] = pump
+            self.last_event_index[well] = self.count
+            self.count += 1
+            self.version += 1
+            if self.count % self.chunk_size == 0:
+                self._seal_current_chunk()
+
+    def _seal_current_chunk(self):
+        self.chunks.append(self.current)
+        self.current = np.zeros(self.chunk_size, dtype=EVENT_DTYPE)
+        in_memory = [index for index, chunk in enumerate(self.chunks) if isinstance(chunk, np.ndarray)]
+        for index in in_memory[:max(0, len(in_memory) - self.chunks_in_memory)]:
+            self.chunks[index] = self._spill(index, self.chunks[index])
+
+    def _spill(self, index: int, chunk: np.ndarray) -> str:
+        if self.spill_directory is None:
+            self.spill_directory = tempfile.mkdtemp(prefix='fresco_pump_events_')
+            self._remove_spill_directory = weakref.finalize(self, shutil.rmtree, self.spill_directory, ignore_errors=True)
+        os.makedirs(self.spill_directory, exist_ok=True)
+        path = os.path.join(self.spill_directory, f'chunk_{index:06d}.npy')
+        np.save(path, chunk)
+        logging.info(f"[PumpEventStore] Spilled {len(chunk)} events to {path}")
+        return path
+
+    def _chunk(self, index: int) -> np.ndarray:
+        """Events of chunk index, the current one is cut at the last appended event."""
+        if index == len(self.chunks):
+            return self.current[:self.count % self.chunk_size]
+        chunk = self.chunks[index]
+        return chunk if isinstance(chunk, np.ndarray) else np.load(chunk, mmap_mode='r')
+
+    def events(self, well: int = None, since: int = 0) -> (np.ndarray, np.ndarray):
+        """
+        Events with a sequence number >= since, optionally of one well.
+        Only chunks from `since` on are read.
+
+        Returns:
+            (sequence numbers, events as EVENT_DTYPE)
+        """
+        with self.lock:
+            if well is not None and self.last_event_index[well] < since:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=EVENT_DTYPE)
+            sequences, events = [], []
+            for index in range(since // self.chunk_size, len(self.chunks) + 1):
+                chunk = self._chunk(index)
+                first = index * self.chunk_size
+                selected = np.arange(len(chunk)) + first >= since
+                if well is not None:
+                    selected &= chunk['well'] == well
+                positions = np.flatnonzero(selected)
+                sequences.append(first + positions)
+                events.append(np.array(chunk[positions]))
+            return np.concatenate(sequences), np.concatenate(events)
+
+    def recent_pumps(self, now: float, window: float) -> np.ndarray:
+        """Pump of the latest event per well if it happened within window seconds, -1 otherwise."""
+        with self.lock:
+            recent = now - self.last_time < window  # NaN (no events) compares False
+            return np.where(recent, self.last_pump, -1)
+
+    def close(self):
+        """Remove the spilled chunks if the store created their directory."""
+        if self._remove_spill_directory is not None:
+            self._remove_spill_directory()
+            self._remove_spill_directory = None
+            self.spill_directory = None
+
+
+class PumpTrace:
+    """
+    Cumulative volume traces of one well, extended with the events appended since the last update().
+    pump_data has the PumpTraceView layout: pump -> {'x': [...], 'y': [...], 'interruptions': [...]}.
+
+    synchronized: every event of the well is one step on the x axis of all pumps,
+    otherwise every pump counts only its own events. An interruption marks an event
+    more than PumpEventStore.GAP_SECONDS after the previous event of the same pump.
+    """
+
+    def __init__(self, store: PumpEventStore, well: int, synchronized: bool):
+        self.store = store
+        self.well = well
+        self.synchronized = synchronized
+        self.next_sequence = 0
+        self.event_count = 0
+        self.cumulative = np.zeros(store.number_of_pumps)
+        self.last_time = [None] * store.number_of_pumps
+        # Range of all traces, for a shared y axis
+        self.min_y = 0.0
+        self.max_y = 0.0
+        self.pump_data = {}
+        self._ensure_pumps(store.number_of_pumps)
+
+    def _ensure_pumps(self, number_of_pumps: int):
+        for pump in range(len(self.pump_data), number_of_pumps):
+            self.pump_data[pump] = {'x': [], 'y': [], 'interruptions': []}
+        if number_of_pumps > len(self.cumulative):
+            self.cumulative = np.pad(self.cumulative, (0, number_of_pumps - len(self.cumulative)))
+            self.last_time += [None] * (number_of_pumps - len(self.last_time))
+
+    def update(self) -> bool:
+        """Add the new events of the well, True if there were any."""
+        if self.store.last_event_index[self.well] < self.next_sequence:
+            return False
+        sequences, events = self.store.events(self.well, self.next_sequence)
+        if not len(events):
+            return False
+        self._ensure_pumps(self.store.number_of_pumps)
+        for timestamp, pump, volume in zip(events['time'].tolist(), events['pump'].tolist(), events['volume'].tolist()):
+            data = self.pump_data[pump]
+            if self.last_time[pump] is not None and timestamp - self.last_time[pump] > PumpEventStore.GAP_SECONDS:
+                data['interruptions'].append(self.event_count if self.synchronized else len(data['x']))
+            self.cumulative[pump] += volume
+            self.last_time[pump] = timestamp
+            self.min_y = min(self.min_y, self.cumulative[pump])
+            self.max_y = max(self.max_y, self.cumulative[pump])
+            if self.synchronized:
+                for other, other_data in self.pump_data.items():
+                    other_data['x'].append(self.event_count)
+                    other_data['y'].append(self.cumulative[other])
+            else:
+                data['x'].append(len(data['x']))
+                data['y'].append(self.cumulative[pump])
+            self.event_count += 1
+        self.next_sequence = int(sequences[-1]) + 1
+        return True
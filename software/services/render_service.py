@@ -0,0 +1,154 @@
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import numpy as np
+import asyncio
+import logging
+import queue
+import threading
+
+
+class RenderService:
+    """
+    Render thread that owns the OpenGL context of a FrescoRenderer.
+    The renderer is created on the thread, so GL calls never leave it. Other threads
+    ask it for frames instead of getting a stale cached image:
+
+    - request_frame(timeout) blocks until a frame of the current scene is rendered
+      (request_frame_async for asyncio code)
+    - latest_frame() returns the last completed live view frame without waiting,
+      the thread renders one every PREVIEW_INTERVAL seconds (cheap while nothing changes)
+
+    FrescoRenderer.get_current_image / get_preview_image called from any other thread
+    are routed here, so ZCamera, protocols and the Tk view need no changes.
+
+        render_service = RenderService(lambda: FrescoRenderer(image_processor, fresco_xyz, plate_type))
+        fresco_renderer = render_service.start()
+    """
+    PREVIEW_INTERVAL = 0.1
+    DEFAULT_TIMEOUT = 2.0
+    START_TIMEOUT = 10.0
+
+    def __init__(self, create_renderer):
+        self.create_renderer = create_renderer
+        self.renderer = None
+        self.requests = queue.Queue()
+        self.thread = None
+        self.started = threading.Event()
+        self.start_error = None
+        self.latest_lock = threading.Lock()
+        self.latest = None
+        self.frames_rendered = 0
+        self.requests_served = 0
+
+    def start(self):
+        """Start the render thread and return its renderer, created on the caller when the thread can not own a context."""
+        self.thread = threading.Thread(target=self._run, name='RenderService', daemon=True)
+        self.thread.start()
+        if not self.started.wait(self.START_TIMEOUT) or self.start_error is not None:
+            # e.g. macOS, where windows and GL contexts belong to the main thread
+            logging.warning(f"[RenderService] Render thread not available ({self.start_error}), rendering on the UI thread")
+            self.thread = None
+            self.renderer = self.create_renderer()
+        return self.renderer
+
+    def stop(self):
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join(timeout=self.START_TIMEOUT)
+            self.thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def is_render_thread(self) -> bool:
+        return self.thread is not None and threading.current_thread() is self.thread
+
+    def request_frame(self, timeout: float = DEFAULT_TIMEOUT) -> np.ndarray:
+        """
+        Frame rendered after this call, blocks the calling thread.
+        Returns the latest live view frame when the render thread does not answer in time.
+        """
+        if not self.is_running:
+            return self.latest_frame()
+        try:
+            return self._submit().result(timeout)
+        except FutureTimeoutError:
+            logging.warning(f"[RenderService] No frame within {timeout}s, using the latest one")
+            return self.latest_frame()
+
+    async def request_frame_async(self, timeout: float = DEFAULT_TIMEOUT) -> np.ndarray:
+        """request_frame for coroutines, the event loop keeps running while the frame is rendered."""
+        if not self.is_running:
+            return self.latest_frame()
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self._submit()), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"[RenderService] No frame within {timeout}s, using the latest one")
+            return self.latest_frame()
+
+    def latest_frame(self) -> np.ndarray:
+        """Copy of the last completed frame, black before the first one."""
+        with self.latest_lock:
+            if self.latest is None:
+                renderer = self.renderer
+                height, width = (renderer.height, renderer.width) if renderer is not None else (800, 800)
+                return np.zeros((height, width, 3), dtype=np.uint8)
+            return self.latest.copy()
+
+    def _submit(self) -> Future:
+        future = Future()
+        self.requests.put(future)
+        return future
+
+    def _run(self):
+        try:
+            self.renderer = self.create_renderer()
+            self.renderer.render_service = self
+        except Exception as e:
+            self.start_error = e
+            self.started.set()
+            return
+        self.started.set()
+        logging.info("[RenderService] Render thread started")
+
+        while True:
+            try:
+                request = self.requests.get(timeout=self.PREVIEW_INTERVAL)
+            except queue.Empty:
+                self._publish(self.renderer.get_preview_image())
+                continue
+            if request is None:
+                break
+            # Every request waiting by now is answered with the same frame
+            futures = [request]
+            while True:
+                try:
+                    request = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._answer(futures)
+                    return
+                futures.append(request)
+            self._answer(futures)
+
+    def _answer(self, futures: [Future]):
+        try:
+            frame = self.renderer.get_current_image()
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        self._publish(frame)
+        for future in futures:
+            if future.set_running_or_notify_cancel():
+                # Callers keep their frame, the renderer reuses its array
+                future.set_result(frame.copy())
+        self.requests_served += len(futures)
+
+    def _publish(self, frame: np.ndarray):
+        with self.latest_lock:
+            if self.latest is None or self.latest.shape != frame.shape:
+                self.latest = np.empty_like(frame)
+            np.copyto(self.latest, frame)
+        self.frames_rendered += 1
@@ -1,4 +1,5 @@
 from services.serial_connection import SerialConnection
+from services.async_serial_connection import AsyncSerialConnection
 
 
 class SerialConnectionFactory:
@@ -6,3 +7,6 @@ class SerialConnectionFactory:
     def create_connection(self, port: str, frequency: int) -> SerialConnection:
         return SerialConnection(port, frequency)
 
+    def create_async_connection(self, port: str, frequency: int) -> AsyncSerialConnection:
+        return AsyncSerialConnection(port, frequency)
+
@@ -1,48 +1,243 @@
 from serial import Serial
+from services.serial_telemetry import SerialTelemetry
 from datetime import datetime
+from concurrent.futures import Future
+from collections import deque
+import threading
+import queue
+import logging
 
 
 class SerialConnection:
+    # Every line the firmware answers with starts with one of these tokens (see Responder.cpp).
+    # Anything else on the line (e.g. "Parsed Delta pump") is debug output from the firmware.
+    RESPONSE_TOKENS = ('Done', 'EdgeCoordinates', 'UnknownCommand')
+    # Arduino Mega has a 64 byte RX buffer and does not read while a motor is moving,
+    # so only a couple of commands may be queued on the device at any time.
+    DEFAULT_MAX_IN_FLIGHT = 2
+    # Longest wait for a reply in pipelined stop-and-wait calls, a full plate move or a long dispense fits
+    COMMAND_TIMEOUT = 120
 
     def __init__(self, port: str, frequency: int):
         self.port = port
         self.frequency = frequency
         self.serial = Serial(port, frequency)
         self.reset_all_buffers()
+        self.telemetry = SerialTelemetry()
+
+        self.pipelined = False
+        self._sequence = 0
+        self._sequence_lock = threading.Lock()
+        self._outbound = None
+        self._in_flight = deque()
+        self._in_flight_lock = threading.Lock()
+        self._window = None
+        # Set when the reader thread failed, the pipeline then rejects every command until stop_pipeline()
+        self._failure = None
+        self._writer_thread = None
+        self._reader_thread = None
 
     def send_message_line(self, message: str):
         self.send_message(message + '\n')
 
     def read_message_line(self) -> str:
-        return self.serial.readline()
+        line = self.serial.readline()
+        self.telemetry.record_received(len(line))
+        return line
 
     def send_message(self, message: str):
         byte_message = bytearray(message, 'utf8')
         self.serial.write(byte_message)
+        self.telemetry.record_sent(len(byte_message))
 
     def read_message(self) -> str:
-        response = self.serial.read_all().decode('utf-8')
-        return response
+        raw_response = self.serial.read_all()
+        self.telemetry.record_received(len(raw_response))
+        return raw_response.decode('utf-8')
 
     def refresh_connection(self):
         self.serial = Serial(self.port, self.frequency)
 
     def execute_command_sync(self, message: str) -> str:
+        if self.pipelined:
+            return self.execute_command_async(message).result(timeout=self.COMMAND_TIMEOUT)
         time_begin = datetime.now()
         print('Start executing command: ' + message)
-        response = self.serial.read_all().decode('utf-8')
+        response = self.read_message()
         print('All response: ' + response)
         self.send_message_line(message)
         response_line = self.read_message_line()
-        while response_line is None or response_line == '':
+        while response_line is None or response_line == '' or response_line == b'':
             print('nil response received: next try')
+            self.telemetry.record_empty_read()
             response_line = self.read_message_line()
         print('Response line: ' + response_line.decode('utf-8'))
         time_executed = datetime.now()
         print('Command executed: ' + str(time_executed - time_begin))
+        self.telemetry.record_command(message, (time_executed - time_begin).total_seconds(), response_line.decode('utf-8'))
         self.reset_all_buffers()
         return response_line.decode('utf-8')
 
+    def start_pipeline(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        """
+        Switch the connection to pipelined mode.
+        Commands are queued with a sequence number, a writer thread keeps up to
+        max_in_flight of them on the device and a reader thread matches the replies
+        back in order (the firmware answers strictly in the order it receives commands).
+
+        Args:
+            max_in_flight: Maximum number of commands sent but not yet answered
+        """
+        if self.pipelined:
+            return
+        self.reset_all_buffers()
+        # Reader thread must wake up periodically to notice stop_pipeline()
+        self.serial.timeout = 0.1
+        self._outbound = queue.Queue()
+        self._window = threading.Semaphore(max_in_flight)
+        self._failure = None
+        self.pipelined = True
+        self._writer_thread = threading.Thread(target=self._writer_loop, name='SerialWriter', daemon=True)
+        self._reader_thread = threading.Thread(target=self._reader_loop, name='SerialReader', daemon=True)
+        self._writer_thread.start()
+        self._reader_thread.start()
+        logging.info(f"[SerialConnection] Pipeline started on {self.port} (max in flight: {max_in_flight})")
+
+    def stop_pipeline(self):
+        """Wait for queued commands to finish and return to stop-and-wait mode."""
+        if not self.pipelined:
+            return
+        self._outbound.put(None)
+        self._writer_thread.join()
+        with self._sequence_lock:
+            self.pipelined = False
+        self._reader_thread.join()
+        self.serial.timeout = None
+        error = ConnectionError('Serial pipeline stopped')
+        self._fail_in_flight(error)
+        # Commands queued behind the stop were never written
+        self._fail_outbound(error)
+        self._failure = None
+        logging.info(f"[SerialConnection] Pipeline stopped on {self.port}")
+
+    def execute_command_async(self, message: str) -> Future:
+        """
+        Queue a command and return a future resolved with the firmware reply line.
+        Falls back to a synchronous round-trip when the pipeline is not running.
+        """
+        future = Future()
+        with self._sequence_lock:
+            self._sequence += 1
+            future.sequence = self._sequence
+            if self.pipelined:
+                if self._failure is not None:
+                    future.set_exception(ConnectionError(f'Serial pipeline failed: {self._failure}'))
+                else:
+                    self._outbound.put((future.sequence, message, future))
+                return future
+        future.set_result(self.execute_command_sync(message))
+        return future
+
+    def _writer_loop(self):
+        while True:
+            item = self._outbound.get()
+            if item is None:
+                # Let every command already on the device be answered before stopping
+                with self._in_flight_lock:
+                    pending = [entry[2] for entry in self._in_flight]
+                for future in pending:
+                    try:
+                        future.result(timeout=60)
+                    except Exception:
+                        pass
+                return
+            sequence, message, future = item
+            self._window.acquire()
+            with self._in_flight_lock:
+                failure = self._failure
+                if failure is None:
+                    self._in_flight.append((sequence, message, future, datetime.now()))
+            if failure is not None:
+                self._window.release()
+                future.set_exception(ConnectionError(f'Serial pipeline failed: {failure}'))
+                continue
+            logging.debug(f"[SerialConnection] -> #{sequence} {message}")
+            try:
+                self.send_message_line(message)
+            except Exception as e:
+                with self._in_flight_lock:
+                    self._in_flight.pop()
+                self._window.release()
+                future.set_exception(e)
+
+    def _reader_loop(self):
+        while self.pipelined:
+            try:
+                raw_line = self.read_message_line()
+            except Exception as e:
+                logging.error(f"[SerialConnection] Read failed: {e}")
+                self._pipeline_failed(e)
+                return
+            if not raw_line:
+                # Idle timeouts are expected, only count retries while waiting for a reply
+                if self._in_flight:
+                    self.telemetry.record_empty_read()
+                continue
+            line = raw_line.decode('utf-8', errors='replace').strip()
+            response = self._extract_response(line)
+            if response is None:
+                logging.debug(f"[SerialConnection] Firmware output: {line}")
+                continue
+            with self._in_flight_lock:
+                entry = self._in_flight.popleft() if self._in_flight else None
+            if entry is None:
+                logging.warning(f"[SerialConnection] Unexpected response without command in flight: {response}")
+                continue
+            sequence, message, future, time_begin = entry
+            self._window.release()
+            elapsed = datetime.now() - time_begin
+            self.telemetry.record_command(message, elapsed.total_seconds(), response)
+            logging.debug(f"[SerialConnection] <- #{sequence} {response} ({elapsed})")
+            future.set_result(response)
+
+    def _extract_response(self, line: str):
+        positions = [line.find(token) for token in self.RESPONSE_TOKENS if token in line]
+        if not positions:
+            return None
+        return line[min(positions):]
+
+    def _pipeline_failed(self, error: Exception):
+        """Reader is gone: no reply will come, fail every queued command and free the writer."""
+        with self._in_flight_lock:
+            self._failure = error
+        self._fail_in_flight(error)
+        self._fail_outbound(error)
+
+    def _fail_in_flight(self, error: Exception):
+        with self._in_flight_lock:
+            entries = list(self._in_flight)
+            self._in_flight.clear()
+        for entry in entries:
+            # The slot is not taken by a command on the device any more
+            self._window.release()
+            if not entry[2].done():
+                entry[2].set_exception(error)
+
+    def _fail_outbound(self, error: Exception):
+        """Fail the commands still waiting for the writer, a stop sentinel stays in the queue."""
+        stop_requested = False
+        while True:
+            try:
+                item = self._outbound.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop_requested = True
+            elif not item[2].done():
+                item[2].set_exception(error)
+        if stop_requested:
+            self._outbound.put(None)
+
     def reset_all_buffers(self):
         self.serial.flushInput()
         self.serial.flushOutput()
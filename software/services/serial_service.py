@@ -1,4 +1,5 @@
 from services.serial_connection import SerialConnection
+from services.async_serial_connection import AsyncSerialConnection
 from services.serail_connection_factory import SerialConnectionFactory
 import serial.tools.list_ports
 
@@ -8,6 +9,7 @@ class SerialService:
     def __init__(self):
         self.factory = SerialConnectionFactory()
         self.current_connection: SerialConnection = None
+        self.current_async_connection: AsyncSerialConnection = None
         self.observers = []
 
     def all_available_ports(self) -> [str]:
@@ -18,11 +20,18 @@ class SerialService:
             port_names.append(port)
         return port_names
 
-    def create_connection(self, port) -> SerialConnection:
+    def create_connection(self, port, pipelined: bool = False) -> SerialConnection:
         self.current_connection = self.factory.create_connection(port, 250000)
+        if pipelined:
+            self.current_connection.start_pipeline()
         print('setup current connection')
         return self.current_connection
 
+    def create_async_connection(self, port) -> AsyncSerialConnection:
+        self.current_async_connection = self.factory.create_async_connection(port, 250000)
+        print('setup current async connection')
+        return self.current_async_connection
+
     def subscribe_on_connection_update(self, observer):
         if observer not in self.observers:
             self.observers.append(observer)
@@ -0,0 +1,154 @@
+from datetime import datetime
+import numpy as np
+import threading
+import json
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram in the spirit of HdrHistogram.
+    Values are recorded in microseconds; every power of two above SUB_BUCKET_COUNT
+    is split into SUB_BUCKET_COUNT / 2 linear buckets, which bounds the relative
+    error of a reported percentile to about 1.6% regardless of magnitude.
+    """
+    SUB_BUCKET_BITS = 7
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    HALF_SUB_BUCKET_COUNT = SUB_BUCKET_COUNT // 2
+
+    def __init__(self, max_value_us: int = 600 * 1000 * 1000):
+        self.max_value_us = max_value_us
+        self.counts = np.zeros(self._index_for(max_value_us) + 1, dtype=np.int64)
+        self.total_count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _index_for(self, value_us: int) -> int:
+        if value_us < self.SUB_BUCKET_COUNT:
+            return value_us
+        shift = value_us.bit_length() - self.SUB_BUCKET_BITS
+        top = value_us >> shift
+        return self.SUB_BUCKET_COUNT + (shift - 1) * self.HALF_SUB_BUCKET_COUNT + (top - self.HALF_SUB_BUCKET_COUNT)
+
+    def _highest_value_for(self, index: int) -> int:
+        if index < self.SUB_BUCKET_COUNT:
+            return index
+        shift = (index - self.SUB_BUCKET_COUNT) // self.HALF_SUB_BUCKET_COUNT + 1
+        top = (index - self.SUB_BUCKET_COUNT) % self.HALF_SUB_BUCKET_COUNT + self.HALF_SUB_BUCKET_COUNT
+        return ((top + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        value_us = min(max(int(seconds * 1000000), 0), self.max_value_us)
+        self.counts[self._index_for(value_us)] += 1
+        self.total_count += 1
+        self.total_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = max(self.max_us, value_us)
+
+    def percentile(self, percent: float) -> float:
+        """Latency in milliseconds below which percent of the recorded values fall."""
+        if self.total_count == 0:
+            return 0.0
+        rank = max(1, int(np.ceil(percent / 100.0 * self.total_count)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self._highest_value_for(index), self.max_us) / 1000.0
+
+    def summary(self) -> dict:
+        return {
+            'count': self.total_count,
+            'mean_ms': self.total_us / self.total_count / 1000.0 if self.total_count else 0.0,
+            'min_ms': (self.min_us or 0) / 1000.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_us / 1000.0,
+        }
+
+
+class SerialTelemetry:
+    """
+    Health counters of one serial link: round-trip latency per command type,
+    bytes in / out, empty readline retries and UnknownCommand replies.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = datetime.now()
+            self.histograms = {}
+            self.bytes_sent = 0
+            self.bytes_received = 0
+            self.empty_reads = 0
+            self.unknown_responses = 0
+
+    def record_command(self, message: str, seconds: float, response: str = ''):
+        command_type = message.split(' ', 1)[0] if message else ''
+        with self.lock:
+            if command_type not in self.histograms:
+                self.histograms[command_type] = LatencyHistogram()
+            self.histograms[command_type].record(seconds)
+            if response and 'UnknownCommand' in response:
+                self.unknown_responses += 1
+
+    def record_sent(self, number_of_bytes: int):
+        with self.lock:
+            self.bytes_sent += number_of_bytes
+
+    def record_received(self, number_of_bytes: int):
+        with self.lock:
+            self.bytes_received += number_of_bytes
+
+    def record_empty_read(self):
+        with self.lock:
+            self.empty_reads += 1
+
+    def percentiles(self, command_type: str = None) -> dict:
+        """
+        Latency summary (count, mean, min, p50, p95, p99, max in milliseconds).
+
+        Args:
+            command_type: e.g. 'Delta' or 'DeltaPump', all commands merged when None
+        """
+        with self.lock:
+            if command_type is not None:
+                histogram = self.histograms.get(command_type)
+                return histogram.summary() if histogram else LatencyHistogram().summary()
+            merged = LatencyHistogram()
+            for histogram in self.histograms.values():
+                merged.counts += histogram.counts
+                merged.total_count += histogram.total_count
+                merged.total_us += histogram.total_us
+                merged.max_us = max(merged.max_us, histogram.max_us)
+                if histogram.min_us is not None:
+                    merged.min_us = histogram.min_us if merged.min_us is None else min(merged.min_us, histogram.min_us)
+            return merged.summary()
+
+    def snapshot(self) -> dict:
+        command_types = list(self.histograms.keys())
+        commands = {command_type: self.percentiles(command_type) for command_type in command_types}
+        with self.lock:
+            return {
+                'started': self.started.isoformat(),
+                'snapshot_time': datetime.now().isoformat(),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'empty_reads': self.empty_reads,
+                'unknown_responses': self.unknown_responses,
+                'commands': commands,
+            }
+
+    def export_json(self, path: str):
+        with open(path, 'w') as fp:
+            json.dump(self.snapshot(), fp, indent=2)
+
+    def summary(self) -> str:
+        snapshot = self.snapshot()
+        lines = ['Serial telemetry: {} bytes out, {} bytes in, {} empty reads, {} unknown responses'.format(
+            snapshot['bytes_sent'], snapshot['bytes_received'], snapshot['empty_reads'], snapshot['unknown_responses'])]
+        for command_type, stats in sorted(snapshot['commands'].items()):
+            lines.append('  {:<34} n={:<6} p50={:8.2f}ms p95={:8.2f}ms p99={:8.2f}ms max={:8.2f}ms'.format(
+                command_type, stats['count'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms'], stats['max_ms']))
+        return '\n'.join(lines)
@@ -0,0 +1,200 @@
+from services.fresco_camera import BaseCamera
+from plates import STEPS_PER_MM
+from plate_geometry import get_plate_geometry
+from collections import OrderedDict
+import numpy as np
+import zlib
+
+
+class SyntheticCamera(BaseCamera):
+    """
+    Simulated microscope camera for virtual mode, to develop autofocus and acquisition offline.
+
+    Every well and site (field of view sized tile of the well) gets a procedural field of
+    cell-like blobs, seeded from the plate, well and site so it is the same on every visit.
+    Each well has its own focal plane (plate level FOCAL_DEPTH, a tilt across the plate
+    and some jitter), and the frame is blurred with a Gaussian whose width grows with the
+    distance between the stage z and that plane. Shot noise, read noise and the exposure
+    time are applied last, frames are 8-bit grayscale like FrescoCamera.
+
+    Blurring is done in the frequency domain: the FFT of a field is cached with the field,
+    the Gaussian transfer functions are cached per blur width (rounded to BLUR_RESOLUTION px),
+    so a frame costs one multiply, one inverse FFT and the noise.
+    """
+    WIDTH = 512
+    HEIGHT = 512
+    PIXEL_SIZE_UM = 1.0
+    CELLS_PER_FIELD = 60
+
+    # Steps below the z zero (FrescoXYZ.SAFE_DEFAULT_Z in virtual mode), within the
+    # range ZCamera searches from its auto_focus_anchor
+    FOCAL_DEPTH = -9750
+    FOCAL_TILT_STEPS = (0.8, 0.5)  # per column, per row
+    FOCAL_JITTER_STEPS = 8.0
+    IN_FOCUS_BLUR = 0.6  # px
+    BLUR_PER_STEP = 0.03  # px of blur per step away from the focal plane
+    BLUR_RESOLUTION = 0.05  # px
+    TEXTURE_GRAIN = 1.5  # px, size of the granules inside cells
+
+    BACKGROUND = 0.08  # relative to the brightest cell
+    PHOTONS_PER_MS = 100.0  # electrons per ms at relative intensity 1
+    READ_NOISE = 4.0  # electrons
+    GAIN = 4.0  # electrons per DN
+    AUTO_EXPOSURE_TARGET = 180  # DN of the brightest in-focus pixels
+
+    MAX_CACHED_FIELDS = 32
+    MAX_CACHED_KERNELS = 512
+
+    def __init__(self, fresco_xyz, plate_type='96-well', seed: int = 0,
+                 width: int = WIDTH, height: int = HEIGHT):
+        self.fresco_xyz = fresco_xyz
+        self.plate_type = plate_type
+        self.geometry = get_plate_geometry(plate_type)
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.exposure_ms = 10.0
+        self.auto_exposure = False
+        self.autocorrect_contrast = False
+        self.noise = np.random.default_rng(seed)
+
+        rows, cols = self.geometry.rows, self.geometry.cols
+        tilt_x, tilt_y = self.FOCAL_TILT_STEPS
+        jitter = np.random.default_rng([seed, zlib.crc32(plate_type.encode())]).normal(
+            0.0, self.FOCAL_JITTER_STEPS, (rows, cols))
+        self.focal_planes = (fresco_xyz.SAFE_DEFAULT_Z + self.FOCAL_DEPTH + tilt_x * (np.arange(cols)[None, :] - cols / 2)
+                             + tilt_y * (np.arange(rows)[:, None] - rows / 2) + jitter)
+
+        self._fields = OrderedDict()  # (row, col, site_x, site_y) -> (field, field FFT)
+        self._empty = None
+        self._kernels = OrderedDict()  # blur bin -> transfer function on the rfft2 grid
+        frequency_y = np.fft.fftfreq(height)[:, None]
+        frequency_x = np.fft.rfftfreq(width)[None, :]
+        self._frequency_squared = frequency_x ** 2 + frequency_y ** 2
+        self.frames = 0
+
+    def get_current_image(self):
+        row_col, site, z = self._stage_location()
+        if row_col is None:
+            field, spectrum = self._empty_field()
+            blur = self.IN_FOCUS_BLUR
+        else:
+            field, spectrum = self._field(*row_col, *site)
+            blur = self.blur_for(z - self.focal_planes[row_col])
+        image = np.fft.irfft2(spectrum * self._kernel(blur), s=(self.height, self.width))
+        if self.auto_exposure:
+            self.exposure_ms = self._auto_exposure_ms(field)
+        self.frames += 1
+        return self._expose(image)
+
+    def focal_plane(self, row: int, col: int) -> float:
+        """Stage z (steps) at which the well is in focus."""
+        return float(self.focal_planes[row, col])
+
+    def blur_for(self, defocus_steps: float) -> float:
+        """Gaussian blur sigma in px at a distance from the focal plane."""
+        return float(np.hypot(self.IN_FOCUS_BLUR, self.BLUR_PER_STEP * defocus_steps))
+
+    def _stage_location(self):
+        """((row, col) or None, site (x, y) within the well, stage z in steps)"""
+        # Where the emulated stage is now, part way through a move while it runs
+        position = self.fresco_xyz.virtual_position_at(self.fresco_xyz.clock.now())
+        bottom_left = self.fresco_xyz.plate['bottom_left']
+        x_mm = (position['x'] - bottom_left[0]) / STEPS_PER_MM
+        y_mm = (position['y'] - bottom_left[1]) / STEPS_PER_MM
+        row_col = self.geometry.well_at(x_mm, y_mm)
+        if row_col is None:
+            return None, None, position['z']
+        center_x, center_y = self.geometry.centers_mm[row_col]
+        field_mm = self.width * self.PIXEL_SIZE_UM / 1000.0
+        site = (int(np.floor((x_mm - center_x) / field_mm + 0.5)), int(np.floor((y_mm - center_y) / field_mm + 0.5)))
+        return tuple(int(index) for index in row_col), site, position['z']
+
+    def _field(self, row: int, col: int, site_x: int, site_y: int):
+        key = (row, col, site_x, site_y)
+        if key in self._fields:
+            self._fields.move_to_end(key)
+            return self._fields[key]
+        rng = np.random.default_rng([self.seed, zlib.crc32(self.plate_type.encode()), row, col, site_x + 1000, site_y + 1000])
+        field = self._draw_cells(rng)
+        entry = (field, np.fft.rfft2(field))
+        self._fields[key] = entry
+        if len(self._fields) > self.MAX_CACHED_FIELDS:
+            self._fields.popitem(last=False)
+        return entry
+
+    def _empty_field(self):
+        """Plate material between wells, background only."""
+        if self._empty is None:
+            field = np.full((self.height, self.width), self.BACKGROUND)
+            self._empty = (field, np.fft.rfft2(field))
+        return self._empty
+
+    def _draw_cells(self, rng: np.random.Generator) -> np.ndarray:
+        """Elliptical textured cell bodies with a brighter nucleus, relative intensity up to about 1."""
+        cells = np.zeros((self.height, self.width))
+        count = rng.poisson(self.CELLS_PER_FIELD)
+        for _ in range(count):
+            center_x, center_y = rng.uniform(0, self.width), rng.uniform(0, self.height)
+            radius = rng.uniform(6.0, 16.0)
+            aspect = rng.uniform(0.5, 1.0)
+            angle = rng.uniform(0, np.pi)
+            brightness = rng.uniform(0.3, 0.6)
+            extent = int(3 * radius)
+            top, left = max(int(center_y) - extent, 0), max(int(center_x) - extent, 0)
+            bottom, right = min(int(center_y) + extent + 1, self.height), min(int(center_x) + extent + 1, self.width)
+            if top >= bottom or left >= right:
+                continue
+            y, x = np.mgrid[top:bottom, left:right]
+            dx, dy = x - center_x, y - center_y
+            u = dx * np.cos(angle) + dy * np.sin(angle)
+            v = (-dx * np.sin(angle) + dy * np.cos(angle)) / aspect
+            distance_squared = (u * u + v * v) / (radius * radius)
+            body = brightness / (1.0 + np.exp(np.minimum((distance_squared - 1.0) * 12.0, 50.0)))
+            nucleus = 0.4 * np.exp(-distance_squared / 0.08)
+            cells[top:bottom, left:right] += body + nucleus
+        # Granular cytoplasm, the pixel scale detail a focus measure picks up
+        grain = np.fft.irfft2(np.fft.rfft2(rng.standard_normal(cells.shape)) * self._kernel(self.TEXTURE_GRAIN),
+                              s=cells.shape)
+        texture = np.clip(1.0 + 0.5 * grain / grain.std(), 0.2, 2.0)
+        return self.BACKGROUND + cells * texture
+
+    def _kernel(self, blur: float) -> np.ndarray:
+        key = int(round(blur / self.BLUR_RESOLUTION))
+        if key in self._kernels:
+            self._kernels.move_to_end(key)
+            return self._kernels[key]
+        sigma = key * self.BLUR_RESOLUTION
+        # Fourier transform of a normalized Gaussian with this sigma (px)
+        kernel = np.exp(-2.0 * np.pi ** 2 * sigma ** 2 * self._frequency_squared)
+        self._kernels[key] = kernel
+        if len(self._kernels) > self.MAX_CACHED_KERNELS:
+            self._kernels.popitem(last=False)
+        return kernel
+
+    def _auto_exposure_ms(self, field: np.ndarray) -> float:
+        bright = float(np.percentile(field, 99.5))
+        return self.AUTO_EXPOSURE_TARGET * self.GAIN / (self.PHOTONS_PER_MS * max(bright, 1e-6))
+
+    def _expose(self, image: np.ndarray) -> np.ndarray:
+        electrons = np.maximum(image, 0.0) * self.PHOTONS_PER_MS * self.exposure_ms
+        # Shot noise as its normal approximation, then read noise
+        electrons += self.noise.standard_normal(electrons.shape, dtype=np.float32) * np.sqrt(electrons + self.READ_NOISE ** 2)
+        counts = electrons / self.GAIN
+        if self.autocorrect_contrast:
+            low, high = np.percentile(counts, (1, 99.5))
+            counts = (counts - low) * (255.0 / max(high - low, 1e-6))
+        return np.clip(counts, 0, 255).astype(np.uint8)
+
+    def set_exposure(self, millis: int):
+        self.auto_exposure = False
+        self.exposure_ms = float(millis)
+
+    def set_auto_exposure(self, auto: bool):
+        self.auto_exposure = auto
+
+    def set_autocorrect_contrast(self, auto: bool):
+        self.autocorrect_contrast = auto
+
+    def should_update_frequently(self):
+        return True
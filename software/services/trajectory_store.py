@@ -0,0 +1,119 @@
+import numpy as np
+import threading
+import math
+
+
+class TrajectoryStore:
+    """
+    Robot path as a preallocated numpy ring buffer of (t, x, y, z) samples, mm and seconds.
+    Holds `capacity` samples, the oldest are overwritten once it is full.
+
+    decimated(cell_size) returns the path for drawing, thinned on a grid: a sample is kept
+    when it lies in another grid cell than the previous one, which keeps the shape of the
+    path to within one cell. The result is maintained incrementally, only samples appended
+    since the last call are quantized unless the cell size changes.
+
+    export(path) writes every retained sample, .npy as a numpy array, anything else as CSV.
+    """
+    DEFAULT_CAPACITY = 500000
+    MIN_STEP_MM = 0.001
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, 4), dtype=np.float64)
+        self.total = 0  # samples ever appended, the next one is written at total % capacity
+        self.version = 0  # changes with every append and clear
+        self.lock = threading.Lock()
+        self._lod_cell = None
+        self._lod_kept = np.zeros(0, dtype=np.int64)  # sequence numbers of the kept samples
+        self._lod_processed = 0
+        self._lod_last_cell = None
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def oldest(self) -> int:
+        """Sequence number of the oldest retained sample."""
+        return max(0, self.total - self.capacity)
+
+    def append(self, timestamp: float, x: float, y: float, z: float) -> bool:
+        """Add a sample, False when it is within MIN_STEP_MM of the previous one."""
+        with self.lock:
+            if self.total:
+                last = self.samples[(self.total - 1) % self.capacity]
+                if (abs(x - last[1]) <= self.MIN_STEP_MM and abs(y - last[2]) <= self.MIN_STEP_MM
+                        and abs(z - last[3]) <= self.MIN_STEP_MM):
+                    return False
+            self.samples[self.total % self.capacity] = (timestamp, x, y, z)
+            self.total += 1
+            self.version += 1
+            return True
+
+    def clear(self):
+        with self.lock:
+            self.total = 0
+            self.version += 1
+            self._lod_cell = None
+
+    def points(self) -> np.ndarray:
+        """Copy of every retained sample in order, (n, 4) of t, x, y, z."""
+        with self.lock:
+            return self._range(self.oldest, self.total)
+
+    def decimated(self, cell_size: float) -> np.ndarray:
+        """
+        Retained path thinned on a grid of cell_size mm, (n, 3) of x, y, z.
+        The first and the latest sample are always included.
+        """
+        with self.lock:
+            if self.total == 0:
+                return np.zeros((0, 3))
+            oldest = self.oldest
+            if cell_size != self._lod_cell or self._lod_processed < oldest:
+                self._lod_cell = cell_size
+                self._lod_kept = np.zeros(0, dtype=np.int64)
+                self._lod_processed = oldest
+                self._lod_last_cell = None
+            if self._lod_processed < self.total:
+                self._decimate_new_samples(cell_size)
+            kept = self._lod_kept[np.searchsorted(self._lod_kept, oldest):]
+            self._lod_kept = kept
+            if kept[-1] != self.total - 1:
+                kept = np.append(kept, self.total - 1)
+            if kept[0] != oldest:
+                kept = np.insert(kept, 0, oldest)
+            return self.samples[kept % self.capacity, 1:]
+
+    def _decimate_new_samples(self, cell_size: float):
+        first = self._lod_processed
+        cells = np.floor(self._range(first, self.total)[:, 1:] / cell_size).astype(np.int64)
+        changed = np.ones(len(cells), dtype=bool)
+        changed[1:] = np.any(cells[1:] != cells[:-1], axis=1)
+        if self._lod_last_cell is not None:
+            changed[0] = np.any(cells[0] != self._lod_last_cell)
+        self._lod_kept = np.concatenate([self._lod_kept, first + np.flatnonzero(changed)])
+        self._lod_last_cell = cells[-1]
+        self._lod_processed = self.total
+
+    def _range(self, start: int, stop: int) -> np.ndarray:
+        """Samples with sequence numbers start..stop-1 (retained ones only), in order."""
+        begin, end = start % self.capacity, stop % self.capacity
+        if stop - start == 0:
+            return np.zeros((0, 4))
+        if begin < end:
+            return self.samples[begin:end].copy()
+        return np.concatenate([self.samples[begin:], self.samples[:end]])
+
+    def export(self, path: str):
+        """Write the retained path, .npy as a numpy array, otherwise as CSV."""
+        points = self.points()
+        if path.endswith('.npy'):
+            np.save(path, points)
+        else:
+            np.savetxt(path, points, delimiter=',', header='t,x_mm,y_mm,z_mm', comments='', fmt='%.6f')
+
+    @staticmethod
+    def cell_size_for(mm_per_pixel: float, pixels: float = 1.0) -> float:
+        """Grid size for a screen tolerance, rounded down to a power of two so small zoom changes reuse the result."""
+        return 2.0 ** math.floor(math.log2(max(mm_per_pixel * pixels, 1e-6)))
@@ -0,0 +1,61 @@
+from plates import STEPS_PER_MM, MANIFOLD_TIP_LENGTH
+from plate_geometry import PlateGeometry
+from services.collision_preflight import CollisionPreflight
+import numpy as np
+import math
+
+
+class TravelPlanner:
+    """
+    Plans a move to a target position with the smallest vertical excursion that is safe.
+    Instead of homing Z before every XY move (go_to_zero_z), the direct firmware path
+    (X, then Y, then Z) is swept with CollisionPreflight first:
+
+    - manifold raised, or direct path clear of the plate: one SetPosition, no excursion
+    - otherwise Z is raised just enough for the manifold tip to clear the plate top
+      by CollisionPreflight.SURFACE_CLEARANCE, the stage travels in XY at that height
+      and then descends to the target
+
+    Positions are absolute robot coordinates in steps, negative z is up.
+    """
+
+    def __init__(self, geometry: PlateGeometry, bottom_left: (float, float) = None):
+        self.preflight = CollisionPreflight(geometry, bottom_left)
+
+    def plan(self, start: dict, manifold: float, target: (float, float, float)) -> [(int, int, int)]:
+        """
+        Args:
+            start: current position {'x', 'y', 'z'} in steps
+            manifold: current manifold position in steps, 0 is raised
+            target: (x, y, z) in steps
+
+        Returns:
+            list: (x, y, z) of every SetPosition to execute, the last one is the target
+        """
+        target = tuple(int(value) for value in target)
+        if manifold == 0 or self.is_direct_path_safe(start, manifold, target):
+            return [target]
+
+        clearance_z = min(self.clearance_z(manifold), int(start['z']))
+        legs = []
+        if clearance_z != int(start['z']):
+            # Only Z moves, straight up on the spot
+            legs.append((int(start['x']), int(start['y']), clearance_z))
+        if target[2] > clearance_z:
+            # Target is lower: travel in XY at the clearance height, then descend
+            legs.append((target[0], target[1], clearance_z))
+        # Otherwise the firmware moves XY before Z, so the target itself is the last leg
+        legs.append(target)
+        return legs
+
+    def is_direct_path_safe(self, start: dict, manifold: float, target: (float, float, float)) -> bool:
+        rows = np.array([[start['x'], start['y'], start['z'], manifold,
+                          target[0], target[1], target[2], manifold, 0.0]], dtype=np.float64)
+        return not self.preflight.tip_collisions(rows)[0]
+
+    def clearance_z(self, manifold: float) -> int:
+        """Lowest Z (steps) at which the manifold tip is SURFACE_CLEARANCE above the plate top."""
+        tip_limit = self.preflight.plate_top + CollisionPreflight.SURFACE_CLEARANCE
+        z_mm = tip_limit + manifold / STEPS_PER_MM + MANIFOLD_TIP_LENGTH
+        # Round up, away from the plate
+        return math.floor(-z_mm * STEPS_PER_MM)
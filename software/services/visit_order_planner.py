@@ -0,0 +1,119 @@
+from services.motion_time_model import MotionTimeModel
+import numpy as np
+import logging
+
+
+class VisitOrderPlanner:
+    """
+    Orders a set of wells so the stage spends as little time as possible travelling.
+    The firmware moves X and then Y, so the travel cost between two wells is
+    separable: time(|dx|) on the X motor plus time(|dy|) on the Y motor,
+    taken from the motion-time model of the machine.
+
+    Strategies:
+    - serpentine: row by row, alternating direction (boustrophedon), no fly-back
+    - nearest_neighbour: greedy, always the cheapest unvisited well next
+    - two_opt: best of the above, improved by 2-opt segment reversals
+    """
+    STRATEGIES = ('serpentine', 'nearest_neighbour', 'two_opt')
+    MAX_TWO_OPT_PASSES = 50
+
+    def __init__(self, motion_model: MotionTimeModel = None):
+        self.motion_model = motion_model if motion_model is not None else MotionTimeModel()
+
+    def plan(self, wells: [(int, int)], positions: [(float, float)], start: (float, float),
+             strategy: str = 'two_opt') -> [(int, int)]:
+        """
+        Args:
+            wells: (row, col) of every well to visit
+            positions: (x, y) of every well in steps, same order as wells
+            start: (x, y) in steps where the stage is before the first move
+            strategy: one of STRATEGIES
+
+        Returns:
+            list: wells in visiting order
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown visit order strategy {strategy}, expected one of {self.STRATEGIES}")
+        if len(wells) < 2:
+            return list(wells)
+        points = np.vstack([np.asarray(start, dtype=np.float64), np.asarray(positions, dtype=np.float64)])
+        costs = self.cost_matrix(points)
+
+        if strategy == 'serpentine':
+            order = self._serpentine(wells, costs)
+        elif strategy == 'nearest_neighbour':
+            order = self._nearest_neighbour(costs)
+        else:
+            candidates = [self._serpentine(wells, costs), self._nearest_neighbour(costs)]
+            order = min(candidates, key=lambda candidate: self.path_cost(costs, candidate))
+            order = self._two_opt(costs, order)
+        logging.info(f"[VisitOrderPlanner] {strategy}: {len(wells)} wells, "
+                     f"{self.path_cost(costs, order):.1f}s estimated travel")
+        return [wells[index - 1] for index in order]
+
+    def cost_matrix(self, points: np.ndarray) -> np.ndarray:
+        """Travel time between every pair of points (seconds), X and Y moved one after another."""
+        dx = points[:, 0][:, None] - points[:, 0][None, :]
+        dy = points[:, 1][:, None] - points[:, 1][None, :]
+        costs = self.motion_model.axis('x').durations(dx) + self.motion_model.axis('y').durations(dy)
+        # Every move that is not a no-op is one more command round-trip
+        costs += np.where((dx != 0) | (dy != 0), self.motion_model.command_overhead, 0.0)
+        return costs
+
+    def path_cost(self, costs: np.ndarray, order: [int]) -> float:
+        path = [0] + list(order)
+        return float(costs[path[:-1], path[1:]].sum())
+
+    def _serpentine(self, wells: [(int, int)], costs: np.ndarray) -> [int]:
+        # Point indices are shifted by one, 0 is the start position
+        rows = {}
+        for index, (row, col) in enumerate(wells):
+            rows.setdefault(row, []).append((col, index + 1))
+        candidates = []
+        for rows_ascending in (True, False):
+            for first_ascending in (True, False):
+                order = []
+                ascending = first_ascending
+                for row in sorted(rows, reverse=not rows_ascending):
+                    order += [index for _, index in sorted(rows[row], reverse=not ascending)]
+                    ascending = not ascending
+                candidates.append(order)
+        return min(candidates, key=lambda candidate: self.path_cost(costs, candidate))
+
+    def _nearest_neighbour(self, costs: np.ndarray) -> [int]:
+        number_of_points = costs.shape[0]
+        visited = np.zeros(number_of_points, dtype=bool)
+        visited[0] = True
+        current = 0
+        order = []
+        for _ in range(number_of_points - 1):
+            candidate_costs = np.where(visited, np.inf, costs[current])
+            current = int(np.argmin(candidate_costs))
+            visited[current] = True
+            order.append(current)
+        return order
+
+    def _two_opt(self, costs: np.ndarray, order: [int]) -> [int]:
+        """Open path 2-opt with a fixed start: reverse path[i:j + 1] while that makes the path cheaper."""
+        path = np.array([0] + list(order))
+        number_of_points = len(path)
+        for _ in range(self.MAX_TWO_OPT_PASSES):
+            improved = False
+            for i in range(1, number_of_points - 1):
+                # All candidate segment ends j at once: old edges (i-1, i), (j, j+1) -> new (i-1, j), (i, j+1)
+                j = np.arange(i + 1, number_of_points)
+                before = costs[path[i - 1], path[i]] + np.where(
+                    j + 1 < number_of_points, costs[path[j], path[np.minimum(j + 1, number_of_points - 1)]], 0.0)
+                after = costs[path[i - 1], path[j]] + np.where(
+                    j + 1 < number_of_points, costs[path[i], path[np.minimum(j + 1, number_of_points - 1)]], 0.0)
+                # Costs are symmetric, so the reversed inner segment costs the same
+                gain = before - after
+                best = int(np.argmax(gain))
+                if gain[best] > 1e-9:
+                    end = j[best]
+                    path[i:end + 1] = path[i:end + 1][::-1].copy()
+                    improved = True
+            if not improved:
+                break
+        return [int(index) for index in path[1:]]
@@ -1,8 +1,11 @@
 import operator
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from services.fresco_xyz import FrescoXYZ
 from services.focus_measure import FocusMeasure
+from services.focus_search import FocusSearch, create_focus_search
 from services.fresco_camera import FrescoCamera
-import time
 
 
 class ZCamera:
@@ -16,6 +19,11 @@ class ZCamera:
         self.auto_focus_delta_number_of_jumps = 30
         self.one_jump = 5
         self.current_position = None
+        # Duration of a sweep and of its segments (about one frame), see sweep
+        self.sweep_seconds = 1.5
+        self.sweep_segment_seconds = 0.03
+        # Frames of the last sweep as (timestamp, z steps, focus measure), see focus_on_current_object_sweep
+        self.sweep_samples = []
 
     @property
     def fresco_camera(self):
@@ -63,6 +71,162 @@ class ZCamera:
         print('steps_2 = ' + str(steps_2))
         self.frescoXYZ.delta(0, 0, steps_2)
 
+    def focus_on_current_object_search(self, search: FocusSearch = None):
+        """
+        Autofocus with a model-based peak search instead of measuring every jump.
+        The strategy, its tolerances and the searched range come from the plate's
+        'focus_search' config (plates.py) unless a search is given. Searches from the same
+        start as focus_on_current_object and ends on the best z.
+        """
+        config = self.frescoXYZ.plate['focus_search']
+        if search is None:
+            search = create_focus_search(config)
+        self.z_go_to_zero()
+        self.frescoXYZ.delta(0, 0, self.auto_focus_anchor + self.auto_focus_delta_number_of_jumps / 2)
+        high = self.frescoXYZ.virtual_position['z']
+        low = high - config['range']
+
+        def measure_at(z):
+            self.frescoXYZ.delta(0, 0, z - self.frescoXYZ.virtual_position['z'])
+            self.frescoXYZ.clock.sleep(config['settle_seconds'])
+            return self.get_focus_measure(self._grab())
+
+        best_z, measure = search.search(measure_at, low, high)
+        print('search frames = ' + str(search.evaluations))
+        print('search measure = ' + str(measure))
+        print('search best z = ' + str(best_z))
+        self.frescoXYZ.delta(0, 0, round(best_z - self.frescoXYZ.virtual_position['z']))
+
+    def focus_on_current_object_sweep(self, sweep_steps: float = None):
+        """
+        Autofocus with one continuous z move instead of jump, sleep and grab.
+        Frames are grabbed while the stage sweeps the same range as the coarse pass of
+        focus_on_current_object, each one is timestamped on the host clock and mapped to z
+        with the motion time model. The stage then makes one corrective move to the
+        sharpest z of the interpolated focus curve.
+
+        A simulated clock jumps over the move, there is nothing to grab during it,
+        so it falls back to focus_on_current_object.
+        """
+        if self.frescoXYZ.clock.is_simulated:
+            self.focus_on_current_object()
+            return
+        if sweep_steps is None:
+            sweep_steps = self.auto_focus_delta_number_of_jumps * self.one_jump
+        self.z_go_to_zero()
+        self.frescoXYZ.delta(0, 0, self.auto_focus_anchor + self.auto_focus_delta_number_of_jumps / 2)
+        self.sweep_samples = self.sweep(-sweep_steps)
+        best_z, measure = self.best_focus_z(self.sweep_samples)
+        print('sweep frames = ' + str(len(self.sweep_samples)))
+        print('sweep measure = ' + str(measure))
+        print('sweep best z = ' + str(best_z))
+        self.frescoXYZ.delta(0, 0, round(best_z - self.frescoXYZ.virtual_position['z']))
+
+    def sweep(self, distance: float) -> list:
+        """
+        Move z by distance while grabbing frames.
+        The firmware steps at a fixed speed, a short sweep would be over within a frame or two,
+        so the move is paced over sweep_seconds: it is sent as back-to-back segments of about
+        one frame each, on a worker thread while this one keeps grabbing.
+
+        Returns:
+            list of (timestamp, z steps, focus measure), in grab order
+        """
+        clock = self.frescoXYZ.clock
+        axis = self.frescoXYZ.motion_model.axis('z')
+        z_start = self.frescoXYZ.virtual_position['z']
+        segments = 1
+        if axis.duration(distance) < self.sweep_seconds:
+            segments = int(max(1, min(abs(distance), round(self.sweep_seconds / self.sweep_segment_seconds))))
+        frames = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            move = executor.submit(self._sweep_moves, distance, segments)
+            while not move.done():
+                before = clock.now()
+                pixels_array = self._grab()
+                frames.append(((before + clock.now()) / 2, pixels_array))
+            moves = move.result()
+
+        z = [self._sweep_z_at(timestamp, moves, z_start) for timestamp, _ in frames]
+        return [(timestamp, z_steps, self.get_focus_measure(pixels_array))
+                for (timestamp, pixels_array), z_steps in zip(frames, z)]
+
+    def _sweep_moves(self, distance: float, segments: int) -> list:
+        """Send the segments of a sweep, returns (time sent, time answered, z before, distance) of each."""
+        clock = self.frescoXYZ.clock
+        boundaries = np.round(np.linspace(0, distance, segments + 1))
+        interval = self.sweep_seconds / segments
+        moves = []
+        first_sent = clock.now()
+        for index, (begin, end) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+            wait = first_sent + index * interval - clock.now()
+            if wait > 0:
+                clock.sleep(wait)
+            z_before = self.frescoXYZ.virtual_position['z']
+            sent = clock.now()
+            self.frescoXYZ.delta(0, 0, end - begin)
+            moves.append((sent, clock.now(), z_before, end - begin))
+        return moves
+
+    def _sweep_z_at(self, timestamp: float, moves: list, z_start: float) -> float:
+        """Stage z at a host timestamp during a sweep, from the motion time model."""
+        motion_model = self.frescoXYZ.motion_model
+        axis = motion_model.axis('z')
+        z = z_start
+        for sent, answered, z_before, distance in moves:
+            if timestamp < sent:
+                break
+            duration = axis.duration(distance)
+            if self.frescoXYZ.virtual_only:
+                # The emulator starts the move when the command is sent
+                motion_start, scale = sent, 1.0
+            else:
+                # The firmware answers once the move is done, the overhead is split between sending and answering.
+                # The model gives the shape of the move, the measured window its length
+                motion_start = sent + motion_model.command_overhead / 2
+                window = answered - motion_model.command_overhead / 2 - motion_start
+                scale = duration / window if window > 0 else 1.0
+            elapsed = min((timestamp - motion_start) * scale, duration)
+            z = z_before + np.sign(distance) * float(axis.distance_at(elapsed, distance))
+        return float(z)
+
+    def _grab(self):
+        # Only flash LED when using physical camera, not virtual renderer
+        if self._camera is not None:
+            self.frescoXYZ.is_capturing = True
+        pixels_array = self.fresco_camera.get_current_image()
+        if self._camera is not None:
+            self.frescoXYZ.is_capturing = False
+        return pixels_array
+
+    @staticmethod
+    def best_focus_z(samples: list) -> (float, float):
+        """
+        Sharpest z of a sweep, (z steps, focus measure). The peak of the sampled curve is
+        refined with a parabola through it and its neighbours, kept only if it opens
+        downwards and stays within the swept range.
+        """
+        if not samples:
+            raise ValueError('No frames were grabbed during the sweep')
+        z = np.array([z_steps for _, z_steps, _ in samples])
+        measures = np.array([measure for _, _, measure in samples], dtype=np.float64)
+        # Frames grabbed while the stage stands still share a z, keep the best of each
+        order = np.lexsort((-measures, z))
+        z, measures = z[order], measures[order]
+        unique = np.ones(len(z), dtype=bool)
+        unique[1:] = z[1:] != z[:-1]
+        z, measures = z[unique], measures[unique]
+
+        peak = int(np.argmax(measures))
+        best_z, best_measure = float(z[peak]), float(measures[peak])
+        neighbours = slice(max(peak - 2, 0), peak + 3)
+        if len(z[neighbours]) >= 3:
+            a, b, _ = np.polyfit(z[neighbours], measures[neighbours], 2)
+            if a < 0:
+                best_z = float(np.clip(-b / (2 * a), z[0], z[-1]))
+        logging.info(f"[ZCamera] Sweep of {len(samples)} frames, best z {best_z:.1f} (measure {best_measure:.2f})")
+        return best_z, best_measure
+
     # starts to find the best focus measure from current position within delta making one_jump_size.
     # returns the best measure and number of steps from final position to the best focus.
     def find_offset_for_best_measure(self, one_jump_size: int, delta_jumps: int) -> (int, int):
@@ -77,7 +241,7 @@ class ZCamera:
             measure = self.get_focus_measure(pixels_array)
             focus_measure_data_points.append(measure)
             self.frescoXYZ.delta(0, 0, -1 * one_jump_size)
-            time.sleep(0.5)
+            self.frescoXYZ.clock.sleep(0.5)
         max_index, max_value = max(enumerate(focus_measure_data_points), key=operator.itemgetter(1))
         number_of_steps_back = (delta_jumps - max_index + 1) * one_jump_size
         return max_value, number_of_steps_back
@@ -0,0 +1,39 @@
+from services.move_coalescer import MoveCoalescer
+from services.fresco_command import FrescoCommand
+import unittest
+
+
+def push_all(coalescer: MoveCoalescer, lines: [str]) -> [str]:
+    sent = []
+    for line in lines:
+        sent += coalescer.push(FrescoCommand.parse(line))
+    sent += coalescer.flush()
+    return [command.to_wire().strip() for command in sent]
+
+
+class MoveCoalescerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.coalescer = MoveCoalescer()
+        self.coalescer.begin()
+
+    def test_raise_traverse_lower_keeps_the_raise(self):
+        sent = push_all(self.coalescer, ['Delta 0 0 -500', 'Delta 1800 0 0', 'Delta 0 0 500'])
+        # Merging the raise into the traverse would move X at working height
+        self.assertEqual(sent, ['Delta 0 0 -500', 'Delta 1800 0 500'])
+
+    def test_moves_in_firmware_axis_order_are_merged(self):
+        sent = push_all(self.coalescer, ['Delta 100 0 0', 'Delta 100 0 0', 'Delta 0 50 0', 'Delta 0 0 10'])
+        self.assertEqual(sent, ['Delta 200 50 10'])
+
+    def test_y_before_x_is_not_merged(self):
+        sent = push_all(self.coalescer, ['Delta 0 50 0', 'Delta 100 0 0'])
+        self.assertEqual(sent, ['Delta 0 50 0', 'Delta 100 0 0'])
+
+    def test_zero_delta_is_dropped(self):
+        sent = push_all(self.coalescer, ['Delta 0 0 -500', 'Delta 0 0 0', 'Delta 0 0 -100'])
+        self.assertEqual(sent, ['Delta 0 0 -600'])
+
+
+if __name__ == '__main__':
+    unittest.main()
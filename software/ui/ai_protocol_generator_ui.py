@@ -604,11 +604,14 @@ class MyProtocol(BaseProtocol):
 
 **Pumps (self.fresco_xyz):**
 - `self.fresco_xyz.delta_pump(pump_index, delta_steps)` - pump_index 0-7, positive=dispense, negative=aspirate
+- `self.fresco_xyz.delta_pumps({{pump_index: delta_steps, ...}})` - several pumps in one command, use when dosing several reagents per well
 - `self.fresco_xyz.manifold_delta(delta_steps)` - move manifold up/down
 - `self.fresco_xyz.go_to_zero_manifold()` - return manifold to zero position
 
 **Imaging (self.z_camera):**
 - `self.z_camera.focus_on_current_object()` - autofocus at current position
+- `self.z_camera.focus_on_current_object_sweep()` - faster autofocus with one continuous z move
+- `self.z_camera.focus_on_current_object_search()` - autofocus with the plate's peak search strategy, fewest frames
 - `self.z_camera.fresco_camera.get_current_image()` - capture image (returns numpy array)
 
 **Image Storage (self.images_storage):**
@@ -20,8 +20,20 @@ class AutoFocus(Frame):
         auto_focus_button = tk.Button(self, text='Focus', command=self.auto_focus)
         auto_focus_button.grid(column=0, row=1, ipadx=2, pady=2, sticky=tk.W)
 
+        sweep_focus_button = tk.Button(self, text='Sweep focus', command=self.sweep_focus)
+        sweep_focus_button.grid(column=0, row=2, ipadx=2, pady=2, sticky=tk.W)
+
+        search_focus_button = tk.Button(self, text='Search focus', command=self.search_focus)
+        search_focus_button.grid(column=0, row=3, ipadx=2, pady=2, sticky=tk.W)
+
         remember_anchor_focus_button = tk.Button(self, text='Remember anchor focus')
-        remember_anchor_focus_button.grid(column=0, row=2, ipadx=2, pady=2, sticky=tk.W)
+        remember_anchor_focus_button.grid(column=0, row=4, ipadx=2, pady=2, sticky=tk.W)
 
     def auto_focus(self):
         _thread.start_new_thread(self.z_camera.focus_on_current_object, ())
+
+    def sweep_focus(self):
+        _thread.start_new_thread(self.z_camera.focus_on_current_object_sweep, ())
+
+    def search_focus(self):
+        _thread.start_new_thread(self.z_camera.focus_on_current_object_search, ())
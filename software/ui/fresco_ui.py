@@ -4,7 +4,8 @@ from tkinter.ttk import Frame, Label, Notebook
 from services.fresco_xyz import FrescoXYZ
 from services.z_camera import ZCamera
 from services.fresco_camera import BaseCamera
-from services.fresco_renderer import FrescoRenderer
+from services.plate_scene import PlateScene
+from services.pump_event_store import PumpTrace
 from services.protocols_performer import ProtocolsPerformer
 from services.images_storage import ImagesStorage
 from ui.stdout_view import StdoutView, StdoutCapture
@@ -69,12 +70,13 @@ class PumpTraceView(tk.Frame):
         self.well_label.pack(side=tk.LEFT, padx=10)
 
         self.current_well = None
-        self.current_event_count = 0
+        # Traces of the shown well, extended with new events only
+        self.trace = None
         self.update_in_progress = False  # Prevent concurrent updates
         self.after(500, self.update_loop)
 
     def on_mode_changed(self):
-        self.current_event_count = 0  # Force update on next call
+        self.trace = None  # Rebuild on next call
         self.update_plot()
 
     def update_loop(self):
@@ -98,36 +100,26 @@ class PumpTraceView(tk.Frame):
                 if not well_label:
                     return
 
-            well = None
-            for w in self.renderer.wells:
-                if w.label == well_label:
-                    well = w
-                    break
-
-            if not well or not well.pump_events:
+            well = self.renderer.well_by_label(well_label)
+            if not well:
+                return
+            well_index = self.renderer.well_index(well)
+            if not self.renderer.pump_events.event_count[well_index]:
                 return
 
             # Skip update if same well and no new pump events
-            event_count = len(well.pump_events)
-            if well_label == self.current_well and event_count == self.current_event_count:
+            if self.trace is None or self.trace.well != well_index or self.trace.synchronized != self.sync_var.get():
+                self.trace = PumpTrace(self.renderer.pump_events, well_index, self.sync_var.get())
+                self.trace.update()
+            elif not self.trace.update() and well_label == self.current_well:
                 return
 
             self.current_well = well_label
-            self.current_event_count = event_count
+            pump_data = self.trace.pump_data
 
-            if self.sync_var.get():
-                pump_data = self._build_synchronized_traces(well)
-            else:
-                pump_data = self._build_independent_traces(well)
-
-            # Find min/max y values for synchronized y-axis scaling in Sync mode
-            min_y = 0
-            max_y = 0
-            if self.sync_var.get():
-                for pump_idx in range(8):
-                    if pump_data[pump_idx]['y']:
-                        min_y = min(min_y, min(pump_data[pump_idx]['y']))
-                        max_y = max(max_y, max(pump_data[pump_idx]['y']))
+            # Shared y-axis range for Sync mode
+            min_y = self.trace.min_y
+            max_y = self.trace.max_y
 
             for pump_idx in range(8):
                 ax = self.axes[pump_idx]
@@ -166,52 +158,6 @@ class PumpTraceView(tk.Frame):
             print(f"Pump trace update error: {e}")
         finally:
             self.update_in_progress = False
-    
-    def _build_synchronized_traces(self, well):
-        pump_data = {}
-        for i in range(8):
-            pump_data[i] = {'x': [], 'y': [], 'interruptions': []}
-
-        cumulative = [0] * 8
-        last_timestamp_per_pump = [None] * 8
-
-        for event_seq, (timestamp, pump_idx, delta) in enumerate(well.pump_events):
-            # Check for gap in this specific pump's timeline
-            if last_timestamp_per_pump[pump_idx] is not None:
-                if (timestamp - last_timestamp_per_pump[pump_idx]) > 5.0:
-                    pump_data[pump_idx]['interruptions'].append(event_seq)
-
-            cumulative[pump_idx] += delta
-            last_timestamp_per_pump[pump_idx] = timestamp
-
-            for p in range(8):
-                pump_data[p]['x'].append(event_seq)
-                pump_data[p]['y'].append(cumulative[p])
-
-        return pump_data
-    
-    def _build_independent_traces(self, well):
-        pump_data = {}
-        for i in range(8):
-            pump_data[i] = {'x': [], 'y': [], 'interruptions': []}
-
-        cumulative = [0] * 8
-        per_pump_event_seq = [0] * 8
-        last_timestamp_per_pump = [None] * 8
-
-        for timestamp, pump_idx, delta in well.pump_events:
-            # Check for gap in this specific pump's timeline
-            if last_timestamp_per_pump[pump_idx] is not None:
-                if (timestamp - last_timestamp_per_pump[pump_idx]) > 5.0:
-                    pump_data[pump_idx]['interruptions'].append(len(pump_data[pump_idx]['x']))
-
-            cumulative[pump_idx] += delta
-            pump_data[pump_idx]['x'].append(per_pump_event_seq[pump_idx])
-            pump_data[pump_idx]['y'].append(cumulative[pump_idx])
-            per_pump_event_seq[pump_idx] += 1
-            last_timestamp_per_pump[pump_idx] = timestamp
-
-        return pump_data
 
 
 class MainUI(Frame):
@@ -220,7 +166,7 @@ class MainUI(Frame):
                  fresco_xyz: FrescoXYZ,
                  z_camera: ZCamera,
                  fresco_camera: BaseCamera,
-                 fresco_renderer: FrescoRenderer,
+                 fresco_renderer: PlateScene,
                  virtual_only: bool):
         super().__init__()
         self.fresco_xyz = fresco_xyz
@@ -235,7 +181,7 @@ class MainUI(Frame):
         self.view_modes = ['renderer', 'camera', 'stdout']
         self.current_view_index = 0
         
-        if self.virtual_only:
+        if self.fresco_camera is None:
             self.view_modes = ['renderer', 'stdout']
         
         self.camera = self.fresco_renderer
@@ -371,7 +317,9 @@ class MainUI(Frame):
             self.time_scale_var.set(1.0)
 
     def update_image(self):
-        image_array = self.camera.get_current_image()
+        # Renderer overlaps the readback with the next frame for the live view
+        get_image = getattr(self.camera, 'get_preview_image', self.camera.get_current_image)
+        image_array = get_image()
         camera_image = ImageTk.PhotoImage(image=Image.fromarray(image_array).resize((800, 800), Image.ANTIALIAS))
         self.image_label.configure(image=camera_image)
         self.image_label.image = camera_image
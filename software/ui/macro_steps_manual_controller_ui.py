@@ -130,13 +130,8 @@ class MacroStepsManualController(Frame):
                 messagebox.showerror("Error", f"Well {well_label} out of range")
                 return
 
-            # Calculate position from plate corner
-            well_spacing = cfg.get('steps_per_well', 1800)
-            corner_offset_x = int(cfg.get('corner_offset_x', 14.38) * 200)
-            corner_offset_y = int(cfg.get('corner_offset_y', 11.24) * 200)
-
-            x = corner_offset_x + col * well_spacing
-            y = corner_offset_y + row * well_spacing
+            # Position from plate corner
+            x, y = self.fresco_xyz.plate_geometry.well_position_steps(row, col)
             z = self.fresco_xyz.virtual_position['z']
 
             # Move to well
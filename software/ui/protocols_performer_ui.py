@@ -53,6 +53,11 @@ class ProtocolsPerformerUI(Frame):
         else:
             self.time_scale_var = self.external_time_scale_var
 
+        # Collision preflight before touching the hardware
+        self.preflight_var = tk.BooleanVar(value=not self.protocols_performer.fresco_xyz.virtual_only)
+        tk.Checkbutton(self, text="Collision preflight (dry run before moving)",
+                       variable=self.preflight_var).pack(anchor=tk.W, padx=10)
+
         # Run button
         btn_frame = Frame(self)
         btn_frame.pack(pady=15)
@@ -114,7 +119,10 @@ class ProtocolsPerformerUI(Frame):
                 self.after(0, lambda: self.log(f"[WARNING] Invalid timescale, using 1.0: {e}", "error"))
 
             self.after(0, lambda ts=time_scale: self.log(f"[TIMESCALE] Running at {ts}x speed", "info"))
-            self.protocols_performer.perform_protocol(protocol_path, time_scale=time_scale)
+            preflight = self.preflight_var.get()
+            if preflight:
+                self.after(0, lambda: self.log("[PREFLIGHT] Dry run and collision sweep...", "info"))
+            self.protocols_performer.perform_protocol(protocol_path, time_scale=time_scale, preflight=preflight)
             
             if self.protocols_performer.fresco_xyz.should_stop():
                 self.after(0, lambda: self.log("[STOPPED] Protocol stopped by user", "info"))
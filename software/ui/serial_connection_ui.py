@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter.ttk import Frame, Label, Combobox
 from services.services import global_services
+from datetime import datetime
 
 
 class SerialConnectionView(Frame):
@@ -28,6 +29,9 @@ class SerialConnectionView(Frame):
         connect_button = tk.Button(self, text='Disconnect')
         connect_button.pack()
 
+        telemetry_button = tk.Button(self, text='Export telemetry', command=self.export_telemetry)
+        telemetry_button.pack()
+
     def connect(self):
         try:
             self.serial_service.create_connection(self.port_combobox.get())
@@ -37,5 +41,15 @@ class SerialConnectionView(Frame):
     def disconnect(self):
         pass
 
+    def export_telemetry(self):
+        connection = self.serial_service.current_connection
+        if connection is None:
+            print('No serial connection')
+            return
+        print(connection.telemetry.summary())
+        path = 'serial_telemetry_' + datetime.now().strftime("%d-%b-%Y-%H-%M-%S") + '.json'
+        connection.telemetry.export_json(path)
+        print('Telemetry saved to ' + path)
+
     def refresh_ports(self):
         print(self.serial_service.all_available_ports())